@@ -0,0 +1,223 @@
+"""Benchmark every stage of the report pipeline on synthetic data.
+
+    python -m benchmarks.run [--sizes 1000,10000,100000] [--schools 50]
+                             [--output bench_results.json]
+                             [--baseline benchmarks/baseline.json] [--threshold 0.25]
+                             [--min-delta-ms 1.0]
+                             [--save-baseline] [--skip-pdf]
+
+Stages: ingest (parse + score, cold), ingest_cached (Parquet hit),
+process_single_school, stats (one school), stats_table
+(all schools + benchmarks), item_cube (answer counts per school x
+item), chart, insights (local Gemini stand-in), template_fill and pdf. Each stage reports median/min wall time over
+--repeat runs plus peak traced memory from one extra run. With --baseline,
+any stage whose median is more than --threshold slower than the baseline
+(and at least --min-delta-ms slower, so sub-millisecond jitter doesn't
+count) is reported and the exit code is 1.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not POSIX: no whole-process peak RSS
+    resource = None
+
+# Isolated caches so runs never hit a previous run's uploads or insights
+os.environ["EDXSO_CACHE_DIR"] = tempfile.mkdtemp(prefix="edxso-bench-")
+
+from benchmarks.synthetic import generate_survey  # noqa: E402
+from edxso.charts import create_monogram_fallback, create_stress_chart  # noqa: E402
+from edxso.dataset_cache import build_dataset, content_hash  # noqa: E402
+from edxso.insights import TokenBucket, generate_insights_with_gemini, set_client, set_limiter  # noqa: E402
+from edxso.items import ItemCube  # noqa: E402
+from edxso.stats import SchoolStatsTable  # noqa: E402
+from edxso.report import (  # noqa: E402
+    compute_school_stats,
+    process_single_school,
+    render_report_html,
+    safe_generate_pdf,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STANDIN_KEY = "benchmark-standin"
+UNTHROTTLED = 1e9  # tokens per second: the stand-in never waits on the Gemini quota
+
+
+# --- LOCAL GEMINI STAND-IN ---
+class _StandInResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StandInModels:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        return _StandInResponse(json.dumps({
+            "p1": "Synthetic paragraph one. " * 8,
+            "p2": "Synthetic paragraph two. " * 8,
+            "p3": "Synthetic paragraph three. " * 8,
+        }))
+
+
+class StandInClient:
+    def __init__(self, latency):
+        self.models = StandInModels(latency)
+
+
+# --- MEASUREMENT ---
+def measure(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+        "peak_mem_mb": round(peak / 1024 / 1024, 3),
+    }
+
+
+def bench_size(students, schools, repeat, skip_pdf, gemini_latency):
+    df = generate_survey(students, schools, seed=students)
+    data = df.to_csv(index=False).encode()
+    filename = "synthetic.csv"
+    results = {}
+
+    # Cold ingest: a fresh key each run so the Parquet cache never hits
+    counter = iter(range(10 ** 9))
+    _, results["ingest"] = measure(lambda: build_dataset(data, filename, key=f"cold-{next(counter)}-{content_hash(data)}"), repeat)
+    key = content_hash(data)
+    build_dataset(data, filename, key=key)
+    dataset, results["ingest_cached"] = measure(lambda: build_dataset(data, filename, key=key), repeat)
+
+    school = dataset.schools[0]
+    (sdf, total), results["process_single_school"] = measure(lambda: process_single_school(dataset, school), repeat)
+    _, results["stats"] = measure(lambda: compute_school_stats(sdf, total, dataset.columns), repeat)
+    _, results["stats_table"] = measure(lambda: SchoolStatsTable.from_frame(dataset.df, dataset.columns), repeat)
+    _, results["item_cube"] = measure(lambda: ItemCube.from_frame(dataset.df, dataset.columns), repeat)
+    stats = dataset.school_stats(school)
+    chart, results["chart"] = measure(lambda: create_stress_chart(stats), repeat)
+    logo = create_monogram_fallback(school)
+
+    # The insights stage measures our code, not EDXSO_GEMINI_RPM: with the real
+    # quota, later sizes queue behind earlier sizes' calls and look like regressions
+    set_client(STANDIN_KEY, StandInClient(gemini_latency))
+    set_limiter(TokenBucket(UNTHROTTLED, capacity=UNTHROTTLED))
+    ai_content, results["insights"] = measure(
+        lambda: generate_insights_with_gemini(STANDIN_KEY, stats, school, force_refresh=True), repeat
+    )
+    html, results["template_fill"] = measure(lambda: render_report_html(stats, school, logo, chart, ai_content), repeat)
+    results["template_fill"]["bytes"] = len(html.encode("utf-8"))
+
+    if skip_pdf:
+        results["pdf"] = {"skipped": "--skip-pdf"}
+    elif safe_generate_pdf(html) is None:  # warm-up; also tells us if a browser is available
+        results["pdf"] = {"skipped": "PDF renderer unavailable"}
+    else:
+        pdf, results["pdf"] = measure(lambda: safe_generate_pdf(html), repeat)
+        results["pdf"]["bytes"] = len(pdf or b"")
+
+    return {"students": students, "schools": schools, "rows": len(dataset.df), "stages": results}
+
+
+# --- BASELINE COMPARISON ---
+def compare(current, baseline, threshold, min_delta_ms=0.0):
+    regressions = []
+    base_runs = {str(r["students"]): r for r in baseline.get("runs", [])}
+    for run in current["runs"]:
+        base = base_runs.get(str(run["students"]))
+        if base is None:
+            continue
+        for stage, m in run["stages"].items():
+            b = base["stages"].get(stage, {})
+            if "median_ms" not in m or "median_ms" not in b or b["median_ms"] <= 0:
+                continue
+            ratio = m["median_ms"] / b["median_ms"]
+            if ratio > 1 + threshold and m["median_ms"] - b["median_ms"] >= min_delta_ms:
+                regressions.append({
+                    "students": run["students"],
+                    "stage": stage,
+                    "baseline_ms": b["median_ms"],
+                    "current_ms": m["median_ms"],
+                    "ratio": round(ratio, 3),
+                })
+    return regressions
+
+
+def print_table(report):
+    print(f"{'students':>9} {'stage':<22} {'median ms':>11} {'min ms':>10} {'peak MB':>9}")
+    for run in report["runs"]:
+        for stage, m in run["stages"].items():
+            if "skipped" in m:
+                print(f"{run['students']:>9} {stage:<22} {'skipped: ' + m['skipped']:>32}")
+                continue
+            print(f"{run['students']:>9} {stage:<22} {m['median_ms']:>11.3f} {m['min_ms']:>10.3f} {m['peak_mem_mb']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated student counts")
+    parser.add_argument("--schools", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="seconds the Gemini stand-in sleeps per call")
+    parser.add_argument("--skip-pdf", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "runs": [
+            bench_size(int(n), args.schools, args.repeat, args.skip_pdf, args.gemini_latency)
+            for n in args.sizes.split(",")
+        ],
+    }
+    # Whole-process high-water mark; also covers allocations tracemalloc can't see (C parsers)
+    if resource is not None:
+        report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print_table(report)
+    if "peak_rss_mb" in report:
+        print(f"peak RSS {report['peak_rss_mb']} MB")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold, args.min_delta_ms)
+        for r in regressions:
+            print(f"REGRESSION {r['students']} students / {r['stage']}: "
+                  f"{r['baseline_ms']} ms -> {r['current_ms']} ms (x{r['ratio']})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
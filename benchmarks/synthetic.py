@@ -0,0 +1,80 @@
+"""Synthetic survey files in the same layout as real uploads.
+
+    python -m benchmarks.synthetic --students 10000 --schools 50 -o survey.csv
+
+Columns 0-7 are metadata (column 1 is `sname`), columns 8-27 are the 20
+Likert items. Answers follow a per-school and per-student stress level and
+carry the noise real exports have: odd casing, stray/non-breaking spaces,
+blanks and typos.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SCALE = np.array(['Never', 'Rarely', 'Sometimes', 'Often', 'Always'], dtype=object)
+TYPOS = np.array(['Somtimes', 'Oftn', 'Allways', 'Rarley', 'N/A', '-'], dtype=object)
+METADATA = ['timestamp', 'sname', 'grade', 'section', 'gender', 'age', 'city', 'state']
+N_ITEMS = 20
+N_REVERSE = 5  # last five items are reverse-keyed
+
+
+def generate_survey(students, schools, seed=0, blank_rate=0.02, typo_rate=0.01, case_rate=0.05, nbsp_rate=0.03):
+    rng = np.random.default_rng(seed)
+    school_names = np.array([f"Synthetic School {i:04d}" for i in range(schools)], dtype=object)
+    school_of = rng.integers(0, schools, students)
+
+    # Latent stress: school mean + student spread, mapped onto the 1..5 scale
+    school_level = rng.normal(3.0, 0.45, schools)
+    student_level = school_level[school_of] + rng.normal(0, 0.6, students)
+    answers = np.clip(np.rint(student_level[:, None] + rng.normal(0, 0.9, (students, N_ITEMS))), 1, 5).astype(int)
+    answers[:, -N_REVERSE:] = 6 - answers[:, -N_REVERSE:]
+    text = SCALE[answers - 1]
+
+    # --- NOISE ---
+    lower = rng.random(text.shape) < case_rate
+    text[lower] = np.char.lower(text[lower].astype(str)).astype(object)
+    upper = rng.random(text.shape) < case_rate / 2
+    text[upper] = np.char.upper(text[upper].astype(str)).astype(object)
+    nbsp = rng.random(text.shape) < nbsp_rate
+    text[nbsp] = (text[nbsp].astype(str).astype(object) + '\xa0')
+    padded = rng.random(text.shape) < nbsp_rate
+    text[padded] = (' ' + text[padded].astype(str).astype(object) + ' ')
+    typos = rng.random(text.shape) < typo_rate
+    text[typos] = rng.choice(TYPOS, typos.sum())
+    text[rng.random(text.shape) < blank_rate] = None
+
+    data = {
+        'timestamp': pd.Timestamp("2026-01-15") + pd.to_timedelta(rng.integers(0, 30 * 86400, students), unit='s'),
+        'sname': school_names[school_of],
+        'grade': rng.integers(6, 13, students),
+        'section': rng.choice(np.array(list("ABCDE"), dtype=object), students),
+        'gender': rng.choice(np.array(['Male', 'Female', 'Other'], dtype=object), students, p=[0.49, 0.49, 0.02]),
+        'age': rng.integers(11, 19, students),
+        'city': rng.choice(np.array(['New Delhi', 'Mumbai', 'Pune', 'Jaipur'], dtype=object), students),
+        'state': rng.choice(np.array(['DL', 'MH', 'RJ'], dtype=object), students),
+    }
+    for j in range(N_ITEMS):
+        data[f"Q{j + 1}"] = text[:, j]
+    return pd.DataFrame(data, columns=METADATA + [f"Q{j + 1}" for j in range(N_ITEMS)])
+
+
+def write_survey(df, path):
+    if path.lower().endswith('.csv'):
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--schools", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="synthetic_survey.csv", help=".csv or .xlsx")
+    args = parser.parse_args()
+    write_survey(generate_survey(args.students, args.schools, args.seed), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# EDXSO report engine: scoring, stats and rendering helpers shared by the
+# Streamlit app and any headless tooling.
+import os
+
+# Local on-disk caches (insights, converted uploads, finished reports)
+CACHE_DIR = os.getenv("EDXSO_CACHE_DIR", os.path.join(os.getcwd(), ".edxso_cache"))
+
+
+def cache_path(*parts):
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
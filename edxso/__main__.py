@@ -0,0 +1,5 @@
+import sys
+
+from edxso.cli import main
+
+sys.exit(main())
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from edxso import cache_path
+
+# --- CONFIGURATION ---
+ENABLED = os.getenv("EDXSO_ARTIFACT_CACHE", "1") != "0"
+DEFAULT_MAX_BYTES = int(os.getenv("EDXSO_ARTIFACT_CACHE_MB", "512")) * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    key TEXT PRIMARY KEY,
+    school TEXT NOT NULL,
+    format TEXT NOT NULL,
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def artifact_key(sdf, stats, school_name, logo_bytes, ai_content, template_version, output_format):
+    # Everything that can change the finished file: the school's scored rows,
+    # its stats row (which carries the pooled benchmarks), the logo, the
+    # insight text, the template/render version and the output format
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(sdf, index=False).to_numpy().tobytes())
+    h.update(hashlib.sha256(logo_bytes or b"").digest())
+    material = {
+        "school": str(school_name),
+        "stats": stats,
+        "insights": ai_content,
+        "template": template_version,
+        "format": output_format,
+    }
+    h.update(json.dumps(material, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ArtifactCache:
+    # Finished reports on disk, indexed in SQLite and evicted LRU by total bytes.
+    # Hit/miss/bytes-saved counters are persisted so they survive restarts and
+    # add up across the app and CLI runs.
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or cache_path("artifacts", "index.sqlite3")
+        self.root = os.path.dirname(self.path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _count(self, **deltas):
+        for name, delta in deltas.items():
+            self._conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM artifacts WHERE key = ?", (key,)).fetchone()
+            data = None
+            if row is not None:
+                try:
+                    with open(os.path.join(self.root, row[0]), "rb") as f:
+                        data = f.read()
+                except OSError:
+                    # File removed behind our back; forget the entry
+                    self._conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+            if data is None:
+                self._count(misses=1)
+                return None
+            self._conn.execute("UPDATE artifacts SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._count(hits=1, bytes_saved=len(data))
+        return data
+
+    def put(self, key, school_name, output_format, data):
+        rel = os.path.join(key[:2], f"{key}.{output_format.lower()}")
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (key, school, format, path, bytes, created, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, str(school_name), output_format, rel, len(data), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM artifacts").fetchone()
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, rel, size in self._conn.execute("SELECT key, path, bytes FROM artifacts ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+            try:
+                os.remove(os.path.join(self.root, rel))
+            except OSError:
+                pass
+            total -= size
+            evicted += 1
+        self._count(evictions=evicted)
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM artifacts").fetchone()
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "bytes_saved": counters.get("bytes_saved", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def clear(self):
+        with self._lock:
+            for (rel,) in self._conn.execute("SELECT path FROM artifacts").fetchall():
+                try:
+                    os.remove(os.path.join(self.root, rel))
+                except OSError:
+                    pass
+            self._conn.execute("DELETE FROM artifacts")
+            self._conn.execute("DELETE FROM counters")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_artifact_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArtifactCache()
+        return _cache
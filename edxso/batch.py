@@ -0,0 +1,113 @@
+import json
+import re
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from edxso.insights import InsightGenerator, generate_insights_with_gemini
+from edxso.report import OUTPUT_EXTENSIONS, generate_final_report, process_single_school
+from edxso.telemetry import trace, write_prometheus
+
+# --- CONFIGURATION ---
+DEFAULT_JOBS = 4
+MANIFEST_NAME = "manifest.json"
+
+
+def safe_stem(school_name):
+    return re.sub(r'[^\w\-. ]+', '_', str(school_name)).strip() or "school"
+
+
+def report_filename(school_name, ext, taken):
+    # Zip-safe, unique entry name per school
+    base = safe_stem(school_name)
+    name = f"{base}_Report.{ext}"
+    n = 2
+    while name in taken:
+        name = f"{base}_Report ({n}).{ext}"
+        n += 1
+    taken.add(name)
+    return name
+
+
+def render_school(dataset, api_key, school_name, logo_file, output_format, insights=None, force_refresh=False):
+    # (file_data, fallback): fallback is why the summary is templated
+    # ("deadline" / "error"), or None when it came from Gemini or the cache
+    sdf, total = process_single_school(dataset, school_name)
+    stats = dataset.school_stats(school_name)
+    if insights is not None and school_name in insights.futures:
+        # Fetched concurrently up front; only waits if this school's call is still in flight
+        ai_content = insights.result(school_name)
+    else:
+        ai_content = generate_insights_with_gemini(api_key, stats, school_name, force_refresh=force_refresh)
+    file_data = generate_final_report(
+        sdf, total, api_key, school_name, logo_file, output_format, dataset.columns,
+        ai_content=ai_content, stats=stats
+    )
+    if not file_data:
+        raise RuntimeError(f"{output_format} rendering returned no data.")
+    return file_data, ai_content.get("fallback")
+
+
+def iter_reports(dataset, api_key, logo_file, output_format, schools=None, jobs=DEFAULT_JOBS, force_refresh=False):
+    # Renders every school (or the given subset) across a worker pool and
+    # yields (school_name, file_data, error, seconds, fallback) as each one
+    # finishes. A failing school yields its error instead of aborting the rest.
+    schools = list(dataset.schools if schools is None else schools)
+
+    # Kick off every school's Gemini call first so network waits overlap with rendering
+    insights = InsightGenerator(api_key, force_refresh=force_refresh)
+    for name in schools:
+        stats = dataset.school_stats(name)
+        if stats is not None:
+            insights.submit(name, stats)
+
+    def timed(name):
+        started = time.perf_counter()
+        with trace():
+            try:
+                file_data, fallback = render_school(dataset, api_key, name, logo_file, output_format, insights)
+                return file_data, None, time.perf_counter() - started, fallback
+            except Exception as e:
+                return None, f"{type(e).__name__}: {e}", time.perf_counter() - started, None
+
+    with insights, ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(timed, name): name for name in schools}
+        for fut in as_completed(futures):
+            yield (futures[fut], *fut.result())
+
+
+def generate_batch_zip(dataset, api_key, logo_file, output_format, schools=None, jobs=DEFAULT_JOBS, progress=None, force_refresh=False):
+    # Writes each report into the ZIP as soon as it finishes; failures are
+    # recorded in the manifest. progress(done, total, school_name, error) is
+    # called from the caller's thread.
+    schools = list(dataset.schools if schools is None else schools)
+    ext = OUTPUT_EXTENSIONS[output_format]
+    manifest = {"format": output_format, "total": len(schools), "succeeded": [], "failed": []}
+    taken = {MANIFEST_NAME}
+    started = time.perf_counter()
+
+    out = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024)
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        reports = iter_reports(dataset, api_key, logo_file, output_format, schools, jobs, force_refresh)
+        for done, (name, file_data, error, seconds, fallback) in enumerate(reports, start=1):
+            if error is None:
+                entry = report_filename(name, ext, taken)
+                zf.writestr(entry, file_data)
+                record = {"school": name, "file": entry, "bytes": len(file_data), "seconds": round(seconds, 3)}
+                if fallback:
+                    record["insights"] = f"templated ({fallback})"
+                manifest["succeeded"].append(record)
+            else:
+                manifest["failed"].append({"school": name, "error": error})
+            if progress:
+                progress(done, len(schools), name, error)
+
+        manifest["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        write_prometheus()
+        zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2, default=str))
+
+    out.seek(0)
+    data = out.read()
+    out.close()
+    return data, manifest
@@ -0,0 +1,50 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+from importlib import metadata
+
+from edxso import cache_path
+
+# --- ONE-TIME BROWSER BOOTSTRAP ---
+# Streamlit re-executes the script on every interaction, so installing
+# Chromium at module level meant a child process per click. This runs at most
+# once per process, and a marker file (per Playwright version) skips it
+# entirely once the browser is known to be installed.
+# Run `python -m edxso.bootstrap` at deploy time to pay the cost up front.
+
+_done = False
+_lock = threading.Lock()
+
+
+def _marker_path():
+    try:
+        version = metadata.version("playwright")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    return cache_path("bootstrap", f"chromium-playwright-{version}.ok")
+
+
+def ensure_playwright_browser():
+    global _done
+    if _done:
+        return
+    with _lock:
+        if _done:
+            return
+        # Installer output goes to stderr (fd 2): stdout belongs to the
+        # caller, e.g. the CLI's JSON lines
+        if importlib.util.find_spec("playwright") is None:
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "playwright"], stdout=2)
+        marker = _marker_path()
+        if not os.path.exists(marker):
+            result = subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], stdout=2)
+            if result.returncode == 0:
+                with open(marker, "w") as f:
+                    f.write("ok\n")
+        _done = True
+
+
+if __name__ == "__main__":
+    ensure_playwright_browser()
@@ -0,0 +1,140 @@
+import base64
+import functools
+import os
+from html import escape
+from io import BytesIO
+
+# --- CONFIGURATION ---
+# "svg" draws straight from the stats; "png" rasterizes with matplotlib
+CHART_FORMAT = os.getenv("EDXSO_CHART_FORMAT", "svg").lower()
+
+CATEGORIES = ['Balanced', 'Mild', 'Moderate', 'High', 'Severe']
+COLORS = ['#22c55e', '#3b82f6', '#eab308', '#f97316', '#ef4444']
+STAT_KEYS = ['pct_balanced', 'pct_mild', 'pct_moderate', 'pct_high', 'pct_severe']
+FONT_STACK = "Inter, 'Helvetica Neue', Arial, sans-serif"
+
+
+def _svg_data_uri(svg):
+    data = base64.b64encode(svg.encode("utf-8")).decode("ascii")
+    return f"data:image/svg+xml;base64,{data}"
+
+
+def _png_data_uri(buf):
+    data = base64.b64encode(buf.getbuffer()).decode("ascii")
+    return f"data:image/png;base64,{data}"
+
+
+def _fmt(val):
+    return f"{float(val):g}"
+
+
+# --- STRESS DISTRIBUTION CHART ---
+def stress_chart_svg(stats, width=1000, height=500):
+    values = [float(stats[k]) for k in STAT_KEYS]
+    left, right, top, bottom = 40, width - 40, 90, height - 60
+    plot_h = bottom - top
+    # Same headroom matplotlib's autoscale left for the value labels
+    y_max = max(max(values) * 1.05, 1.0)
+    slot = (right - left) / len(values)
+    bar_w = slot * 0.8
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" font-family="{FONT_STACK}">',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        f'<rect x="{left}" y="{top}" width="{right - left}" height="{plot_h}" fill="#f8fafc"/>',
+        f'<text x="{width / 2}" y="{top - 40}" text-anchor="middle" font-size="19" font-weight="700" fill="#0f172a">Student Stress Distribution</text>',
+    ]
+    for i, (label, val, color) in enumerate(zip(CATEGORIES, values, COLORS)):
+        x = left + i * slot + (slot - bar_w) / 2
+        h = plot_h * val / y_max
+        y = bottom - h
+        cx = x + bar_w / 2
+        parts.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{bar_w:.1f}" height="{h:.1f}" fill="{color}" stroke="#ffffff" stroke-width="2"/>')
+        parts.append(f'<text x="{cx:.1f}" y="{y - 8:.1f}" text-anchor="middle" font-size="16" font-weight="700" fill="#475569">{_fmt(val)}%</text>')
+        parts.append(f'<text x="{cx:.1f}" y="{bottom + 28}" text-anchor="middle" font-size="15" font-weight="600" fill="#334155">{label}</text>')
+    parts.append(f'<line x1="{left}" y1="{bottom}" x2="{right}" y2="{bottom}" stroke="#cbd5e1" stroke-width="1"/>')
+    parts.append('</svg>')
+    return "".join(parts)
+
+
+def stress_chart_png(stats):
+    # Object-oriented matplotlib (no pyplot global state), safe to call from worker threads
+    from matplotlib.figure import Figure
+
+    values = [stats[k] for k in STAT_KEYS]
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    bars = ax.bar(CATEGORIES, values, color=COLORS, edgecolor='white', linewidth=2)
+
+    ax.set_facecolor('#f8fafc')
+    fig.patch.set_facecolor('#ffffff')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.spines['bottom'].set_color('#cbd5e1')
+
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 1,
+                f'{height}%', ha='center', va='bottom', fontsize=12, fontweight='bold', color='#475569')
+
+    ax.set_yticks([])
+    ax.tick_params(axis='x', labelsize=11, labelcolor='#334155')
+    for tick in ax.get_xticklabels():
+        tick.set_fontweight('600')
+    ax.set_title('Student Stress Distribution', pad=20, fontsize=14, fontweight='bold', color='#0f172a')
+    fig.tight_layout()
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
+    return _png_data_uri(buf)
+
+
+def create_stress_chart(stats, fmt=None):
+    if (fmt or CHART_FORMAT) == "png":
+        try:
+            return stress_chart_png(stats)
+        except ImportError:
+            pass
+    return _svg_data_uri(stress_chart_svg(stats))
+
+
+# --- MONOGRAM FALLBACK LOGO ---
+def monogram_svg(initials, size=200):
+    r = size / 2
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {size} {size}">'
+        f'<circle cx="{r}" cy="{r}" r="{r}" fill="#0f172a"/>'
+        f'<text x="{r}" y="{r}" dy="0.35em" text-anchor="middle" font-family="{FONT_STACK}" '
+        f'font-size="{size * 0.28:.0f}" font-weight="700" fill="#ffffff">{escape(initials)}</text>'
+        '</svg>'
+    )
+
+
+def monogram_png(initials):
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Circle
+
+    fig = Figure(figsize=(2, 2))
+    ax = fig.subplots()
+    ax.add_patch(Circle((0.5, 0.5), 0.5, color='#0f172a'))
+    ax.text(0.5, 0.5, initials, ha='center', va='center', 
+            fontsize=40, fontweight='bold', color='white', fontfamily='sans-serif')
+    ax.axis('off')
+    buf = BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', pad_inches=0, transparent=True)
+    return _png_data_uri(buf)
+
+
+@functools.lru_cache(maxsize=1024)
+def _monogram(initials, fmt):
+    if fmt == "png":
+        try:
+            return monogram_png(initials)
+        except ImportError:
+            pass
+    return _svg_data_uri(monogram_svg(initials))
+
+
+def create_monogram_fallback(school_name, fmt=None):
+    # Memoized by initials: most schools share a handful of two-letter prefixes
+    return _monogram(str(school_name)[:2].upper(), fmt or CHART_FORMAT)
@@ -0,0 +1,160 @@
+import argparse
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from edxso.artifact_cache import get_artifact_cache
+from edxso.batch import DEFAULT_JOBS, iter_reports, report_filename
+from edxso.columnar import open_store
+from edxso.dataset_cache import build_dataset
+from edxso.incremental import IncrementalDataset
+from edxso.report import OUTPUT_EXTENSIONS
+from edxso.telemetry import stage_summary, write_prometheus
+
+# --- HEADLESS BULK GENERATION ---
+# Same scoring / stats / rendering as the Streamlit app, without Streamlit.
+# Progress goes to stdout as JSON lines so cron jobs and pipelines can parse it:
+#   {"event": "loaded", ...} {"event": "report", ...} ... {"event": "summary", ...}
+# Library diagnostics go through logging to stderr and never mix in.
+
+
+def emit(event, **fields):
+    print(json.dumps({"event": event, **fields}, default=str), flush=True)
+
+
+def load_logo(path):
+    if not path:
+        return None
+    with open(path, "rb") as f:
+        buf = io.BytesIO(f.read())
+    buf.name = os.path.basename(path)  # logo_asset falls back to the name for the mime type
+    return buf
+
+
+def select_schools(dataset, spec):
+    if not spec or spec == ["all"]:
+        return dataset.schools
+    wanted = []
+    for item in spec:
+        wanted.extend(s.strip() for s in item.split(",") if s.strip())
+    return wanted
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m edxso",
+        description="Generate EDXSO school reports from a survey file without the web UI.",
+    )
+    parser.add_argument("input", nargs="?", help="survey data file (.csv or .xlsx)")
+    # A columnar store is read-only, so it can't take an appended wave
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--columnar", metavar="STORE",
+                        help="read from a memory-mapped store built with `python -m edxso.columnar build` instead of INPUT")
+    parser.add_argument("-s", "--schools", action="append", default=None,
+                        help='school names (repeat or comma-separate); default "all"')
+    parser.add_argument("-f", "--format", choices=["html", "pdf", "native"], default="html",
+                        help="output format; native draws a vector PDF without a browser")
+    parser.add_argument("-o", "--output-dir", default="reports", help="directory for the generated reports")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS, help="parallel report workers")
+    parser.add_argument("--logo", help="logo image used for every school (default: monogram)")
+    parser.add_argument("--force-refresh", action="store_true", help="ignore cached AI insights")
+    source.add_argument("--append-to", metavar="DATASET",
+                        help="append INPUT as a new wave of a stored dataset and, unless --schools is given, "
+                             "regenerate only the schools that received new responses")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr, format="%(levelname)s %(name)s: %(message)s")
+    if bool(args.input) == bool(args.columnar):
+        parser.error("give either INPUT or --columnar STORE")
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY")
+    output_format = args.format.upper()
+    started = time.perf_counter()
+
+    store = None
+    data = None
+    if args.input:
+        with open(args.input, "rb") as f:
+            data = f.read()
+    try:
+        if args.columnar:
+            dataset = open_store(args.columnar)
+        elif args.append_to:
+            store = IncrementalDataset(args.append_to)
+            wave = store.append(data, os.path.basename(args.input))
+            emit("appended", dataset=store.name, **wave)
+            dataset = store.load()
+        else:
+            dataset = build_dataset(data, os.path.basename(args.input))
+    except ValueError as e:
+        emit("error", message=str(e))
+        return 2
+    load_seconds = time.perf_counter() - started
+
+    if store is not None and not args.schools:
+        schools = store.stale
+    else:
+        schools = select_schools(dataset, args.schools)
+    emit("loaded", input=args.input or f"columnar:{args.columnar}", rows=len(dataset), schools=len(schools), seconds=round(load_seconds, 3))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    taken = set()  # unique within this run; re-runs overwrite the previous night's files
+    logo_file = load_logo(args.logo)
+    render_seconds = []
+    rendered = []
+    failed = 0
+    templated = 0
+
+    reports = iter_reports(dataset, api_key, logo_file, output_format, schools, args.jobs, args.force_refresh)
+    for done, (name, file_data, error, seconds, fallback) in enumerate(reports, start=1):
+        record = {"done": done, "total": len(schools), "school": name, "seconds": round(seconds, 3)}
+        if error is None:
+            path = os.path.join(args.output_dir, report_filename(name, OUTPUT_EXTENSIONS[output_format], taken))
+            with open(path, "wb") as f:
+                f.write(file_data)
+            render_seconds.append(seconds)
+            if fallback:
+                # Templated summary: the school stays stale so a later run re-enriches it
+                record["insights"] = f"templated ({fallback})"
+                templated += 1
+            else:
+                rendered.append(name)
+            emit("report", status="ok", file=path, bytes=len(file_data), **record)
+        else:
+            failed += 1
+            emit("report", status="error", error=error, **record)
+
+    emit(
+        "summary",
+        total=len(schools),
+        succeeded=len(schools) - failed,
+        failed=failed,
+        templated_insights=templated,
+        load_seconds=round(load_seconds, 3),
+        wall_seconds=round(time.perf_counter() - started, 3),
+        report_seconds={
+            "min": round(min(render_seconds), 3) if render_seconds else None,
+            "median": round(statistics.median(render_seconds), 3) if render_seconds else None,
+            "max": round(max(render_seconds), 3) if render_seconds else None,
+        },
+        stages=stage_summary(),
+        artifact_cache=get_artifact_cache().stats(),
+    )
+    if store is not None:
+        store.mark_rendered(rendered)
+    write_prometheus()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
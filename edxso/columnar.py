@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from edxso import CACHE_DIR, cache_path
+from edxso.dataset_cache import content_hash
+from edxso.ingest import load_upload, required_names
+from edxso.items import ItemCube, cube_counts
+from edxso.scoring import CATEGORY_LABELS, ITEM_END, ITEM_START, category_codes
+from edxso.stats import COUNT_COLUMNS, SchoolStatsTable, add_counts, level_matrix, school_counts
+from edxso.telemetry import span
+
+# --- MEMORY-MAPPED COLUMNAR STORE ---
+# Multi-year data is built once into fixed-width arrays on disk, with rows
+# grouped by school:
+#   answers.npy      (20 x rows) codes into meta["answers"], the answers as
+#                    written in the files (one vocabulary for every item),
+#                    -1 = blank; each item's rows are contiguous
+#   total_score.npy  (rows,) int16
+#   category.npy     (rows,) int8 codes into CATEGORY_LABELS
+#   item_counts.npy  (schools x 20 x 5) answer counts, see edxso.items
+#   meta.json        header, answers, school -> [start, stop) row range,
+#                    per-school counts
+# Opening maps the arrays read-only, so a school's slice is a view into the
+# OS page cache, shared by every session and process reading the same store;
+# school_frame wraps those views in categoricals without copying them.
+# Rows without a school name are left out (they never appear in a report).
+FORMAT_VERSION = 6  # 2: score_sum counts; 3: item_counts.npy; 4: answer levels, 0 = blank; 5: blank level in item_counts; 6: raw answer codes
+ARRAYS = ("total_score", "category")
+
+_open_stores = {}
+_open_lock = threading.Lock()
+
+
+def store_dir(name):
+    return os.path.dirname(cache_path("columnar", name, "meta.json"))
+
+
+def code_dtype(n_categories):
+    # The code width pandas picks for a Categorical with this many categories;
+    # codes stored at that width go into Categorical.from_codes as-is
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def encode_answers(df, items, vocabulary):
+    # (items x rows) codes of each raw answer in vocabulary (extended in
+    # place), -1 for blanks
+    out = np.empty((len(items), len(df)), dtype=np.int64)
+    for j, col in enumerate(items):
+        local, uniques = pd.factorize(df[col], use_na_sentinel=True)
+        lut = np.array([vocabulary.setdefault(str(u), len(vocabulary)) for u in uniques] + [-1], dtype=np.int64)
+        out[j] = lut[local]
+    return out
+
+
+def list_stores():
+    root = os.path.join(CACHE_DIR, "columnar")
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root) if os.path.exists(os.path.join(root, d, "meta.json")))
+
+
+def build_store(name, paths):
+    # Scores each file (through the usual ingest + Parquet cache), then writes
+    # all rows sorted by school into a fresh directory swapped in atomically
+    header = None
+    school_ids = {}
+    answers = {}
+    counts = None
+    parts = []
+    sources = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        df, file_header = load_upload(data, os.path.basename(path), content_hash(data))
+        if header is None:
+            header = file_header
+        elif required_names(file_header) != required_names(header):
+            raise ValueError(f"{path}: survey columns don't match {paths[0]}.")
+
+        with span("columnar_encode", rows=len(df)):
+            local, uniques = pd.factorize(df['sname'], use_na_sentinel=True)
+            lut = np.array([school_ids.setdefault(u, len(school_ids)) for u in uniques] + [-1], dtype=np.int64)
+            codes = lut[local]
+            valid = codes >= 0
+            totals = df['total_score'].to_numpy()
+            items = file_header[ITEM_START:ITEM_END]
+            parts.append((
+                codes[valid],
+                level_matrix(df, items)[valid],
+                encode_answers(df, items, answers)[:, valid],
+                totals[valid].astype(np.int16),
+                category_codes(totals)[valid],
+            ))
+            delta = school_counts(df, file_header)
+            counts = delta if counts is None else add_counts(counts, delta)
+        sources.append({"file": os.path.basename(path), "sha256": content_hash(data), "rows": int(valid.sum())})
+
+    if header is None:
+        raise ValueError("No input files given.")
+
+    codes = np.concatenate([p[0] for p in parts])
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(school_ids)))])
+    names = list(school_ids)
+
+    final = store_dir(name)
+    tmp = f"{final}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    with span("columnar_write", rows=len(codes)):
+        answer_codes = np.concatenate([p[2] for p in parts], axis=1)[:, order]
+        np.save(os.path.join(tmp, "answers.npy"), answer_codes.astype(code_dtype(len(answers))))
+        for i, array in enumerate(ARRAYS, start=3):
+            np.save(os.path.join(tmp, f"{array}.npy"), np.concatenate([p[i] for p in parts])[order])
+        item_counts = sum(cube_counts(p[1], p[0], len(school_ids)) for p in parts)
+        np.save(os.path.join(tmp, "item_counts.npy"), item_counts.astype(np.uint32))
+        meta = {
+            "version": FORMAT_VERSION,
+            "header": header,
+            "items": header[ITEM_START:ITEM_END],
+            "answers": list(answers),
+            "rows": int(len(codes)),
+            "schools": [[n, int(bounds[i]), int(bounds[i + 1])] for i, n in enumerate(names)],
+            "counts": {str(k): [int(v) for v in vals] for k, vals in zip(counts.index, counts.to_numpy())},
+            "sources": sources,
+            "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    # Readers that already mapped the old files keep them until they close
+    old = f"{final}.old-{os.getpid()}"
+    if os.path.exists(final):
+        os.replace(final, old)
+    os.replace(tmp, final)
+    shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+class ColumnarDataset:
+    # Same interface the report pipeline uses on ScoredDataset, backed by
+    # read-only memory maps instead of an in-memory DataFrame
+    def __init__(self, name):
+        self.name = name
+        path = store_dir(name)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Columnar store {name!r} was built by an incompatible version; rebuild it.")
+        self.key = f"columnar:{name}:{self.meta['built']}"
+        self.columns = self.meta["header"]
+        self.items = self.meta["items"]
+        # np.asarray drops the memmap subclass but keeps the mapping (no copy)
+        self.answers = np.asarray(np.load(os.path.join(path, "answers.npy"), mmap_mode="r"))
+        self.answer_labels = pd.Index(self.meta["answers"], dtype=object)
+        self.total_score = np.asarray(np.load(os.path.join(path, "total_score.npy"), mmap_mode="r"))
+        self.category = np.asarray(np.load(os.path.join(path, "category.npy"), mmap_mode="r"))
+        self.schools = [school for school, _, _ in self.meta["schools"]]
+        self.school_index = {school: slice(start, stop) for school, start, stop in self.meta["schools"]}
+        counts = pd.DataFrame.from_dict(self.meta["counts"], orient="index", columns=COUNT_COLUMNS, dtype=np.int64)
+        self.stats = SchoolStatsTable(counts.rename_axis("sname"))
+        item_counts = np.load(os.path.join(path, "item_counts.npy")).astype(np.int64)
+        self.item_cube = ItemCube(item_counts, self.schools, self.items)
+        self.nbytes = 0  # pages live in the OS cache, not in this process's heap
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def school_stats(self, school_name):
+        stats = self.stats.lookup(school_name)
+        if stats is not None:
+            stats['items'] = self.item_cube.profile(school_name)
+        return stats
+
+    def school_rows(self, school_name):
+        return self.school_index.get(school_name)
+
+    def school_frame(self, school_name, start=0, stop=None):
+        # Items come back as categoricals of the answers as uploaded, and the
+        # item, score and category columns are views of the mapped arrays
+        # (only the one-category sname column is allocated). start/stop select
+        # a window of the school's rows (chunked exports).
+        school = self.school_rows(school_name) or slice(0, 0)
+        window = range(school.start, school.stop)[start:stop]
+        rows = slice(window.start, window.stop)
+        n = len(window)
+        columns = {'sname': pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [school_name])}
+        for j, item in enumerate(self.items):
+            # Codes come from build_store, so skip the range check
+            columns[item] = pd.Categorical.from_codes(self.answers[j, rows], self.answer_labels, validate=False)
+        columns['total_score'] = self.total_score[rows]
+        columns['category'] = pd.Categorical.from_codes(self.category[rows], CATEGORY_LABELS, validate=False)
+        return pd.DataFrame(columns, copy=False)
+
+
+def open_store(name):
+    # One mapping per store per process; reopened when the store is rebuilt
+    meta_path = os.path.join(store_dir(name), "meta.json")
+    if not os.path.exists(meta_path):
+        raise ValueError(f"No columnar store named {name!r}.")
+    mtime = os.path.getmtime(meta_path)
+    with _open_lock:
+        entry = _open_stores.get(name)
+        if entry is None or entry[0] != mtime:
+            entry = (mtime, ColumnarDataset(name))
+            _open_stores[name] = entry
+        return entry[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m edxso.columnar", description="Build or list memory-mapped survey stores.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="score survey files into a named store (replaces an existing one)")
+    build.add_argument("name")
+    build.add_argument("inputs", nargs="+", help="survey files (.csv or .xlsx), e.g. one per year")
+    sub.add_parser("list", help="list stores")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name in list_stores():
+            ds = open_store(name)
+            print(json.dumps({"name": name, "rows": len(ds), "schools": len(ds.schools), "built": ds.meta["built"]}))
+        return 0
+    started = time.perf_counter()
+    try:
+        meta = build_store(args.name, args.inputs)
+    except ValueError as e:
+        print(json.dumps({"event": "error", "message": str(e)}))
+        return 2
+    print(json.dumps({
+        "event": "built",
+        "name": args.name,
+        "rows": meta["rows"],
+        "schools": len(meta["schools"]),
+        "sources": meta["sources"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from edxso.ingest import load_upload
+from edxso.items import ItemCube
+from edxso.stats import SchoolStatsTable
+from edxso.telemetry import span
+
+# --- CONFIGURATION ---
+# Upper bound on scored frames kept in memory across all Streamlit sessions
+DEFAULT_CACHE_BYTES = int(os.getenv("EDXSO_DATASET_CACHE_MB", "1024")) * 1024 * 1024
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ScoredDataset:
+    # A parsed + scored upload and the row positions of every school in it
+    def __init__(self, key, df, columns=None, stats=None):
+        self.key = key
+        self.df = df
+        # Full header of the uploaded file; df itself only holds the columns we use
+        self.columns = columns or df.columns.tolist()
+        self.schools = df['sname'].dropna().unique().tolist()
+        self.school_index = df.groupby('sname', sort=False, observed=True).indices
+        self.nbytes = int(df.memory_usage(deep=True).sum())
+        # Incremental stores pass a table already updated from per-school counts
+        self._stats = stats
+        self._stats_lock = threading.Lock()
+        self._item_cube = None
+
+    @property
+    def stats(self):
+        # All schools' stats rows + pooled benchmarks, built once on first use
+        with self._stats_lock:
+            if self._stats is None:
+                with span("stats_table", schools=len(self.schools)):
+                    self._stats = SchoolStatsTable.from_frame(self.df, self.columns)
+            return self._stats
+
+    @property
+    def item_cube(self):
+        # Answer counts per school x item x level, built once on first use
+        with self._stats_lock:
+            if self._item_cube is None:
+                with span("item_cube", schools=len(self.schools)):
+                    self._item_cube = ItemCube.from_frame(self.df, self.columns)
+            return self._item_cube
+
+    def school_stats(self, school_name):
+        stats = self.stats.lookup(school_name)
+        if stats is not None:
+            stats['items'] = self.item_cube.profile(school_name)
+        return stats
+
+    def __len__(self):
+        return len(self.df)
+
+    def school_rows(self, school_name):
+        return self.school_index.get(school_name)
+
+    def school_frame(self, school_name, start=0, stop=None):
+        # take() returns a fresh frame, so callers can't mutate the shared copy.
+        # start/stop select a window of the school's rows (chunked exports).
+        idx = self.school_rows(school_name)
+        if idx is None:
+            return self.df.iloc[0:0].copy()
+        return self.df.take(idx[start:stop])
+
+
+def build_dataset(data, filename, key=None):
+    key = key or content_hash(data)
+    df, header = load_upload(data, filename, key)
+    return ScoredDataset(key, df, columns=header)
+
+
+class DatasetCache:
+    # Thread-safe LRU keyed by upload hash, evicting by total memory footprint
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key):
+        with self._lock:
+            ds = self._entries.get(key)
+            if ds is not None:
+                self._entries.move_to_end(key)
+            return ds
+
+    def put(self, ds):
+        with self._lock:
+            old = self._entries.pop(ds.key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[ds.key] = ds
+            self._bytes += ds.nbytes
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return ds
+
+    def get_or_load(self, data, filename):
+        with span("dataset_cache", bytes_in=len(data)) as s:
+            key = content_hash(data)
+            ds = self.get(key)
+            s.hit(ds is not None)
+            if ds is not None:
+                return ds
+            # One parse per upload even if several sessions ask at once
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                ds = self.get(key)
+                if ds is None:
+                    ds = self.put(build_dataset(data, filename, key=key))
+            with self._lock:
+                self._key_locks.pop(key, None)
+            return ds
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Module-level so every Streamlit session in the process shares it
+dataset_cache = DatasetCache()
+
+
+def load_scored_dataset(data, filename):
+    return dataset_cache.get_or_load(data, filename)
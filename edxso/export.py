@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+import pandas as pd
+
+from edxso.batch import safe_stem
+from edxso.telemetry import span
+
+# --- STREAMING EXPORT OF SCORED DATA ---
+# Writes the scored rows (all schools or a subset) chunk by chunk, so memory
+# stays at one chunk no matter how many rows are exported:
+#   parquet  one row group per chunk (pyarrow ParquetWriter)
+#   csv      appended chunk by chunk
+#   xlsx     xlsxwriter in constant_memory mode, spilling to a new sheet
+#            every EXCEL_MAX_ROWS rows
+# With partition=True the destination is a directory with one file per school.
+CHUNK_ROWS = int(os.getenv("EDXSO_EXPORT_CHUNK_ROWS", "50000"))
+EXCEL_MAX_ROWS = 1_048_575  # sheet limit minus the header row
+FORMATS = ("parquet", "csv", "xlsx")
+
+
+def export_columns(dataset):
+    # Columns available for projection: sname, the 20 items, total_score, category
+    name = dataset.schools[0] if dataset.schools else None
+    return dataset.school_frame(name, 0, 0).columns.tolist()
+
+
+def iter_chunks(dataset, schools=None, columns=None, chunk_rows=CHUNK_ROWS):
+    # (school_name, frame) per chunk of at most chunk_rows rows
+    schools = dataset.schools if schools is None else schools
+    for name in schools:
+        rows = dataset.school_rows(name)
+        if rows is None:
+            continue
+        n = rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+        for start in range(0, n, chunk_rows):
+            frame = dataset.school_frame(name, start, start + chunk_rows)
+            yield name, frame if columns is None else frame[columns]
+
+
+def _plain(frame):
+    # Categoricals become plain values so every chunk shares one schema
+    out = {}
+    for col in frame.columns:
+        values = frame[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(values):
+            values = values.astype(object)
+        out[col] = values
+    return pd.DataFrame(out)
+
+
+# --- WRITERS ---
+class ParquetSink:
+    def __init__(self, path):
+        import pyarrow  # noqa: F401  optional dependency, only needed for this format
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        frame = _plain(frame)
+        if self.schema is None:
+            self.schema = pa.schema([
+                (col, pa.from_numpy_dtype(frame[col].dtype) if pd.api.types.is_numeric_dtype(frame[col]) else pa.string())
+                for col in frame.columns
+            ])
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.header = True
+
+    def write(self, frame):
+        frame.to_csv(self.f, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.f.close()
+
+
+class ExcelSink:
+    def __init__(self, path):
+        import xlsxwriter
+
+        # constant_memory flushes each row to disk once the next one starts
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.sheet = None
+        self.row = 0
+        self.sheets = 0
+
+    def _new_sheet(self, columns):
+        self.sheets += 1
+        self.sheet = self.workbook.add_worksheet("Scores" if self.sheets == 1 else f"Scores {self.sheets}")
+        self.sheet.write_row(0, 0, columns)
+        self.row = 1
+
+    def write(self, frame):
+        # Column-wise tolist() yields native Python values; blanks become None
+        plain = _plain(frame)
+        values = []
+        for col in plain.columns:
+            series = plain[col]
+            values.append(series.where(series.notna(), None).tolist() if series.dtype == object else series.tolist())
+        for record in zip(*values):
+            if self.sheet is None or self.row > EXCEL_MAX_ROWS:
+                self._new_sheet(plain.columns.tolist())
+            self.sheet.write_row(self.row, 0, record)
+            self.row += 1
+
+    def close(self):
+        if self.sheet is None:
+            self.workbook.add_worksheet("Scores")
+        self.workbook.close()
+
+
+SINKS = {"parquet": ParquetSink, "csv": CsvSink, "xlsx": ExcelSink}
+MIME_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "zip": "application/zip",
+}
+
+
+def export_dataset(dataset, dest, fmt="parquet", columns=None, schools=None, partition=False, chunk_rows=CHUNK_ROWS):
+    # Returns a summary: rows written and the file(s) created
+    if fmt not in SINKS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose one of {', '.join(FORMATS)}.")
+    if columns is not None:
+        unknown = set(columns) - set(export_columns(dataset))
+        if unknown:
+            raise ValueError(f"Unknown export columns: {sorted(unknown)}")
+
+    files = []
+    rows = 0
+    with span("export", format=fmt, partition=partition) as s:
+        sink = current = None
+        taken = set()
+        if not partition:
+            sink = SINKS[fmt](dest)
+            files.append(dest)
+        else:
+            os.makedirs(dest, exist_ok=True)
+        try:
+            for name, frame in iter_chunks(dataset, schools, columns, chunk_rows):
+                if partition and name != current:
+                    if sink is not None:
+                        sink.close()
+                    path = os.path.join(dest, _partition_file(name, fmt, taken))
+                    sink, current = SINKS[fmt](path), name
+                    files.append(path)
+                sink.write(frame)
+                rows += len(frame)
+        finally:
+            if sink is not None:
+                sink.close()
+        s.attrs["rows"] = rows
+    return {"format": fmt, "rows": rows, "files": files}
+
+
+def export_download(dataset, fmt, columns=None, schools=None, partition=False, basename="scored_data"):
+    # For the web UI: exports through a temp directory (zipping partitions) and
+    # returns (bytes, filename, mime). Only the finished file is held in memory,
+    # since the download widget needs it as bytes.
+    with tempfile.TemporaryDirectory(prefix="edxso-export-") as tmp:
+        if partition:
+            out_dir = os.path.join(tmp, basename)
+            summary = export_dataset(dataset, out_dir, fmt, columns, schools, partition=True)
+            path, filename = os.path.join(tmp, f"{basename}.zip"), f"{basename}.zip"
+            with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                for f in summary["files"]:
+                    zf.write(f, os.path.basename(f))
+            mime = MIME_TYPES["zip"]
+        else:
+            filename = f"{basename}.{fmt}"
+            path = os.path.join(tmp, filename)
+            export_dataset(dataset, path, fmt, columns, schools)
+            mime = MIME_TYPES[fmt]
+        with open(path, "rb") as f:
+            return f.read(), filename, mime
+
+
+def _partition_file(school_name, fmt, taken):
+    stem = safe_stem(school_name)
+    name = f"{stem}.{fmt}"
+    n = 2
+    while name in taken:
+        name = f"{stem} ({n}).{fmt}"
+        n += 1
+    taken.add(name)
+    return name
+
+
+# --- CLI ---
+def main(argv=None):
+    from edxso.cli import select_schools
+    from edxso.columnar import open_store
+    from edxso.dataset_cache import build_dataset
+
+    parser = argparse.ArgumentParser(prog="python -m edxso.export", description="Export scored survey rows without loading them into one frame.")
+    parser.add_argument("input", nargs="?", help="survey data file (.csv or .xlsx)")
+    parser.add_argument("--columnar", metavar="STORE", help="export from a memory-mapped store instead of INPUT")
+    parser.add_argument("-o", "--output", required=True, help="output file, or directory with --partition-by-school")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="parquet")
+    parser.add_argument("-c", "--columns", help="comma-separated columns to keep (default: all)")
+    parser.add_argument("-s", "--schools", action="append", default=None, help='school names (repeat or comma-separate); default "all"')
+    parser.add_argument("--partition-by-school", action="store_true", help="write one file per school")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+    if bool(args.input) == bool(args.columnar):
+        parser.error("give either INPUT or --columnar STORE")
+
+    started = time.perf_counter()
+    try:
+        if args.columnar:
+            dataset = open_store(args.columnar)
+        else:
+            with open(args.input, "rb") as f:
+                dataset = build_dataset(f.read(), os.path.basename(args.input))
+        columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+        summary = export_dataset(
+            dataset, args.output, args.format, columns=columns,
+            schools=select_schools(dataset, args.schools),
+            partition=args.partition_by_school, chunk_rows=args.chunk_rows,
+        )
+    except ValueError as e:
+        print(json.dumps({"event": "error", "message": str(e)}))
+        return 2
+    print(json.dumps({"event": "exported", **summary, "seconds": round(time.perf_counter() - started, 3)}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
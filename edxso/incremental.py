@@ -0,0 +1,233 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from edxso import cache_path
+from edxso.dataset_cache import ScoredDataset, content_hash, dataset_cache
+from edxso.ingest import HAVE_PARQUET, concat_categorical, normalize_school_names, read_categorical, read_header, required_names
+from edxso.scoring import ITEM_END, ITEM_START, score_responses
+from edxso.stats import COUNT_COLUMNS, SchoolStatsTable, add_counts, school_counts
+from edxso.telemetry import span
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: only threads within one process are serialized
+    fcntl = None
+
+# --- INCREMENTAL SURVEY STORE ---
+# Survey waves are appended to a named, persisted scored dataset instead of
+# re-uploading and rescoring the cumulative file. Each append:
+#   * hashes every full row of the new file and drops rows already stored
+#     (or repeated within the wave),
+#   * scores only the new rows and writes them as one more part file,
+#   * adds the new rows' per-school counts to the stored counts, so the
+#     stats table is updated without touching old rows,
+#   * marks the schools that received rows as stale until their reports are
+#     regenerated.
+# Layout: .edxso_cache/datasets/<name>/{meta.json, part-NNNNN.parquet, part-NNNNN.hashes.npy,
+#         hashes.idx.npy, .lock}
+# hashes.idx.npy holds every stored row hash, sorted, so an append reads one
+# file and does a binary search; it is rebuilt from the per-part hashes when
+# it doesn't cover meta["rows"] (a crash between writing it and meta.json).
+# Every meta.json read-modify-write holds an flock on .lock, as the app and
+# the job worker processes update the same store.
+
+STORE_NAME_RE = re.compile(r'^[\w.-]+$')
+PART_EXT = "parquet" if HAVE_PARQUET else "pkl"
+
+_store_locks = {}
+_store_locks_guard = threading.Lock()
+
+
+def _store_lock(name):
+    with _store_locks_guard:
+        return _store_locks.setdefault(name, threading.Lock())
+
+
+def row_hashes(df):
+    # 64-bit hash of every column of each row, as read from the file
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+class IncrementalDataset:
+    def __init__(self, name):
+        if not STORE_NAME_RE.match(name or ""):
+            raise ValueError(f"Invalid dataset name {name!r}: use letters, digits, '.', '_' or '-'.")
+        self.name = name
+        self.meta_path = cache_path("datasets", name, "meta.json")
+        self.lock = _store_lock(name)
+        self.meta = self._read_meta()
+
+    # --- PERSISTENCE ---
+    def _read_meta(self):
+        if not os.path.exists(self.meta_path):
+            return {"header": None, "parts": [], "rows": 0, "counts": {}, "stale": [], "waves": []}
+        with open(self.meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self.meta_path)
+
+    def _path(self, filename):
+        return cache_path("datasets", self.name, filename)
+
+    @contextmanager
+    def _locked(self):
+        # The thread lock orders this process's callers; the flock orders
+        # processes and is released when the file is closed
+        with self.lock, open(self._path(".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _write_part(self, df, hashes):
+        stem = f"part-{len(self.meta['parts']) + 1:05d}"
+        part = f"{stem}.{PART_EXT}"
+        path = self._path(part)
+        if HAVE_PARQUET:
+            df.to_parquet(path, index=False)
+        else:
+            df.to_pickle(path)
+        np.save(self._path(f"{stem}.hashes.npy"), hashes)
+        return part
+
+    def _read_part(self, part):
+        path = self._path(part)
+        df = pd.read_parquet(path) if part.endswith(".parquet") else pd.read_pickle(path)
+        return normalize_school_names(df)  # parts written before names were normalized
+
+    def _hash_index(self):
+        path = self._path("hashes.idx.npy")
+        if os.path.exists(path):
+            index = np.load(path)
+            if len(index) == self.meta["rows"]:
+                return index
+        arrays = [np.load(self._path(p.rsplit(".", 1)[0] + ".hashes.npy")) for p in self.meta["parts"]]
+        return np.sort(np.concatenate(arrays)) if arrays else np.empty(0, dtype=np.uint64)
+
+    def _write_hash_index(self, index):
+        path = self._path("hashes.idx.npy")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, index)
+        os.replace(tmp, path)
+
+    def _counts(self):
+        if any(len(row) != len(COUNT_COLUMNS) for row in self.meta["counts"].values()):
+            # Written before a count column was added: recount from the parts once
+            counts = None
+            for part in self.meta["parts"]:
+                delta = school_counts(self._read_part(part), self.header)
+                counts = delta if counts is None else add_counts(counts, delta)
+            return counts
+        counts = pd.DataFrame.from_dict(self.meta["counts"], orient="index", columns=COUNT_COLUMNS, dtype=np.int64)
+        return counts.rename_axis("sname")
+
+    # --- PUBLIC API ---
+    @property
+    def header(self):
+        return self.meta["header"]
+
+    @property
+    def stale(self):
+        return list(self.meta["stale"])
+
+    @property
+    def version(self):
+        return len(self.meta["parts"])
+
+    def append(self, data, filename):
+        # Returns a summary of the wave; re-appending the same file is a no-op
+        with self._locked(), span("incremental_append", file=filename, bytes_in=len(data)) as s:
+            self.meta = self._read_meta()
+            digest = content_hash(data)
+            for wave in self.meta["waves"]:
+                if wave["sha256"] == digest:
+                    s.hit(True)
+                    return dict(wave, added=0, duplicates=wave["rows_in"], schools=[], already_appended=True)
+            s.hit(False)
+
+            header = read_header(data, filename)
+            names = required_names(header)
+            if self.header is not None and names != required_names(self.header):
+                raise ValueError("Survey columns don't match the stored dataset; start a new dataset for this file.")
+
+            full = read_categorical(data, filename)
+            hashes = row_hashes(full)
+            index = self._hash_index()
+            pos = np.minimum(np.searchsorted(index, hashes), max(len(index) - 1, 0))
+            stored = index[pos] == hashes if len(index) else np.zeros(len(hashes), dtype=bool)
+            new = ~pd.Series(hashes).duplicated().to_numpy() & ~stored
+            rows = full.loc[new, names].reset_index(drop=True)
+            s.attrs["rows"] = int(new.sum())
+
+            wave = {
+                "file": filename,
+                "sha256": digest,
+                "rows_in": len(full),
+                "added": len(rows),
+                "duplicates": len(full) - len(rows),
+                "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "schools": [],
+            }
+            if rows.empty:
+                self.meta["waves"].append(wave)
+                self._write_meta()
+                return dict(wave, already_appended=False)
+
+            with span("scoring", rows=len(rows)):
+                score_responses(rows, items=header[ITEM_START:ITEM_END])
+            delta = school_counts(rows, header)
+            counts = add_counts(self._counts(), delta)
+
+            part = self._write_part(rows, hashes[new])
+            added = np.sort(hashes[new])
+            self._write_hash_index(np.insert(index, np.searchsorted(index, added), added))
+            affected = list(delta.index)
+            wave["schools"] = affected
+            self.meta["header"] = self.header or header
+            self.meta["parts"].append(part)
+            self.meta["rows"] += len(rows)
+            self.meta["counts"] = {k: [int(v) for v in vals] for k, vals in zip(counts.index, counts.to_numpy())}
+            self.meta["stale"] = self.stale + [name for name in affected if name not in self.meta["stale"]]
+            self.meta["waves"].append(wave)
+            self._write_meta()
+            return dict(wave, already_appended=False)
+
+    def load(self):
+        # Scored rows of every wave, shared through the in-memory dataset cache;
+        # the stats table comes straight from the stored counts
+        with self._locked():
+            self.meta = self._read_meta()
+        key = f"store:{self.name}:{self.version}"
+        ds = dataset_cache.get(key)
+        if ds is not None:
+            return ds
+        if not self.meta["parts"]:
+            raise ValueError(f"Dataset {self.name!r} has no responses yet.")
+        with span("incremental_load", parts=self.version):
+            df = concat_categorical([self._read_part(p) for p in self.meta["parts"]])
+        stats = SchoolStatsTable(self._counts())
+        previous = dataset_cache.get(f"store:{self.name}:{self.version - 1}")
+        if previous is not None:
+            # Only the last wave's schools moved in the peer ranking
+            touched = next((w.get("schools", []) for w in reversed(self.meta["waves"]) if w["added"]), [])
+            stats.carry_ranks(previous.stats, touched)
+        return dataset_cache.put(ScoredDataset(key, df, columns=self.header, stats=stats))
+
+    def mark_rendered(self, schools):
+        # Clears the stale flag for schools whose reports were regenerated
+        with self._locked():
+            self.meta = self._read_meta()
+            done = set(schools)
+            self.meta["stale"] = [name for name in self.meta["stale"] if name not in done]
+            self._write_meta()
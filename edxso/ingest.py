@@ -0,0 +1,182 @@
+import io
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from edxso import cache_path
+from edxso.scoring import ITEM_END, ITEM_START, MIN_COLUMNS, SCORING_VERSION, score_responses
+from edxso.telemetry import span
+
+log = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+CSV_CHUNKSIZE = int(os.getenv("EDXSO_CSV_CHUNKSIZE", "0"))  # 0 reads the CSV in one go
+PARQUET_CACHE = os.getenv("EDXSO_PARQUET_CACHE", "1") != "0"
+UPLOAD_CACHE_VERSION = 2  # layout of the cached frame (columns kept, dtypes); 2: school names as text
+
+SCHOOL_COLUMN = 'sname'
+
+try:
+    import python_calamine  # noqa: F401  Rust xlsx reader, much faster than openpyxl
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
+try:
+    import pyarrow  # noqa: F401
+    HAVE_PARQUET = True
+except ImportError:
+    HAVE_PARQUET = False
+
+
+def _is_csv(filename):
+    return filename.lower().endswith('.csv')
+
+
+def read_header(data, filename):
+    buf = io.BytesIO(data)
+    if _is_csv(filename):
+        return pd.read_csv(buf, nrows=0).columns.tolist()
+    return pd.read_excel(buf, nrows=0, engine=EXCEL_ENGINE).columns.tolist()
+
+
+def required_positions(header):
+    if len(header) < MIN_COLUMNS or SCHOOL_COLUMN not in header:
+        raise ValueError("CSV format incorrect.")
+    positions = list(range(ITEM_START, ITEM_END))
+    school_pos = header.index(SCHOOL_COLUMN)
+    if school_pos not in positions:
+        positions.insert(0, school_pos)
+    return sorted(positions)
+
+
+def required_names(header):
+    return [header[p] for p in required_positions(header)]
+
+
+def concat_categorical(frames):
+    # Plain concat would fall back to object when categories differ between frames
+    if len(frames) == 1:
+        return frames[0]
+    out = {}
+    for col in frames[0].columns:
+        parts = [f[col] for f in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            try:
+                out[col] = pd.api.types.union_categoricals(parts)
+            except TypeError:
+                # Mixed category types (e.g. numbers in one xlsx, strings in another)
+                out[col] = pd.Categorical(pd.concat([p.astype(object) for p in parts], ignore_index=True))
+        else:
+            out[col] = pd.concat(parts, ignore_index=True).to_numpy()
+    return pd.DataFrame(out)
+
+
+def school_key(value):
+    # A school's name as text. Excel hands numeric names over as numbers
+    # (101, or 101.0 next to blanks) where a CSV gives "101"; all are "101".
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    return str(value)
+
+
+def normalize_school_names(df):
+    # The one place school names are normalized: every reader goes through
+    # here, so stats, counts, stale lists and lookups all use the same keys.
+    # Works on the categories, then remaps the row codes.
+    if SCHOOL_COLUMN not in df.columns:
+        return df
+    names = df[SCHOOL_COLUMN]
+    if not isinstance(names.dtype, pd.CategoricalDtype):
+        names = names.astype('category')
+    remap, keys = pd.factorize(np.array([school_key(v) for v in names.cat.categories], dtype=object))
+    codes = names.cat.codes.to_numpy()
+    remap = np.append(remap, -1)  # code -1 (blank) stays blank
+    df[SCHOOL_COLUMN] = pd.Categorical.from_codes(remap[codes], keys)
+    return df
+
+
+def read_categorical(data, filename, usecols=None):
+    # Every (or every usecols) column as a categorical (a few distinct strings
+    # repeated per row)
+    buf = io.BytesIO(data)
+    if _is_csv(filename):
+        kwargs = dict(usecols=usecols, dtype='category')
+        if CSV_CHUNKSIZE:
+            with pd.read_csv(buf, chunksize=CSV_CHUNKSIZE, **kwargs) as reader:
+                return normalize_school_names(concat_categorical(list(reader)))
+        return normalize_school_names(pd.read_csv(buf, **kwargs))
+    return normalize_school_names(pd.read_excel(buf, usecols=usecols, engine=EXCEL_ENGINE).astype('category'))
+
+
+def read_required(data, filename, header):
+    # Only sname + the 20 Likert items
+    positions = required_positions(header)
+    df = read_categorical(data, filename, usecols=positions)
+    # read_* returns usecols in file order; keep that explicit
+    return df[[header[p] for p in positions]]
+
+
+def read_school_rows(data, filename, school_name):
+    # Every column of one school's rows, scored. The pruned dataset drops the
+    # metadata columns (0-7); the debug export re-reads them from the file.
+    header = read_header(data, filename)
+    if SCHOOL_COLUMN not in header:
+        raise ValueError("CSV format incorrect.")
+    df = read_categorical(data, filename)
+    df = df[df[SCHOOL_COLUMN] == school_name].reset_index(drop=True)
+    return score_responses(df, items=header[ITEM_START:ITEM_END])
+
+
+# --- PARQUET CONVERSION CACHE ---
+def _parquet_paths(key):
+    # A scoring or layout change must not reuse frames cached before it
+    name = f"{key}.s{SCORING_VERSION}.f{UPLOAD_CACHE_VERSION}"
+    return cache_path("uploads", f"{name}.parquet"), cache_path("uploads", f"{name}.json")
+
+
+def _load_cached(key):
+    if not (PARQUET_CACHE and HAVE_PARQUET):
+        return None
+    pq_path, meta_path = _parquet_paths(key)
+    if not (os.path.exists(pq_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            header = json.load(f)["header"]
+        return pd.read_parquet(pq_path), header
+    except Exception as e:
+        log.warning("Ignoring unreadable upload cache %s: %s", pq_path, e)
+        return None
+
+
+def _store_cached(key, df, header):
+    if not (PARQUET_CACHE and HAVE_PARQUET):
+        return
+    pq_path, meta_path = _parquet_paths(key)
+    tmp = pq_path + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, pq_path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"header": header}, f)
+
+
+def load_upload(data, filename, key):
+    # Returns the pruned, scored frame plus the file's full header, which keeps
+    # positional lookups (cols[8], cols[12], ...) meaningful after pruning
+    with span("ingest", file=filename) as s:
+        cached = _load_cached(key)
+        s.hit(cached is not None)
+        if cached is not None:
+            return cached
+        header = read_header(data, filename)
+        df = read_required(data, filename, header)
+        s.attrs["rows"] = len(df)
+    with span("scoring", rows=len(df)):
+        score_responses(df, items=header[ITEM_START:ITEM_END])
+    with span("parquet_store"):
+        _store_cached(key, df, header)
+    return df, header
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from edxso import cache_path
+
+# --- CONFIGURATION ---
+DEFAULT_TTL = float(os.getenv("EDXSO_INSIGHT_CACHE_TTL_DAYS", "30")) * 86400
+DEFAULT_MAX_ENTRIES = int(os.getenv("EDXSO_INSIGHT_CACHE_MAX", "10000"))
+PENDING_BACKOFF = 60.0  # seconds before the first retry of a pending insight, doubled per attempt
+PENDING_MAX_ATTEMPTS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS insights (
+    key TEXT PRIMARY KEY,
+    school TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS insights_accessed ON insights (accessed);
+CREATE TABLE IF NOT EXISTS pending (
+    key TEXT PRIMARY KEY,
+    school TEXT NOT NULL,
+    stats TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_try REAL NOT NULL
+);
+"""
+
+
+def insight_key(school_name, stats, fields, model, prompt_version):
+    # Only the stats that actually reach the prompt take part in the key
+    material = {
+        "school": str(school_name),
+        "stats": {f: stats.get(f) for f in fields},
+        "model": model,
+        "prompt_version": prompt_version,
+    }
+    blob = json.dumps(material, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class InsightCache:
+    # SQLite-backed store for the p1/p2/p3 JSON with TTL and LRU size eviction
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or cache_path("insights.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created FROM insights WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE insights SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, school_name, payload):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO insights (key, school, payload, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, str(school_name), json.dumps(payload), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        if self.ttl:
+            self._conn.execute("DELETE FROM insights WHERE created < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM insights").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM insights WHERE key IN (SELECT key FROM insights ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    # --- PENDING RE-ENRICHMENT ---
+    # Reports that fell back to templated paragraphs leave their prompt stats
+    # here, so the Gemini call can be retried later off the request path.
+    def mark_pending(self, key, school_name, stats, reason):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pending (key, school, stats, reason, next_try) VALUES (?, ?, ?, ?, ?)",
+                (key, str(school_name), json.dumps(stats), reason, time.time() + PENDING_BACKOFF),
+            )
+
+    def clear_pending(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM pending WHERE key = ?", (key,))
+
+    def claim_pending(self, limit=1, lease=300.0):
+        # Due entries as (key, school, stats), each pushed back by `lease`
+        # seconds so another worker process doesn't retry it at the same time
+        now = time.time()
+        claimed = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, school, stats, next_try FROM pending WHERE next_try <= ? ORDER BY next_try LIMIT ?", (now, limit)
+            ).fetchall()
+            for key, school, stats, next_try in rows:
+                cur = self._conn.execute(
+                    "UPDATE pending SET next_try = ? WHERE key = ? AND next_try = ?", (now + lease, key, next_try)
+                )
+                if cur.rowcount == 1:
+                    claimed.append((key, school, json.loads(stats)))
+        return claimed
+
+    def retry_pending_later(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM pending WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            attempts = row[0] + 1
+            if attempts >= PENDING_MAX_ATTEMPTS:
+                self._conn.execute("DELETE FROM pending WHERE key = ?", (key,))
+            else:
+                self._conn.execute(
+                    "UPDATE pending SET attempts = ?, next_try = ? WHERE key = ?",
+                    (attempts, time.time() + PENDING_BACKOFF * 2 ** attempts, key),
+                )
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM insights")
+            self._conn.execute("DELETE FROM pending")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM insights").fetchone()[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_insight_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = InsightCache()
+        return _cache
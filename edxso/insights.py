@@ -0,0 +1,453 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from edxso import cache_path
+from edxso.insight_cache import get_insight_cache, insight_key
+from edxso.telemetry import span
+
+log = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+MODEL_NAME = os.getenv("EDXSO_GEMINI_MODEL", "gemini-2.5-flash")
+DEFAULT_CONCURRENCY = int(os.getenv("EDXSO_GEMINI_CONCURRENCY", "4"))
+DEFAULT_RPM = float(os.getenv("EDXSO_GEMINI_RPM", "60"))  # requests per minute quota
+DEFAULT_MAX_RETRIES = int(os.getenv("EDXSO_GEMINI_MAX_RETRIES", "4"))
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+CALL_TIMEOUT = float(os.getenv("EDXSO_GEMINI_TIMEOUT", "20"))  # seconds per API request
+INSIGHT_BUDGET = float(os.getenv("EDXSO_INSIGHT_BUDGET", "45"))  # seconds per report, retries and quota waits included
+
+# Bump whenever build_prompt changes so cached paragraphs are regenerated
+PROMPT_VERSION = "4"
+PROMPT_FIELDS = (
+    'count', 'pct_balanced', 'pct_mild', 'pct_moderate', 'pct_high', 'pct_severe',
+    'anxiety_pct', 'parent_pressure_pct', 'bench_anxiety_pct', 'bench_parent_pressure_pct',
+    'bench_source', 'bench_schools',
+    'peer_schools', 'mean_score_percentile', 'high_severe_pct_percentile', 'anxiety_pct_percentile',
+)
+
+
+def classify_risk_band(stats):
+    # 1. THE LOGIC MATRIX: DIPLOMATIC ECOSYSTEM PROFILES
+    high_severe = stats['pct_high'] + stats['pct_severe']
+    moderate = stats['pct_moderate']
+    low_band = stats['pct_balanced'] + stats['pct_mild']
+    
+    # Keep the diplomatic profiling
+    if high_severe >= 20:
+        risk_band = "Priority Support Area"
+    elif high_severe >= 15 and low_band >= 40:
+        risk_band = "Divergent Ecosystem"
+    elif high_severe >= 10 or moderate >= 40:
+        risk_band = "Elevated Pressure Zone"
+    elif high_severe >= 5 or moderate >= 30:
+        risk_band = "Proactive Monitoring"
+    else:
+        risk_band = "Balanced Ecosystem"
+
+    return risk_band
+
+
+# --- TEMPLATED FALLBACK ---
+# Used without an API key, and when Gemini errors or misses the report's
+# latency budget. Follows the same guardrails as the prompt: shares in words
+# rather than exact percentages, pressures framed as external, and the
+# school's effort acknowledged.
+BAND_OPENINGS = {
+    "Balanced Ecosystem": "The survey offers an encouraging snapshot of student well-being at {school}.",
+    "Proactive Monitoring": "The survey shows a largely steady picture of student well-being at {school}, with a few early signals worth keeping an eye on.",
+    "Elevated Pressure Zone": "The survey shows that assessment pressure is being felt by a noticeable share of students at {school}, reflecting expectations that run high nationwide.",
+    "Divergent Ecosystem": "The survey describes two distinct student experiences at {school}: many students are coping well, while a meaningful group carries considerable pressure.",
+    "Priority Support Area": "The survey shows that assessment pressure weighs on a significant share of students at {school}, mirroring a pattern seen across the country.",
+}
+BAND_OPPORTUNITIES = {
+    "Balanced Ecosystem": "{school} is well placed to build on this foundation. Weaving regular well-being check-ins and simple coping strategies into the school year would help sustain it as academic demands grow, and positions the school as a leader in student-centric excellence.",
+    "Proactive Monitoring": "{school} is uniquely positioned at an ideal juncture to act early. Light, structured support, such as study-planning guidance and open conversations about expectations, can keep small signals from growing and reinforce a culture where students feel supported.",
+    "Elevated Pressure Zone": "This is a timely opportunity for {school} to lead in holistic student development. Investing in collaborative, structured support systems around assessments, from preparation skills to parent engagement, can transform potential challenges into growth opportunities.",
+    "Divergent Ecosystem": "{school} has a valuable opportunity to extend what already works for most students to those who need it most. Targeted, structured support for the more pressured group, alongside the practices that serve the rest well, can bring the whole student body onto steadier ground.",
+    "Priority Support Area": "Looking forward, {school} is uniquely positioned to turn this moment into a strength. Investing in collaborative, structured support systems, with clear coping strategies for students and partnership with parents, can transform potential challenges into growth opportunities and set the school apart in student-centric excellence.",
+}
+VALIDATION = "We recognize that the institution is already exercising immense care in supporting its students. However, many of the pressures students absorb, such as societal competition and parental expectations, stem from external factors that are often outside the school's direct control."
+
+
+def _share(pct):
+    # A percentage in words, the way the prompt asks Gemini to phrase it
+    for floor, words in ((70, "most students"), (55, "more than half of students"), (40, "about half of students"),
+                         (28, "about a third of students"), (18, "around one in five students"),
+                         (8, "around one in ten students"), (0, "only a few students")):
+        if pct >= floor:
+            return words
+
+
+def _versus(value, benchmark):
+    diff = value - benchmark
+    if abs(diff) < 2:
+        return "in line with"
+    if diff > 0:
+        return "well above" if diff >= 8 else "slightly above"
+    return "well below" if diff <= -8 else "slightly below"
+
+
+def benchmark_source(stats):
+    # Where the report's benchmark rates come from (HTML, for the methodology note)
+    if stats.get('bench_source') == 'dataset':
+        return (f"the pooled responses of <strong>{stats['bench_students']:,} students across "
+                f"{stats['bench_schools']:,} schools</strong> in this survey")
+    return ("established benchmarks from the <strong>NCERT National Survey (2022)</strong> "
+            "and Indian academic morbidity studies (2020–2024)")
+
+
+def benchmark_name(stats):
+    # The same source as a short phrase for running text
+    if stats.get('bench_source') == 'dataset':
+        return f"the average across all {stats['bench_schools']:,} surveyed schools"
+    return "the national benchmark"
+
+
+def fallback_insights(stats, school_name, risk_band, pending=None):
+    # pending: why Gemini's text is missing ("deadline" / "error"); the
+    # result is flagged so the report can be re-enriched later
+    school = str(school_name)
+    p1 = [
+        BAND_OPENINGS[risk_band].format(school=school),
+        f"Of the {int(stats['count'])} students who took part, {_share(stats['pct_balanced'] + stats['pct_mild'])} "
+        f"describe balanced or mild stress, while {_share(stats['pct_high'] + stats['pct_severe'])} report high or severe stress.",
+        f"Exam anxiety is {_versus(stats['anxiety_pct'], stats['bench_anxiety_pct'])} {benchmark_name(stats)}, and parental "
+        f"performance pressure is {_versus(stats['parent_pressure_pct'], stats['bench_parent_pressure_pct'])} it.",
+    ]
+    if stats.get('mean_score_percentile') is not None:
+        pct = stats['mean_score_percentile']
+        place = "among the calmer" if pct < 34 else "near the middle of the" if pct < 67 else "toward the more pressured end of the"
+        p1.append(f"Overall, the school sits {place} schools surveyed alongside it.")
+    result = {
+        "risk_band_label": risk_band,
+        "p1": " ".join(p1),
+        "p2": VALIDATION,
+        "p3": BAND_OPPORTUNITIES[risk_band].format(school=school),
+    }
+    if pending:
+        result["fallback"] = pending
+    return result
+
+
+def peer_position(stats):
+    # Percentile among the dataset's schools (higher = more stress than peers)
+    if stats.get('mean_score_percentile') is None:
+        return ""
+    return (
+        f"- Peer Position among {stats['peer_schools']} surveyed schools (percentile, higher = more stress than peers): "
+        f"mean stress {stats['mean_score_percentile']}, high/severe share {stats['high_severe_pct_percentile']}, "
+        f"exam anxiety {stats['anxiety_pct_percentile']}. Mention relative standing gently, never as a league table."
+    )
+
+
+def build_prompt(stats, school_name, risk_band):
+    prompt = f"""
+    ROLE: You are an Elite Education Strategy Consultant writing an Executive Summary for School Leadership. 
+    Your tone must be highly diplomatic, professional, respectful, and empowering. 
+
+    SCHOOL CONTEXT:
+    - School Name: {school_name}
+    - Total Sample: {stats['count']} students
+    - Ecosystem Profile: {risk_band}
+    
+    RAW DATA (TRANSLATE TO MEANING, AVOID EXACT PERCENTAGES):
+    - Balanced/Mild: {stats['pct_balanced'] + stats['pct_mild']}%
+    - Moderate: {stats['pct_moderate']}%
+    - High/Severe: {stats['pct_high'] + stats['pct_severe']}%
+    - Exam Anxiety: {stats['anxiety_pct']}% (Benchmark: {stats['bench_anxiety_pct']}%)
+    - Parental Pressure: {stats['parent_pressure_pct']}% (Benchmark: {stats['bench_parent_pressure_pct']}%)
+    - Benchmark Source: {benchmark_name(stats)}
+    {peer_position(stats)}
+
+    FIRM OUTPUT GUARDRAILS (STRICT COMPLIANCE REQUIRED):
+    1. ZERO BLAME OR AUTHORITY: Never imply the school is at fault. 
+    2. THE "EXTERNAL FACTOR" RULE: You MUST explicitly state that the stress students face is part of a broader, nationwide trend and stems from external factors (societal competition, parental expectations) that are outside the school's direct control. 
+    3. VALIDATE THE INSTITUTION: Acknowledge that the school is undoubtedly putting in strong effort to support its students.
+    4. STRATEGIC POSITIONING: Do not offer EDXSO's direct counseling services. Position the insights as an opportunity for the school itself to lead and differentiate its brand through systemic enhancements.
+    5. FORMAT: Output three professionally written, flowing paragraphs. No bullet points.
+
+    OUTPUT FORMAT (JSON):
+    {{
+        "p1": "Paragraph 1: Introduce the general landscape of student well-being today, weaving in the school's specific data profile. Start directly and professionally. Frame the data as a helpful snapshot of the current student reality.",
+        "p2": "Paragraph 2: The Validation. Explicitly state that the institution is undoubtedly putting in great effort, but acknowledge that certain pressures (like parental expectations and national competition) are external and beyond the school's direct control.",
+        "p3": "Paragraph 3: The Strategic Opportunity. Frame this as a powerful opportunity for {school_name} to lead in holistic student development. Use language similar to: 'uniquely positioned at an ideal juncture,' 'investing in collaborative, structured support systems,' and 'transform potential challenges into growth opportunities.' Make it sound like a strategic, forward-thinking investment in the school's ecosystem that differentiates them as a leader in student-centric excellence."
+    }}
+    """
+    return prompt
+
+
+# --- SHARED CLIENT & RATE LIMITING ---
+class TokenBucket:
+    # Refills `rate` tokens per second up to `capacity`; acquire() blocks until one is free
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        # False if no token frees up before deadline (a time.monotonic() value)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SharedTokenBucket:
+    # TokenBucket whose state lives in SQLite, so the app and every job worker
+    # process draw on one quota instead of one bucket each. Refills use wall
+    # time: monotonic clocks aren't comparable across processes.
+    def __init__(self, rate, capacity=None, path=None, name="gemini"):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.name = name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path("quota.sqlite3"), timeout=30,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _take(self):
+        # Takes a token and returns 0, or returns the seconds until one is free
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                tokens = self.capacity if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+                if not wait:
+                    tokens -= 1
+                self._conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                                   (self.name, tokens, now))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self, deadline=None):
+        # Same contract as TokenBucket.acquire
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+_limiter = None
+_limiter_lock = threading.Lock()
+_in_flight = threading.BoundedSemaphore(DEFAULT_CONCURRENCY)
+# API calls run here so a report can stop waiting at its deadline even if
+# the SDK doesn't; a call that outlives it still fills the cache
+_calls = ThreadPoolExecutor(max_workers=DEFAULT_CONCURRENCY, thread_name_prefix="gemini-call")
+
+
+def get_limiter():
+    # Created on first use so importing the module doesn't touch the cache dir
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = SharedTokenBucket(DEFAULT_RPM / 60.0, capacity=DEFAULT_CONCURRENCY)
+        return _limiter
+
+
+def set_limiter(limiter):
+    # Swap the quota limiter, e.g. for an unthrottled TokenBucket in benchmarks
+    global _limiter
+    with _limiter_lock:
+        _limiter = limiter
+
+
+def get_client(api_key):
+    # genai.Client holds the HTTP connection pool, so build it once per key.
+    # Imported here: google-genai is slow to import and unused without a key.
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            from google import genai
+            client = _clients[api_key] = genai.Client(api_key=api_key)
+        return client
+
+
+def set_client(api_key, client):
+    # Swap in a stand-in client (benchmarks, offline runs) for a given key
+    with _clients_lock:
+        _clients[api_key] = client
+
+
+def _error_code(e):
+    code = getattr(e, "code", None) or getattr(e, "status_code", None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_timeout(e):
+    # httpx/httpcore timeouts don't derive from TimeoutError
+    return isinstance(e, TimeoutError) or "Timeout" in type(e).__name__
+
+
+def _time_left(deadline):
+    return CALL_TIMEOUT if deadline is None else min(CALL_TIMEOUT, deadline - time.monotonic())
+
+
+def call_with_retry(fn, max_retries=DEFAULT_MAX_RETRIES, base_delay=1.0, max_delay=30.0, deadline=None):
+    # Full-jitter exponential backoff on quota (429), server (5xx) errors and
+    # request timeouts. fn(timeout) gets the seconds this attempt may take:
+    # CALL_TIMEOUT, cut short by deadline (a time.monotonic() value).
+    attempt = 0
+    while True:
+        if not get_limiter().acquire(deadline):
+            raise TimeoutError("Insight deadline passed while waiting for quota.")
+        left = _time_left(deadline)
+        if left <= 0 or not _in_flight.acquire(timeout=None if deadline is None else left):
+            raise TimeoutError("Insight deadline passed while waiting for a free request slot.")
+        try:
+            try:
+                return fn(max(0.1, _time_left(deadline)))
+            finally:
+                _in_flight.release()
+        except Exception as e:
+            if not (_error_code(e) in RETRYABLE_CODES or _is_timeout(e)) or attempt >= max_retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            time.sleep(delay)
+            attempt += 1
+
+
+# --- INSIGHT GENERATION ---
+def _fetch(api_key, stats, school_name, risk_band, key, deadline):
+    # The API call itself; stores the paragraphs and clears any pending retry
+    client = get_client(api_key)
+    prompt = build_prompt(stats, school_name, risk_band)
+    response = call_with_retry(lambda timeout: client.models.generate_content(
+        model=MODEL_NAME,
+        contents=prompt,
+        config={'response_mime_type': 'application/json', 'http_options': {'timeout': int(timeout * 1000)}}
+    ), deadline=deadline)
+    result = json.loads(response.text)
+    cache = get_insight_cache()
+    cache.put(key, school_name, result)
+    cache.clear_pending(key)
+    return result
+
+
+def _prompt_stats(stats):
+    # JSON-safe copy of the fields a later retry needs
+    return {f: (v.item() if hasattr(v, "item") else v) for f, v in ((f, stats.get(f)) for f in PROMPT_FIELDS)}
+
+
+def generate_insights_with_gemini(api_key, stats, school_name, force_refresh=False, budget=INSIGHT_BUDGET):
+    # Waits at most `budget` seconds for Gemini. On a miss or an API error the
+    # report gets templated paragraphs flagged with "fallback", and the call
+    # is queued for reenrich_pending().
+    with span("insights") as s:
+        risk_band = classify_risk_band(stats)
+
+        if not api_key:
+            return fallback_insights(stats, school_name, risk_band)
+
+        cache = get_insight_cache()
+        key = insight_key(school_name, stats, PROMPT_FIELDS, MODEL_NAME, PROMPT_VERSION)
+        if not force_refresh:
+            cached = cache.get(key)
+            s.hit(cached is not None)
+            if cached is not None:
+                cached["risk_band_label"] = risk_band
+                return cached
+
+        call = _calls.submit(_fetch, api_key, stats, school_name, risk_band, key, time.monotonic() + budget)
+        try:
+            result = call.result(timeout=budget)
+            result["risk_band_label"] = risk_band
+            return result
+        except FutureTimeout:
+            reason = "deadline"
+        except Exception as e:
+            log.warning("Gemini error for %s: %s", school_name, e)
+            s.attrs["api_error"] = f"{type(e).__name__}: {e}"
+            reason = "deadline" if _is_timeout(e) else "error"
+        s.attrs["fallback"] = reason
+        cache.mark_pending(key, school_name, _prompt_stats(stats), reason)
+        return fallback_insights(stats, school_name, risk_band, pending=reason)
+
+
+def reenrich_pending(api_key, limit=1, budget=INSIGHT_BUDGET):
+    # Retries Gemini for reports that fell back to templates, off the request
+    # path (job workers call this when idle). Successes land in the insight
+    # cache, so the next report for that school carries the real text.
+    # Returns the number of entries enriched.
+    cache = get_insight_cache()
+    done = 0
+    for key, school_name, stats in cache.claim_pending(limit):
+        with span("reenrich"):
+            try:
+                _fetch(api_key, stats, school_name, classify_risk_band(stats), key, time.monotonic() + budget)
+                done += 1
+            except Exception as e:
+                log.warning("Gemini retry failed for %s: %s", school_name, e)
+                cache.retry_pending_later(key)
+    return done
+
+
+class InsightGenerator:
+    # Fans insight requests out over a thread pool. Each future is keyed by
+    # school name, so results land on the right school whatever order they
+    # complete in. Concurrency and quota are still bounded by the shared
+    # semaphore and token bucket above.
+    def __init__(self, api_key, max_workers=DEFAULT_CONCURRENCY, force_refresh=False):
+        self.api_key = api_key
+        self.force_refresh = force_refresh
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="gemini")
+        self.futures = {}
+
+    def submit(self, school_name, stats):
+        fut = self.futures.get(school_name)
+        if fut is None:
+            fut = self.futures[school_name] = self._pool.submit(
+                generate_insights_with_gemini, self.api_key, stats, school_name, self.force_refresh
+            )
+        return fut
+
+    def result(self, school_name, timeout=None):
+        return self.futures[school_name].result(timeout=timeout)
+
+    def generate_many(self, stats_by_school):
+        for name, stats in stats_by_school.items():
+            self.submit(name, stats)
+        return {name: self.result(name) for name in stats_by_school}
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from edxso.scoring import ITEM_END, ITEM_START, REVERSE_START, SCALE_MAP
+from edxso.stats import level_matrix
+
+# --- ITEM RESPONSE CUBE ---
+# counts[school, item, level]: how many of a school's students gave each
+# answer to each of the 20 items, level 0 being blank or unrecognized.
+# Levels follow edxso.stats.response_levels, so an indicator item's
+# Often + Always share equals the matching stats percentage; every share is
+# of all the school's students. Built in one bincount over the level matrix,
+# so a report only slices it. The sum over schools is the pooled (national)
+# distribution.
+RESPONSE_LABELS = list(SCALE_MAP)  # Never .. Always, levels 1..5
+NO_ANSWER = "No answer"
+N_LEVELS = len(RESPONSE_LABELS) + 1
+TOP_BOX_LEVELS = slice(4, 6)  # Often, Always
+N_FORWARD = REVERSE_START - ITEM_START  # later items are positively worded
+CUBE_CHUNK_ROWS = 1 << 17  # bounds the flat index array to ~20 MB
+
+
+def cube_counts(matrix, school_codes, n_schools):
+    # matrix: (rows x items) uint8 in 0..5; school_codes: (rows,) ints, -1 = no school
+    n_items = matrix.shape[1]
+    size = n_schools * n_items * N_LEVELS
+    counts = np.zeros(size, dtype=np.int64)
+    offsets = np.arange(n_items, dtype=np.int64) * N_LEVELS
+    for start in range(0, len(matrix), CUBE_CHUNK_ROWS):
+        codes = np.asarray(school_codes[start:start + CUBE_CHUNK_ROWS])
+        valid = codes >= 0
+        block = np.asarray(matrix[start:start + CUBE_CHUNK_ROWS])[valid]
+        flat = (codes[valid].astype(np.int64) * (n_items * N_LEVELS))[:, None] + offsets + block
+        counts += np.bincount(flat.ravel(), minlength=size)
+    return counts.reshape(n_schools, n_items, N_LEVELS)
+
+
+def _shares(counts):
+    # Percent per level along the last axis; all zeros for an empty row
+    totals = counts.sum(axis=-1, keepdims=True)
+    return np.round(np.divide(counts * 100.0, totals, out=np.zeros(counts.shape), where=totals > 0), 1)
+
+
+def _top_box(counts):
+    totals = counts.sum(axis=-1)
+    hits = counts[..., TOP_BOX_LEVELS].sum(axis=-1)
+    return np.round(np.divide(hits * 100.0, totals, out=np.zeros(totals.shape), where=totals > 0), 1)
+
+
+class ItemCube:
+    def __init__(self, counts, schools, items):
+        self.counts = counts
+        self.schools = list(schools)
+        self.items = list(items)
+        self._pos = {name: i for i, name in enumerate(self.schools)}
+        self.national = counts.sum(axis=0)
+        self.national_top_box = _top_box(self.national)
+
+    @classmethod
+    def from_frame(cls, df, columns):
+        items = columns[ITEM_START:ITEM_END]
+        codes, schools = pd.factorize(df['sname'], use_na_sentinel=True)
+        return cls(cube_counts(level_matrix(df, items), codes, len(schools)), list(schools), items)
+
+    def school(self, school_name):
+        # (items x levels) counts, or None for an unknown school
+        i = self._pos.get(school_name)
+        return None if i is None else self.counts[i]
+
+    def top_box_frame(self):
+        # Often + Always share (%) for every school x item
+        return pd.DataFrame(_top_box(self.counts), index=pd.Index(self.schools, name='sname'), columns=self.items)
+
+    def distribution(self, school_name=None):
+        # Items x Never..Always, No answer shares (%) plus top-box, for one
+        # school or pooled
+        counts = self.national if school_name is None else self.school(school_name)
+        if counts is None:
+            return None
+        shares = _shares(counts)
+        frame = pd.DataFrame(shares[:, 1:], index=pd.Index(self.items, name='item'), columns=RESPONSE_LABELS)
+        frame[NO_ANSWER] = shares[:, 0]
+        frame['Often + Always'] = _top_box(counts)
+        return frame
+
+    def profile(self, school_name):
+        # What the report's heatmap section draws, merged into the stats row
+        counts = self.school(school_name)
+        if counts is None:
+            return None
+        shares, top_box = _shares(counts), _top_box(counts)
+        return [
+            {
+                'item': str(item),
+                'reverse': j >= N_FORWARD,
+                'pct': shares[j, 1:].tolist(),
+                'blank': float(shares[j, 0]),
+                'top_box': float(top_box[j]),
+                'bench_top_box': float(self.national_top_box[j]),
+            }
+            for j, item in enumerate(self.items)
+        ]
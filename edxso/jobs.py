@@ -0,0 +1,453 @@
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from edxso import cache_path
+from edxso.telemetry import span, trace
+
+# --- BACKGROUND REPORT JOBS ---
+# Report and batch requests are rows in a local SQLite queue, drained by
+# worker processes (`python -m edxso.jobs worker`). The web app only submits
+# jobs and polls them, so a long Gemini wait or Chromium render never blocks a
+# session, and finished jobs (and their files) survive reloads and restarts.
+#   queued -> running -> done | failed
+# A running job whose worker stops heart-beating is put back in the queue,
+# up to MAX_ATTEMPTS times. Each job records the owner token of the session
+# that submitted it; the app lists and serves only its own session's jobs.
+DEFAULT_WORKERS = int(os.getenv("EDXSO_JOB_WORKERS", "2"))  # 0: workers are run separately
+POLL_SECONDS = float(os.getenv("EDXSO_JOB_POLL_SECONDS", "1"))
+HEARTBEAT_SECONDS = 15
+STALE_SECONDS = float(os.getenv("EDXSO_JOB_STALE_SECONDS", "120"))
+RETENTION_DAYS = float(os.getenv("EDXSO_JOB_RETENTION_DAYS", "7"))
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    label TEXT NOT NULL,
+    owner TEXT,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    error TEXT,
+    result_path TEXT,
+    result_name TEXT,
+    result_mime TEXT,
+    result_meta TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+MIME_TYPES = {"html": "text/html", "pdf": "application/pdf", "zip": "application/zip"}
+
+
+class JobQueue:
+    def __init__(self, path=None):
+        self.path = path or cache_path("jobs", "queue.sqlite3")
+        self.results_dir = os.path.dirname(cache_path("jobs", "results", "x"))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if "owner" not in columns:  # queue created before jobs had owners
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created)")
+
+    def submit(self, kind, params, label, owner=None):
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, label, owner, params, status, message, created) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', 'Waiting for a worker', ?)",
+                (job_id, kind, label, owner, json.dumps(params), time.time()),
+            )
+        return job_id
+
+    def claim(self, worker):
+        # Oldest queued job, atomically marked running for this worker
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._requeue_stale(now)
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, started = ?, heartbeat = ?, "
+                    "attempts = attempts + 1, message = 'Starting' WHERE id = ?",
+                    (worker, now, now, row["id"]),
+                )
+                job = dict(self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def _requeue_stale(self, now):
+        cutoff = now - STALE_SECONDS
+        self._conn.execute(
+            "UPDATE jobs SET status = 'failed', finished = ?, error = 'Worker stopped responding' "
+            "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+            (now, cutoff, MAX_ATTEMPTS),
+        )
+        self._conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, message = 'Retrying after a worker stopped' "
+            "WHERE status = 'running' AND heartbeat < ?",
+            (cutoff,),
+        )
+
+    def heartbeat(self, job_id):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+
+    def update(self, job_id, progress, message):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, message = ?, heartbeat = ? WHERE id = ?",
+                (round(progress, 3), message, time.time(), job_id),
+            )
+
+    def complete(self, job_id, data, name, meta=None):
+        path = os.path.join(self.results_dir, f"{job_id}-{name}")
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        ext = name.rsplit(".", 1)[-1].lower()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', progress = 1, message = 'Finished', finished = ?, result_path = ?, "
+                "result_name = ?, result_mime = ?, result_meta = ? WHERE id = ?",
+                (time.time(), path, name, MIME_TYPES.get(ext, "application/octet-stream"), json.dumps(meta), job_id),
+            )
+
+    def fail(self, job_id, error):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, error = ?, message = 'Failed' WHERE id = ?",
+                (time.time(), error, job_id),
+            )
+
+    def get(self, job_id, owner=None):
+        # With an owner, another session's job reads as missing
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (owner is not None and row["owner"] != owner):
+            return None
+        return dict(row)
+
+    def recent(self, limit=10, owner=None):
+        # Newest jobs first; only the owner's when one is given
+        with self._lock:
+            if owner is None:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE owner = ? ORDER BY created DESC LIMIT ?", (owner, limit)
+                ).fetchall()
+        return [dict(r) for r in rows]
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    def result_bytes(self, job_id, owner=None):
+        job = self.get(job_id, owner)
+        if job is None or job["status"] != "done":
+            return None
+        try:
+            with open(job["result_path"], "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def purge(self, older_than=RETENTION_DAYS * 86400):
+        # Finished jobs and their files past the retention window
+        cutoff = time.time() - older_than
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, result_path FROM jobs WHERE status IN ('done', 'failed') AND finished < ?", (cutoff,)
+            ).fetchall()
+            for row in rows:
+                if row["result_path"]:
+                    try:
+                        os.remove(row["result_path"])
+                    except OSError:
+                        pass
+            self._conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?", (cutoff,))
+        return len(rows)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+# --- JOB INPUTS ---
+def stage_input(data, filename):
+    # Uploads are copied into the job area once per content so workers (and
+    # retries after a restart) can read them
+    digest = hashlib.sha256(data).hexdigest()
+    ext = os.path.splitext(filename)[1].lower()
+    path = cache_path("jobs", "inputs", f"{digest}{ext}")
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return {"path": path, "filename": filename}
+
+
+def upload_source(data, filename):
+    return {"kind": "upload", **stage_input(data, filename)}
+
+
+def submit_report(source, school_name, logo_file, output_format, force_refresh=False, owner=None):
+    params = {
+        "source": source,
+        "school": school_name,
+        "format": output_format,
+        "logo": stage_input(logo_file.getvalue(), logo_file.name) if logo_file else None,
+        "force_refresh": force_refresh,
+    }
+    return get_job_queue().submit("report", params, f"{school_name} ({output_format})", owner)
+
+
+def submit_batch(source, schools, logo_file, output_format, jobs, force_refresh=False, owner=None):
+    params = {
+        "source": source,
+        "schools": list(schools) if schools else None,
+        "format": output_format,
+        "logo": stage_input(logo_file.getvalue(), logo_file.name) if logo_file else None,
+        "jobs": jobs,
+        "force_refresh": force_refresh,
+    }
+    count = f"{len(schools)} schools" if schools else "all schools"
+    return get_job_queue().submit("batch", params, f"Batch: {count} ({output_format})", owner)
+
+
+# --- WORKER ---
+def _load_source(source):
+    # (dataset, incremental store or None) for a job's data source
+    from edxso.columnar import open_store
+    from edxso.dataset_cache import load_scored_dataset
+    from edxso.incremental import IncrementalDataset
+
+    if source["kind"] == "columnar":
+        return open_store(source["name"]), None
+    if source["kind"] == "store":
+        store = IncrementalDataset(source["name"])
+        return store.load(), store
+    with open(source["path"], "rb") as f:
+        return load_scored_dataset(f.read(), source["filename"]), None
+
+
+def _load_logo(logo):
+    if not logo:
+        return None
+    with open(logo["path"], "rb") as f:
+        buf = io.BytesIO(f.read())
+    buf.name = logo["filename"]
+    return buf
+
+
+def run_job(queue, job, api_key):
+    from edxso.batch import generate_batch_zip, render_school, report_filename
+    from edxso.report import OUTPUT_EXTENSIONS
+
+    params = job["params"]
+    job_id = job["id"]
+    output_format = params["format"]
+    dataset, store = _load_source(params["source"])
+    logo_file = _load_logo(params.get("logo"))
+    queue.update(job_id, 0.1, f"Loaded {len(dataset.schools)} schools")
+
+    if job["kind"] == "report":
+        school_name = params["school"]
+        queue.update(job_id, 0.3, "Generating report")
+        file_data, fallback = render_school(
+            dataset, api_key, school_name, logo_file, output_format, force_refresh=params.get("force_refresh", False)
+        )
+        name = report_filename(school_name, OUTPUT_EXTENSIONS[output_format], set())
+        meta = {"templated_insights": 1} if fallback else None
+        rendered = [] if fallback else [school_name]
+    else:
+        def on_progress(done, total, school_name, error):
+            queue.update(job_id, 0.1 + 0.9 * done / total, f"{done} / {total} schools")
+
+        file_data, manifest = generate_batch_zip(
+            dataset, api_key, logo_file, output_format, schools=params.get("schools"),
+            jobs=params.get("jobs", 4), progress=on_progress, force_refresh=params.get("force_refresh", False)
+        )
+        name = "EDXSO_Reports.zip"
+        meta = {k: manifest[k] for k in ("total", "elapsed_seconds")}
+        meta["succeeded"] = len(manifest["succeeded"])
+        meta["failed"] = manifest["failed"]
+        meta["templated_insights"] = sum("insights" in entry for entry in manifest["succeeded"])
+        # Schools with a templated summary stay stale until re-enriched
+        rendered = [entry["school"] for entry in manifest["succeeded"] if "insights" not in entry]
+
+    if store is not None:
+        store.mark_rendered(rendered)
+    queue.complete(job_id, file_data, name, meta)
+
+
+def worker_main(poll=POLL_SECONDS):
+    # One worker process: claim, run, repeat
+    from dotenv import load_dotenv
+
+    from edxso.insights import reenrich_pending
+
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY")
+    queue = JobQueue()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    while not stopping.is_set():
+        job = queue.claim(worker)
+        if job is None:
+            # Idle: retry one Gemini summary that a report had to template
+            if not (api_key and reenrich_pending(api_key)):
+                stopping.wait(poll)
+            continue
+        beat_stop = threading.Event()
+
+        def beat(job_id=job["id"]):
+            while not beat_stop.wait(HEARTBEAT_SECONDS):
+                queue.heartbeat(job_id)
+
+        threading.Thread(target=beat, daemon=True).start()
+        try:
+            with trace(job["id"]), span("job", kind=job["kind"]):
+                run_job(queue, job, api_key)
+        except Exception as e:
+            queue.fail(job["id"], f"{type(e).__name__}: {e}")
+        finally:
+            beat_stop.set()
+
+
+def worker_env(workers):
+    # Each worker process gets its share of the per-host budgets, so N workers
+    # run EDXSO_PDF_BROWSERS browsers and one dataset cache's worth of memory
+    # between them, not N times each
+    from edxso.dataset_cache import DEFAULT_CACHE_BYTES
+    from edxso.pdf_renderer import DEFAULT_BROWSERS
+
+    workers = max(1, workers)
+    return {
+        "EDXSO_PDF_BROWSERS": str(max(1, DEFAULT_BROWSERS // workers)),
+        "EDXSO_DATASET_CACHE_MB": str(max(1, DEFAULT_CACHE_BYTES // (1024 * 1024) // workers)),
+    }
+
+
+def run_pool(workers, parent_pid=None):
+    # Keeps `workers` worker processes alive; exits with the parent app if given
+    ctx = multiprocessing.get_context("spawn")
+    procs = []
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    get_job_queue().purge()
+    # Spawned workers inherit this environment and read it on import
+    os.environ.update(worker_env(workers))
+    try:
+        while not stopping.is_set():
+            procs = [p for p in procs if p.is_alive()]
+            while len(procs) < workers:
+                p = ctx.Process(target=worker_main, daemon=True)
+                p.start()
+                procs.append(p)
+            if parent_pid and not _pid_alive(parent_pid):
+                break
+            stopping.wait(5)
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join(10)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+# --- APP-MANAGED POOL ---
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def ensure_workers(workers=DEFAULT_WORKERS):
+    # Starts (or restarts) a worker pool tied to this process's lifetime.
+    # With EDXSO_JOB_WORKERS=0 the workers are expected to run separately.
+    global _pool
+    if workers <= 0:
+        return
+    with _pool_lock:
+        if _pool is None or _pool.poll() is not None:
+            _pool = subprocess.Popen([
+                sys.executable, "-m", "edxso.jobs", "worker",
+                "--workers", str(workers), "--parent-pid", str(os.getpid()),
+            ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m edxso.jobs", description="Run or inspect the background report queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="drain the queue with a pool of worker processes")
+    worker.add_argument("-w", "--workers", type=int, default=max(1, DEFAULT_WORKERS))
+    worker.add_argument("--parent-pid", type=int, help=argparse.SUPPRESS)
+    status = sub.add_parser("status", help="list recent jobs")
+    status.add_argument("-n", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        run_pool(args.workers, args.parent_pid)
+        return 0
+    for job in get_job_queue().recent(args.n):
+        print(json.dumps({k: job[k] for k in ("id", "label", "status", "progress", "message", "error", "result_path")}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import base64
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from edxso import cache_path
+
+log = logging.getLogger(__name__)
+
+# --- LOGO ASSET PIPELINE ---
+# Uploaded logos are downsized to what the report actually displays (96 CSS px
+# tall in the header, at 2x for print), recompressed, and cached per content
+# hash. The report embeds the result once and references it from the header
+# and the footer.
+DISPLAY_HEIGHT = 96
+PIXEL_RATIO = 2
+MAX_HEIGHT = DISPLAY_HEIGHT * PIXEL_RATIO
+MAX_WIDTH = MAX_HEIGHT * 4  # wide wordmarks
+JPEG_QUALITY = 85
+PALETTE_COLORS = 256
+LOGO_REVISION = 1  # bump when the optimization changes, to skip old cached files
+MEMORY_ENTRIES = 256
+
+try:
+    from PIL import Image, ImageOps
+    HAVE_PIL = True
+except ImportError:
+    HAVE_PIL = False
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+class LogoAsset:
+    def __init__(self, mime, data, width, height):
+        self.mime = mime
+        self.data = data
+        self.width = width
+        self.height = height
+
+    @property
+    def url(self):
+        return f"data:{self.mime};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+
+def _has_alpha(img):
+    if img.mode in ("RGBA", "LA"):
+        return img.getchannel("A").getextrema()[0] < 255
+    return img.mode == "P" and "transparency" in img.info
+
+
+def optimize_image(data):
+    # Fit inside MAX_WIDTH x MAX_HEIGHT, then palette PNG for images with
+    # transparency (crests, wordmarks) and JPEG for opaque ones (photos)
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        alpha = _has_alpha(img)
+        img = img.convert("RGBA" if alpha else "RGB")
+        img.thumbnail((MAX_WIDTH, MAX_HEIGHT), Image.LANCZOS)
+        out = io.BytesIO()
+        if alpha:
+            img.quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE).save(out, "PNG", optimize=True)
+            mime = "image/png"
+        else:
+            img.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            mime = "image/jpeg"
+        return LogoAsset(mime, out.getvalue(), *img.size)
+
+
+def _passthrough(data, filename):
+    # No Pillow or an unreadable image: embed as uploaded, sized as a square box
+    mime = "image/png" if (filename or "").lower().endswith(".png") else "image/jpeg"
+    return LogoAsset(mime, data, 1, 1)
+
+
+def _disk_path(digest, mime):
+    ext = "png" if mime == "image/png" else "jpg"
+    return cache_path("logos", f"{digest}-r{LOGO_REVISION}.{ext}")
+
+
+def _load_from_disk(digest):
+    for mime in ("image/png", "image/jpeg"):
+        path = _disk_path(digest, mime)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            with Image.open(io.BytesIO(data)) as img:
+                return LogoAsset(mime, data, *img.size)
+    return None
+
+
+def logo_asset(data, filename=None):
+    if not HAVE_PIL:
+        return _passthrough(data, filename)
+    digest = hashlib.sha256(data).hexdigest()
+    with _memory_lock:
+        asset = _memory.get(digest)
+        if asset is not None:
+            _memory.move_to_end(digest)
+            return asset
+    asset = _load_from_disk(digest)
+    if asset is None:
+        try:
+            asset = optimize_image(data)
+        except Exception as e:
+            log.warning("Embedding logo unoptimized: %s", e)
+            return _passthrough(data, filename)
+        if len(asset.data) >= len(data):
+            # Already small; keep whichever encoding is smaller
+            original = _passthrough(data, filename)
+            asset = LogoAsset(original.mime, data, asset.width, asset.height)
+        tmp = _disk_path(digest, asset.mime) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(asset.data)
+        os.replace(tmp, _disk_path(digest, asset.mime))
+    with _memory_lock:
+        _memory[digest] = asset
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return asset
@@ -0,0 +1,822 @@
+import contextlib
+import functools
+import io
+import os
+import re
+import unicodedata
+
+from edxso.charts import CATEGORIES, COLORS, STAT_KEYS
+from edxso.ranking import RANKED_METRICS
+from edxso.insights import benchmark_source
+from edxso.report import heat_alpha, ordinal
+from edxso.report_assets import ASSET_DIR
+
+try:
+    from fpdf import FPDF
+    from fpdf.pattern import LinearGradient
+    HAVE_FPDF = True
+except ImportError:
+    HAVE_FPDF = False
+
+# --- NATIVE PDF ENGINE ---
+# Draws the report's sections (hero, overview, scoring, summary, distribution
+# chart and cards, benchmark bars, peer ranking, footer) straight into a
+# vector A4 PDF with fpdf2: no HTML, no browser, no system libraries. Colors
+# and type follow the HTML template (Tailwind palette, bundled Inter).
+# Fixed-size cards move whole to the next page (card()); text and table
+# cards break between lines or rows instead (flow()).
+# Bump report.NATIVE_REVISION when the drawing changes.
+
+MARGIN = 14  # page margin, mm
+PAD = 9  # card padding
+GAP = 7  # space between cards
+PANEL_PAD = 6  # padding of the inset panels in flowing cards
+
+BG = "#f9fafb"
+WHITE = "#ffffff"
+NAVY = "#0c4a6e"
+NAVY_LIGHT = "#075985"
+INK = "#0f172a"
+GRAY_900 = "#111827"
+GRAY_700 = "#374151"
+GRAY_600 = "#4b5563"
+GRAY_500 = "#6b7280"
+GRAY_400 = "#9ca3af"
+GRAY_100 = "#f3f4f6"
+SLATE_50 = "#f8fafc"
+SLATE_100 = "#f1f5f9"
+SLATE_300 = "#cbd5e1"
+BLUE_50 = "#eff6ff"
+BLUE_100 = "#dbeafe"
+BLUE_200 = "#bfdbfe"
+BLUE_400 = "#60a5fa"
+BLUE_600 = "#2563eb"
+BLUE_700 = "#1d4ed8"
+GREEN_500 = "#22c55e"
+RED_400 = "#f87171"
+
+# Distribution cards: (label, count key, pct key, caption, accent, value color)
+CARDS = [
+    ("Emotionally Balanced", "balanced", "pct_balanced", "Stable emotional states.", "#22c55e", "#16a34a"),
+    ("Mildly Stressed", "mild", "pct_mild", "Minor stress levels.", "#3b82f6", "#2563eb"),
+    ("Moderately Stressed", "moderate", "pct_moderate", "Significant challenges.", "#eab308", "#ca8a04"),
+    ("Highly Stressed", "high", "pct_high", "Intense experiences.", "#f97316", "#ea580c"),
+    ("Severely Stressed", "severe", "pct_severe", "Extreme stress levels.", "#ef4444", "#dc2626"),
+]
+SCORING_BANDS = [
+    ("20-39", "Balanced", "#dcfce7"),
+    ("40-54", "Mild", "#dbeafe"),
+    ("55-69", "Moderate", "#fef9c3"),
+    ("70-84", "High", "#ffedd5"),
+    ("85-100", "Severe", "#fee2e2"),
+]
+INDICATORS = [
+    ("Exam Anxiety (Frequent Nervousness)", "anxiety_pct", "bench_anxiety_pct", BLUE_600),
+    ("Parental Performance Pressure", "parent_pressure_pct", "bench_parent_pressure_pct", BLUE_600),
+    ("Support Accessibility (Can talk to teachers/counselors)", "support_pct", "bench_support_pct", GREEN_500),
+]
+OVERVIEW_ROWS = [
+    ("Survey Name:", "Student Well-Being & Assessment Experience Survey"),
+    ("Participants:", None),
+    ("Mode:", "Online Survey"),
+    ("Nature:", "Anonymous, self-reported"),
+    ("Focus:", "Emotional impact of assessments"),
+]
+OBJECTIVES = [
+    "Collect evidence on emotional responses to tests.",
+    "Analyze stress associated with performance expectations.",
+    "Classify students into defined stress categories.",
+]
+CONFIDENTIALITY = (
+    "This report is confidential and jointly owned by EDXSO and {school}. All rights are reserved. "
+    "Any unauthorized use, reproduction, or distribution, in whole or in part, without written consent "
+    "from both parties is strictly prohibited."
+)
+
+# Weight -> (family, style). Every embedded face is subset on output, the
+# costliest step here, so medium (500) text shares the semibold face.
+FONTS = {400: ("Inter", ""), 500: ("Inter600", ""), 600: ("Inter600", ""), 700: ("Inter700", "")}
+FONT_FILES = {"Inter": 400, "Inter600": 600, "Inter700": 700}
+
+
+def _rgb(color):
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+def _pt(mm):
+    return mm / 0.3528
+
+
+def _font_file(weight):
+    # Plain TTF copies of the bundled WOFF2 subset (scripts/build_report_assets.py):
+    # reading WOFF2 would need brotli, which fpdf2 doesn't install
+    return os.path.join(ASSET_DIR, "fonts", f"Inter-{weight}.ttf")
+
+
+@functools.lru_cache(maxsize=1)
+def _glyphs():
+    from fontTools.ttLib import TTFont  # installed with fpdf2
+
+    return frozenset(TTFont(_font_file(400)).getBestCmap())
+
+
+def _plain(text):
+    # The bundled Inter is a Latin subset: other characters are decomposed
+    # (accents dropped) or replaced, so nothing renders as a blank box
+    text = str(text)
+    glyphs = _glyphs()
+    if all(ord(c) in glyphs for c in text):
+        return text
+    out = []
+    for c in text:
+        if ord(c) in glyphs:
+            out.append(c)
+        else:
+            base = "".join(b for b in unicodedata.normalize("NFKD", c) if ord(b) in glyphs and not unicodedata.combining(b))
+            out.append(base or "?")
+    return "".join(out)
+
+
+class ReportPDF(FPDF):
+    def __init__(self):
+        super().__init__(unit="mm", format="A4")
+        self.set_margins(MARGIN, MARGIN, MARGIN)
+        self.set_auto_page_break(False)
+        for family, weight in FONT_FILES.items():
+            self.add_font(family, "", _font_file(weight))
+        for font in self.fonts.values():
+            # Bounding boxes are already right in the bundled faces; not
+            # recalculating them spares decompiling every glyph on output
+            font.ttfont.recalcBBoxes = False
+        self.inner_w = self.w - 2 * MARGIN
+
+    def header(self):
+        # Every page gets the template's off-white background
+        self.set_fill_color(*_rgb(BG))
+        self.rect(0, 0, self.w, self.h, "F")
+
+    # --- PRIMITIVES ---
+    def style(self, size, weight=400, color=GRAY_700, spacing=0):
+        self.set_font(*FONTS[weight], size=size)
+        self.set_text_color(*_rgb(color))
+        self.set_char_spacing(spacing)
+
+    def fill(self, x, y, w, h, color, radius=0):
+        self.set_fill_color(*_rgb(color))
+        self.rect(x, y, w, h, "F", round_corners=radius > 0, corner_radius=radius)
+
+    def put(self, x, y, h, text):
+        # Text vertically centred in a line of height h, placed the way
+        # cell() does, without cell()'s per-call layout overhead
+        self.text(x, y + h / 2 + 0.3 * self.font_size, text)
+
+    def text_at(self, x, y, w, h, text, align="L"):
+        text = _plain(text)
+        if align != "L":
+            x += (w - self.get_string_width(text)) / (2 if align == "C" else 1)
+        self.put(x, y, h, text)
+
+    def fit(self, text, w):
+        # One-line text shortened with an ellipsis to fit w
+        text = _plain(text)
+        if self.get_string_width(text) <= w:
+            return text
+        while text and self.get_string_width(text + "…") > w:
+            text = text[:-1]
+        return text.rstrip() + "…"
+
+    def wrap(self, w, text, strong=700):
+        # Greedy word wrap on per-word widths (linear in the text, unlike
+        # fpdf2's multi_cell). Text between ** pairs is emphasized with the
+        # strong weight. Returns lines of words; a word is a list of
+        # (text, emphasized, width) pieces.
+        family, style, size = self.font_family, self.font_style, self.font_size_pt
+        space = self.get_string_width(" ")
+        lines, line, line_w = [], [], 0
+        emphasized = False
+        for token in _plain(text).split():
+            word = []
+            for i, piece in enumerate(token.split("**")):
+                if i:
+                    emphasized = not emphasized
+                if piece:
+                    if emphasized:
+                        self.set_font(*FONTS[strong], size=size)
+                    word.append((piece, emphasized, self.get_string_width(piece)))
+                    if emphasized:
+                        self.set_font(family, style, size=size)
+            if not word:
+                continue
+            word_w = sum(piece_w for _, _, piece_w in word)
+            if line and line_w + space + word_w > w:
+                lines.append(line)
+                line, line_w = [], 0
+            line_w += (space if line else 0) + word_w
+            line.append(word)
+        if line:
+            lines.append(line)
+        return lines
+
+    def text_height(self, w, line_h, text, strong=700):
+        return len(self.wrap(w, text, strong)) * line_h
+
+    def paragraph(self, x, y, w, line_h, text, align="L", strong=700, strong_color=None):
+        # Draws wrapped text (align L, C, R or J); returns the y below it
+        lines = self.wrap(w, text, strong)
+        for n, line in enumerate(lines):
+            last = n == len(lines) - 1
+            self.line_at(x, y, w, line_h, line, "L" if align == "J" and last else align, strong, strong_color)
+            y += line_h
+        return y
+
+    def line_at(self, x, y, w, line_h, line, align="L", strong=700, strong_color=None):
+        # Draws one line from wrap(); J stretches the word gaps to fill w
+        family, style, size = self.font_family, self.font_style, self.font_size_pt
+        color = self.text_color
+        space = self.get_string_width(" ")
+        words_w = sum(piece_w for word in line for _, _, piece_w in word)
+        gap = space
+        if align == "J" and len(line) > 1:
+            gap = (w - words_w) / (len(line) - 1)
+        line_w = words_w + gap * (len(line) - 1)
+        cx = x + {"C": (w - line_w) / 2, "R": w - line_w}.get(align, 0)
+        if gap == space and not any(emphasized for word in line for _, emphasized, _ in word):
+            # Plain line: one text run
+            self.put(cx, y, line_h, " ".join("".join(piece for piece, _, _ in word) for word in line))
+            return
+        for word in line:
+            for piece, emphasized, piece_w in word:
+                if emphasized:
+                    self.set_font(*FONTS[strong], size=size)
+                    if strong_color:
+                        self.set_text_color(*_rgb(strong_color))
+                self.put(cx, y, line_h, piece)
+                if emphasized:
+                    self.set_font(family, style, size=size)
+                    self.text_color = color
+                cx += piece_w
+            cx += gap
+
+    def text_lines(self, x, w, line_h, text, style, align="L", strong=700, strong_color=None, after=0):
+        # Wrapped text as flow() blocks, one per line, so a long paragraph
+        # can continue on the next page; style is style()'s (size, weight,
+        # color), after the space below the last line
+        self.style(*style)
+        lines = self.wrap(w, text, strong)
+        blocks = []
+        for n, line in enumerate(lines):
+            last = n == len(lines) - 1
+
+            def draw(y, line=line, line_align="L" if align == "J" and last else align):
+                self.style(*style)
+                self.line_at(x, y, w, line_h, line, line_align, strong, strong_color)
+            blocks.append((line_h + (after if last else 0), draw))
+        return blocks
+
+    def card(self, h, color=WHITE, border=SLATE_100, radius=5):
+        # Reserves a card of height h, on a new page if it doesn't fit
+        # here; returns its top edge
+        if self.get_y() + h > self.h - MARGIN:
+            self.add_page()
+        y = self.get_y()
+        if border:
+            self.set_draw_color(*_rgb(border))
+            self.set_line_width(0.3)
+        self.set_fill_color(*_rgb(color))
+        self.rect(MARGIN, y, self.inner_w, h, "DF" if border else "F", round_corners=True, corner_radius=radius)
+        self.set_y(y + h + GAP)
+        return y
+
+    def flow(self, blocks, panel=None, continued=None, color=WHITE, border=SLATE_100, radius=5):
+        # A card built from (height, draw) blocks, draw(y) drawing one block
+        # at y. Where card() moves a whole card to the next page, flow()
+        # breaks between blocks, so long text continues instead of being cut
+        # off and pages don't end half empty. Each page's part gets its own
+        # background, and the first block (the heading) is never left alone
+        # at the foot of a page. panel: (first block, fill, border) of an
+        # inset box around the remaining blocks. continued: a block repeated
+        # at the top of every continuation (table headers).
+        first_panel = len(blocks) if panel is None else panel[0]
+        bottom = self.h - MARGIN
+        i = 0
+        while i < len(blocks):
+            top = self.get_y()
+            fresh = top <= self.t_margin + 0.01
+            y, placed, count, panel_top = top + PAD, [], 0, None
+            if i and continued:
+                placed.append((y, continued[1]))
+                y += continued[0]
+            restart = False
+            for j in range(i, len(blocks)):
+                h, draw = blocks[j]
+                in_panel = j >= first_panel
+                start = y + (PANEL_PAD if in_panel and panel_top is None else 0)
+                if start + h + (PANEL_PAD if in_panel else 0) + PAD > bottom:
+                    if count and not (i == 0 and count == 1):
+                        break
+                    if not fresh:
+                        restart = True
+                        break
+                    # Taller than a page even on its own: drawn as is
+                if in_panel and panel_top is None:
+                    panel_top = y
+                placed.append((start, draw))
+                count += 1
+                y = start + h
+            if restart:
+                self.add_page()
+                continue
+
+            end = y + (PANEL_PAD if panel_top is not None else 0)
+            if border:
+                self.set_draw_color(*_rgb(border))
+                self.set_line_width(0.3)
+            self.set_fill_color(*_rgb(color))
+            self.rect(MARGIN, top, self.inner_w, end + PAD - top, "DF" if border else "F", round_corners=True, corner_radius=radius)
+            if panel_top is not None:
+                self.set_draw_color(*_rgb(panel[2]))
+                self.set_fill_color(*_rgb(panel[1]))
+                self.rect(MARGIN + PAD, panel_top, self.inner_w - 2 * PAD, end - panel_top, "DF", round_corners=True, corner_radius=4)
+            for start, draw in placed:
+                draw(start)
+            i += count
+            self.set_y(end + PAD + GAP)
+            if i < len(blocks):
+                self.add_page()
+
+    def heading(self, x, y, w, text, size=16, color=NAVY, align="L"):
+        self.style(size, 700, color, spacing=0.3)
+        return self.paragraph(x, y, w, size * 0.45, text.upper(), align=align)
+
+    def rule(self, x, y, w, color=BLUE_600, h=0.8):
+        self.fill(x, y, w, h, color)
+
+    def logo(self, logo, school_name, cx, y, height, faded=False):
+        # Uploaded logo (LogoAsset) centred on cx, or the navy monogram
+        if logo is None:
+            self.set_fill_color(*_rgb(INK))
+            with self.local_context(fill_opacity=0.3) if faded else contextlib.nullcontext():
+                self.ellipse(cx - height / 2, y, height, height, "F")
+                self.style(_pt(height * 0.32), 700, WHITE)
+                self.text_at(cx - height / 2, y, height, height, str(school_name)[:2].upper(), align="C")
+            return
+        from PIL import Image, ImageOps
+
+        img = Image.open(io.BytesIO(logo.data))
+        width = height * img.width / img.height
+        if faded:
+            img = img.convert("LA") if img.mode in ("RGBA", "LA", "P") else ImageOps.grayscale(img)
+        with self.local_context(fill_opacity=0.3) if faded else contextlib.nullcontext():
+            self.image(img, x=cx - width / 2, y=y, w=width, h=height)
+
+
+# --- SECTIONS ---
+def _hero(pdf, stats, school_name, logo):
+    w = pdf.inner_w - 2 * PAD
+    pdf.style(11, 600, spacing=1.2)
+    name_h = pdf.text_height(w, 6, str(school_name).upper())
+    h = 12 + 30 + 8 + name_h + 3 + 12 + 4 + 1 + 7 + 34 + 10
+    y = pdf.card(h, color=NAVY, border=None, radius=6)
+    with pdf.use_pattern(LinearGradient(MARGIN, y, MARGIN + pdf.inner_w, y + h, [NAVY, NAVY_LIGHT])):
+        pdf.rect(MARGIN, y, pdf.inner_w, h, "F", round_corners=True, corner_radius=6)
+
+    cx = pdf.w / 2
+    y += 12
+    box_w = 30
+    if logo is not None:
+        box_w = 8 + 22 * logo.width / logo.height if (logo.width, logo.height) != (1, 1) else 30
+        box_w = min(box_w, pdf.inner_w - 2 * PAD)
+    pdf.fill(cx - box_w / 2, y, box_w, 30, WHITE, radius=3)
+    pdf.logo(logo, school_name, cx, y + 4, 22)
+    y += 30 + 8
+
+    pdf.style(11, 600, BLUE_200, spacing=1.2)
+    y = pdf.paragraph(MARGIN + PAD, y, w, 6, str(school_name).upper(), align="C") + 3
+    pdf.style(26, 700, WHITE)
+    pdf.text_at(MARGIN + PAD, y, w, 12, "Student Exam Stress Manometer", align="C")
+    y += 12 + 4
+    pdf.fill(cx - 12, y, 24, 1, BLUE_400)
+    y += 1 + 7
+    for text, size, weight, line_h in (
+        ("SURVEY REPORT", 12, 500, 7),
+        ("Published 2026", 10, 400, 6),
+        ("- By  EDXSO Research Team (New Delhi)", 11, 500, 8),
+        ("www.edxso.com", 10, 400, 6),
+    ):
+        pdf.style(size, weight, BLUE_100)
+        pdf.text_at(MARGIN + PAD, y, w, line_h, text, align="C")
+        y += line_h + 1.75
+
+
+def _image_path(name):
+    return os.path.join(ASSET_DIR, "images", name)
+
+
+def _overview(pdf, stats):
+    left_w = pdf.inner_w / 3 - PAD
+    right_x = MARGIN + PAD + left_w + 8
+    right_w = MARGIN + pdf.inner_w - PAD - right_x
+    image = _image_path("overview.png")
+    image_h = left_w * 0.6
+    h = max(PAD * 2 + image_h + 4 + 8 + 18, PAD * 2 + len(OVERVIEW_ROWS) * 11)
+    y = pdf.card(h)
+
+    ly = y + PAD
+    pdf.image(image, x=MARGIN + PAD, y=ly, w=left_w, h=image_h, keep_aspect_ratio=True)
+    ly += image_h + 4
+    ly = pdf.heading(MARGIN + PAD, ly, left_w, "Survey Overview", size=14) + 2
+    pdf.style(9, 400, GRAY_600)
+    pdf.paragraph(MARGIN + PAD, ly, left_w, 4.5, "Structured snapshot outlining scale, mode, and analytical logic used to capture student perspectives.")
+
+    ry = y + PAD
+    for label, value in OVERVIEW_ROWS:
+        value = value or f"{stats['count']} Students"
+        pdf.style(7.5, 700, NAVY, spacing=0.5)
+        pdf.text_at(right_x, ry, 30, 11, label.upper())
+        pdf.style(9.5, 400, GRAY_700)
+        lines = len(pdf.wrap(right_w - 32, value))
+        pdf.paragraph(right_x + 32, ry + (11 - 4.5 * lines) / 2, right_w - 32, 4.5, value)
+        pdf.fill(right_x, ry + 11 - 0.3, right_w, 0.3, GRAY_100)
+        ry += 11
+
+
+def _objectives(pdf):
+    col_w = (pdf.inner_w - GAP) / 2 - 2 * PAD
+    image = _image_path("methodology.png")
+    image_h = col_w * 0.45
+    h = max(PAD * 2 + 10 + len(OBJECTIVES) * 11, PAD * 2 + image_h + 4 + 10 + 14)
+    if pdf.get_y() + h > pdf.h - MARGIN:
+        pdf.add_page()
+    y = pdf.get_y()
+    for i in range(2):
+        x = MARGIN + i * (col_w + 2 * PAD + GAP)
+        pdf.set_draw_color(*_rgb(SLATE_100))
+        pdf.set_fill_color(*_rgb(WHITE))
+        pdf.rect(x, y, col_w + 2 * PAD, h, "DF", round_corners=True, corner_radius=4)
+    pdf.set_y(y + h + GAP)
+
+    x = MARGIN + PAD
+    oy = pdf.heading(x, y + PAD, col_w, "Objectives", size=14) + 4
+    for i, text in enumerate(OBJECTIVES, start=1):
+        pdf.style(13, 700, BLUE_600)
+        pdf.text_at(x, oy, 10, 6, f"{i:02d}")
+        pdf.style(10, 400, GRAY_700)
+        pdf.paragraph(x + 11, oy + 0.5, col_w - 11, 5, text)
+        oy += 11
+
+    x = MARGIN + col_w + 3 * PAD + GAP
+    my = y + PAD
+    pdf.image(image, x=x, y=my, w=col_w, h=image_h, keep_aspect_ratio=True)
+    my += image_h + 4
+    my = pdf.heading(x, my, col_w, "Design & Methodology", size=14) + 2
+    pdf.style(10, 400, GRAY_600)
+    pdf.paragraph(x, my, col_w, 5, "20 structured statements on a 5-point scale from **Never** to **Always**.", strong=600)
+
+
+def _scoring(pdf):
+    w = pdf.inner_w - 2 * PAD
+    y = pdf.card(PAD * 2 + 14 + 4 + 16 + 6 + 12)
+    x = MARGIN + PAD
+    pdf.heading(x, y + PAD, w, "Scoring Framework", size=20)
+    pdf.rule(x, y + PAD + 11, 20)
+    by = y + PAD + 18
+    slot = (w - 4 * 2) / 5
+    for i, (band, label, color) in enumerate(SCORING_BANDS):
+        bx = x + i * (slot + 2)
+        pdf.fill(bx, by, slot, 16, color, radius=1.5)
+        pdf.style(8, 500, GRAY_500)
+        pdf.text_at(bx, by + 3, slot, 5, band, align="C")
+        pdf.text_at(bx, by + 8, slot, 5, label, align="C")
+    ny = by + 16 + 6
+    pdf.fill(x, ny, w, 12, SLATE_50, radius=3)
+    pdf.style(8.5, 400, GRAY_500)
+    pdf.text_at(x + 5, ny, w - 10, 12, "Note: Participation was anonymous. Scoring logic was applied strictly without subjective interpretation.")
+
+
+def _summary(pdf, ai_content):
+    # The AI text has no length limit, so this card flows across pages
+    w = pdf.inner_w - 2 * PAD
+    x = MARGIN + PAD
+    paragraphs = [ai_content.get(k, "") for k in ("p1", "p2", "p3")]
+
+    def header(y):
+        pdf.heading(x, y + 1, w, "Executive Summary", size=18)
+        label = _plain(f"Profile: {ai_content.get('risk_band_label', 'Ecosystem Profile')}").upper()
+        pdf.style(7.5, 700, BLUE_700, spacing=0.8)
+        pill_w = min(pdf.get_string_width(label) + 8, w / 2)
+        pdf.set_draw_color(*_rgb(BLUE_100))
+        pdf.set_fill_color(*_rgb(BLUE_50))
+        pdf.rect(x + w - pill_w, y, pill_w, 8, "DF", round_corners=True, corner_radius=4)
+        pdf.text_at(x + w - pill_w, y, pill_w, 8, label, align="C")
+        pdf.fill(x, y + 14, w, 0.3, GRAY_100)
+
+    blocks = [(14 + 6, header)]
+    for n, p in enumerate(paragraphs):
+        after = 4 if n < len(paragraphs) - 1 else 0
+        blocks += pdf.text_lines(x + PANEL_PAD, w - 2 * PANEL_PAD, 5.6, p, (10.5, 400, GRAY_700), align="J", after=after)
+    pdf.flow(blocks, panel=(1, WHITE, SLATE_100))
+
+
+def _chart(pdf, stats, x, y, w):
+    # Same geometry as charts.stress_chart_svg, scaled from its 1000 x 500 box
+    s = w / 1000
+    values = [float(stats[k]) for k in STAT_KEYS]
+    left, right, top, bottom = 40, 960, 90, 440
+    y_max = max(max(values) * 1.05, 1.0)
+    slot = (right - left) / len(values)
+    bar_w = slot * 0.8
+    pdf.fill(x + left * s, y + top * s, (right - left) * s, (bottom - top) * s, SLATE_50)
+    pdf.style(_pt(19 * s), 700, INK)
+    pdf.text_at(x, y + (top - 58) * s, w, 8 * s * 3, "Student Stress Distribution", align="C")
+    pdf.set_draw_color(*_rgb(WHITE))
+    pdf.set_line_width(2 * s)
+    for i, (label, val, color) in enumerate(zip(CATEGORIES, values, COLORS)):
+        bx = left + i * slot + (slot - bar_w) / 2
+        bh = (bottom - top) * val / y_max
+        pdf.set_fill_color(*_rgb(color))
+        if bh > 0:
+            pdf.rect(x + bx * s, y + (bottom - bh) * s, bar_w * s, bh * s, "DF")
+        pdf.style(_pt(16 * s), 700, "#475569")
+        pdf.text_at(x + bx * s, y + (bottom - bh - 26) * s, bar_w * s, 18 * s, f"{val:g}%", align="C")
+        pdf.style(_pt(15 * s), 600, "#334155")
+        pdf.text_at(x + bx * s, y + (bottom + 12) * s, bar_w * s, 20 * s, label, align="C")
+    pdf.set_draw_color(*_rgb(SLATE_300))
+    pdf.set_line_width(0.2)
+    pdf.line(x + left * s, y + bottom * s, x + right * s, y + bottom * s)
+    return y + 500 * s
+
+
+def _results(pdf, stats):
+    w = pdf.inner_w - 2 * PAD
+    chart_w = w
+    card_h = 22
+    x = MARGIN + PAD
+
+    def chart(y):
+        pdf.heading(x, y, w, "Student Well-Being", size=18, align="C")
+        pdf.style(12, 400, GRAY_400)
+        pdf.text_at(x, y + 8, w, 6, "Stress Category Distribution", align="C")
+        _chart(pdf, stats, x, y + 16, chart_w)
+
+    col_w = (w - 2 * 8) / 3
+    cards = [(label, stats[count], f"{stats[pct]}% — {caption}", accent, value_color)
+             for label, count, pct, caption, accent, value_color in CARDS]
+    cards.append(("Total Surveyed", stats['count'], "100% Valid Responses.", GRAY_900, GRAY_900))
+
+    def card_row(top, row):
+        for i, (label, value, caption, accent, value_color) in enumerate(row):
+            cx = x + i * (col_w + 8)
+            pdf.style(7.5, 700, GRAY_900, spacing=0.6)
+            pdf.text_at(cx, top + 4, col_w * 0.7, 6, label.upper())
+            pdf.style(20, 700, value_color)
+            pdf.text_at(cx + col_w * 0.6, top, col_w * 0.4, 10, str(value), align="R")
+            pdf.style(8, 400, GRAY_500)
+            pdf.text_at(cx, top + 11, col_w, 5, caption)
+            pdf.fill(cx, top + card_h - 5, col_w, 0.6, accent)
+
+    rows = [cards[i:i + 3] for i in range(0, len(cards), 3)]
+    pdf.flow([(16 + chart_w / 2 + 6, chart)] + [
+        (card_h + 4, lambda y, row=row: card_row(y, row)) for row in rows
+    ])
+
+
+PEER_NOTE = ("Rank 1 is the lowest-stress school. The percentile is the share of schools with a lower value "
+             "(ties count half), so a lower percentile means less stress than peers.")
+
+
+def _peer_ranking(pdf, stats, school_name, x, y, w, measure=False):
+    # Same cards as report.peer_ranking_html. Returns the y below them; with
+    # measure=True only the height is worked out.
+    if stats.get('mean_score_percentile') is None:
+        return y
+    title = f"Where {school_name} Stands Among {stats['peer_schools']:,} Surveyed Schools"
+    if measure:
+        pdf.style(13, 700, NAVY)
+        title_h = pdf.text_height(w, 6.5, title)
+        pdf.style(7, 400, GRAY_400)
+        return y + title_h + 4 + 30 + 3 + pdf.text_height(w, 3.5, PEER_NOTE) + 4
+    pdf.style(13, 700, NAVY)
+    y = pdf.paragraph(x, y, w, 6.5, title, align="C") + 4
+    col_w = (w - 2 * 5) / 3
+    for i, (metric, label) in enumerate(RANKED_METRICS.items()):
+        cx = x + i * (col_w + 5)
+        pdf.fill(cx, y, col_w, 30, SLATE_50, radius=3)
+        pdf.style(7, 400, GRAY_500, spacing=0.6)
+        pdf.text_at(cx, y + 3, col_w, 5, label.upper(), align="C")
+        value = f"{stats[metric]}" if metric == 'mean_score' else f"{stats[metric]}%"
+        pdf.style(20, 700, NAVY)
+        pdf.text_at(cx, y + 9, col_w, 11, value, align="C")
+        pdf.style(8, 400, GRAY_600)
+        pdf.text_at(cx, y + 21, col_w, 5, f"{ordinal(stats[f'{metric}_percentile'])} percentile · rank {stats[f'{metric}_rank']} of {stats['peer_schools']}", align="C")
+    y += 30 + 3
+    pdf.style(7, 400, GRAY_400)
+    return pdf.paragraph(x, y, w, 3.5, PEER_NOTE, align="C") + 4
+
+
+def _benchmark(pdf, stats, school_name):
+    w = pdf.inner_w - 2 * PAD
+    title = "NATIONAL BENCHMARK COMPARISON: **STUDENT STRESS LEVELS (INDIA)**"
+    source = "To contextualize findings, student responses were compared against " + \
+        re.sub(r"</?strong>", "**", benchmark_source(stats)) + "."
+    pdf.style(17, 700, NAVY, spacing=0.2)
+    title_h = pdf.text_height(w, 8, title)
+    pdf.style(10.5, 400, GRAY_600)
+    source_h = pdf.text_height(w, 5.6, source)
+    x = MARGIN + PAD
+
+    def intro(y):
+        pdf.style(17, 700, NAVY, spacing=0.2)
+        pdf.paragraph(x, y, w, 8, title, strong_color=BLUE_600)
+        ty = y + title_h + 2
+        pdf.rule(x, ty, 24)
+        pdf.style(10.5, 400, GRAY_600)
+        pdf.paragraph(x, ty + 4, w, 5.6, source)
+
+    def distribution(ty):
+        pdf.style(13, 700, NAVY)
+        pdf.text_at(x, ty, w, 8, "Stress Category Distribution: School vs. National Benchmark", align="C")
+        ty += 10
+        bar_x, bar_w = x + w * 0.1, w * 0.8
+        pdf.style(7.5, 700, GRAY_500, spacing=0.6)
+        pdf.text_at(bar_x, ty, bar_w * 0.7, 5, pdf.fit(str(school_name).upper(), bar_w * 0.7))
+        pdf.text_at(bar_x, ty, bar_w, 5, f"VALID N={stats['count']}", align="R")
+        ty += 7
+        sx = bar_x
+        for key, color in zip(STAT_KEYS, COLORS):
+            seg = bar_w * float(stats[key]) / 100
+            if seg > 0:
+                pdf.fill(sx, ty, seg, 12, color)
+            sx += seg
+
+    def indicators(ty):
+        pdf.style(13, 700, NAVY)
+        pdf.text_at(x, ty, w, 8, "Key Stress Indicator Comparison", align="C")
+        _indicators(pdf, stats, x, ty + 12, w)
+
+    blocks = [
+        (title_h + 6 + source_h + 10, intro),
+        (10 + 7 + 12 + 15, distribution),
+        (12 + len(INDICATORS) * 16, indicators),
+    ]
+    peer_h = _peer_ranking(pdf, stats, school_name, 0, 0, w, measure=True)
+    if peer_h:
+        blocks.append((4 + peer_h, lambda y: _peer_ranking(pdf, stats, school_name, x, y + 4, w)))
+    pdf.flow(blocks)
+
+
+def _indicators(pdf, stats, x, ty, w):
+    for label, key, bench_key, color in INDICATORS:
+        school_pct, bench_pct = float(stats[key]), float(stats[bench_key])
+        pdf.style(8.5, 700, GRAY_600)
+        pdf.text_at(x, ty, w * 0.6, 5, label)
+        pdf.style(8.5, 700, GRAY_400)
+        national = f"National: {stats[bench_key]}%"
+        national_w = pdf.get_string_width(national)
+        pdf.text_at(x + w - national_w, ty, national_w, 5, national)
+        pdf.style(8.5, 700, BLUE_600)
+        school_text = f"School: {stats[key]}%"
+        school_w = pdf.get_string_width(school_text)
+        pdf.text_at(x + w - national_w - 5 - school_w, ty, school_w, 5, school_text)
+        by = ty + 6
+        pdf.fill(x, by, w, 6, SLATE_100, radius=3)
+        if school_pct > 0:
+            pdf.fill(x, by, max(w * min(school_pct, 100) / 100, 6), 6, color, radius=3)
+        mx = x + w * min(bench_pct, 100) / 100
+        pdf.fill(mx - 0.7, by, 1.4, 6, WHITE)
+        pdf.fill(mx - 0.45, by, 0.9, 6, RED_400)
+        ty += 16
+
+
+ITEM_LEVELS = ("Never", "Rarely", "Sometimes", "Often", "Always")
+ITEM_INTRO = ("How often students gave each answer to the 20 survey statements. Darker cells mark more common "
+              "answers; blank or unrecognized answers are shown as No answer. The last two columns compare the "
+              "share answering Often or Always with the national figure.")
+ITEM_NOTE = "† Positively worded statement, scored in reverse: frequent answers here indicate less stress."
+
+
+def _heat(pct):
+    # report.heat_color's rgba blue, flattened onto white
+    a = heat_alpha(pct)
+    r, g, b = (round(255 + (c - 255) * a) for c in _rgb(BLUE_600))
+    return f"#{r:02x}{g:02x}{b:02x}", (WHITE if a > 0.45 else GRAY_700)
+
+
+def _statement(pdf, n, row, w, line_h, max_lines=2):
+    # Item text with its number and reverse mark, cut to max_lines
+    words = f"{n}. {row['item']}".split(" ")
+    mark = " †" if row['reverse'] else ""
+    text = " ".join(words) + mark
+    while pdf.text_height(w, line_h, text) > max_lines * line_h and len(words) > 2:
+        words.pop()
+        text = " ".join(words).rstrip(",;:") + "…" + mark
+    return text
+
+
+def _item_profile(pdf, stats):
+    # Same table as report.item_heatmap_html
+    rows = stats.get('items')
+    if not rows:
+        return
+    w = pdf.inner_w - 2 * PAD
+    text_w = w * 0.38
+    cell_w = (w - text_w) / 8
+    line_h = 3.4
+    pdf.style(7, 400, GRAY_700)
+    labels = [_statement(pdf, n, row, text_w - 2, line_h) for n, row in enumerate(rows, start=1)]
+    heights = [pdf.text_height(text_w - 2, line_h, label) + 2.6 for label in labels]
+    pdf.style(10.5, 400, GRAY_600)
+    intro_h = pdf.text_height(w, 5.6, ITEM_INTRO)
+    x = MARGIN + PAD
+
+    def intro(y):
+        pdf.heading(x, y, w, "ITEM-LEVEL RESPONSE PROFILE", size=17)
+        pdf.rule(x, y + 10, 24)
+        pdf.style(10.5, 400, GRAY_600)
+        columns(pdf.paragraph(x, y + 14, w, 5.6, ITEM_INTRO) + 8)
+
+    def columns(ty):
+        pdf.style(6, 700, GRAY_500, spacing=0.2)
+        pdf.text_at(x, ty + 3, text_w, 3, "STATEMENT")
+        for i, label in enumerate(ITEM_LEVELS + ("No answer", "Often + Always", "National")):
+            pdf.paragraph(x + text_w + i * cell_w, ty, cell_w, 3, label.upper(), align="C")
+
+    def row_block(row, label, row_h):
+        def draw(ty):
+            pdf.style(7, 400, GRAY_700)
+            pdf.paragraph(x, ty + 1.3, text_w - 2, line_h, label)
+            for i, pct in enumerate(row['pct']):
+                bg, fg = _heat(pct)
+                cx = x + text_w + i * cell_w
+                pdf.fill(cx + 0.4, ty, cell_w - 0.8, row_h, bg, radius=1)
+                pdf.style(7, 400, fg)
+                pdf.text_at(cx, ty + (row_h - 4) / 2, cell_w, 4, f"{pct}%", align="C")
+            pdf.style(7, 400, GRAY_400)
+            pdf.text_at(x + text_w + 5 * cell_w, ty + (row_h - 4) / 2, cell_w, 4, f"{row['blank']}%", align="C")
+            pdf.style(7, 700, NAVY)
+            pdf.text_at(x + text_w + 6 * cell_w, ty + (row_h - 4) / 2, cell_w, 4, f"{row['top_box']}%", align="C")
+            pdf.style(7, 400, GRAY_400)
+            pdf.text_at(x + text_w + 7 * cell_w, ty + (row_h - 4) / 2, cell_w, 4, f"{row['bench_top_box']}%", align="C")
+        return row_h + 0.8, draw
+
+    def note(ty):
+        pdf.style(7, 400, GRAY_400)
+        pdf.paragraph(x, ty + 3, w, 3.5, ITEM_NOTE)
+
+    # One block per statement; a continued table repeats the column labels
+    blocks = [(14 + intro_h + 8 + 8, intro)]
+    blocks += [row_block(row, label, row_h) for row, label, row_h in zip(rows, labels, heights)]
+    blocks.append((8, note))
+    pdf.flow(blocks, continued=(8, columns))
+
+
+def _next_step(pdf):
+    w = pdf.inner_w - 2 * PAD
+    body = ("The data highlights both strengths and opportunities. A focused well-being strategy can "
+            "meaningfully reduce moderate-to-severe stress levels.")
+    close = ("We welcome a leadership discussion to translate these insights into structured, measurable "
+             "student support initiatives.")
+    x = MARGIN + PAD
+    inner_x, inner_w = x + PANEL_PAD, w - 2 * PANEL_PAD
+    blocks = [(12, lambda y: pdf.heading(x, y, w, "Next Step", size=18))]
+    blocks += pdf.text_lines(inner_x, inner_w, 5.6, body, (10.5, 400, GRAY_700), after=3)
+    blocks += pdf.text_lines(inner_x, inner_w, 5.6, close, (10.5, 600, NAVY))
+    pdf.flow(blocks, panel=(1, "#f5f9ff", BLUE_100))
+
+
+def _footer(pdf, school_name, logo):
+    w = pdf.inner_w - 20
+    notice = "**Confidentiality & Ownership Notice:** " + CONFIDENTIALITY.format(school=school_name)
+    pdf.style(7.5, 400, GRAY_400)
+    notice_h = pdf.text_height(w, 4, notice)
+    h = 6 + 9 + 6 + 5 + 8 + notice_h + 6
+    if pdf.get_y() + h > pdf.h - MARGIN:
+        pdf.add_page()
+    y = pdf.get_y() + 6
+    pdf.logo(logo, school_name, pdf.w / 2, y, 9, faded=True)
+    y += 9 + 6
+    pdf.style(7, 700, GRAY_400, spacing=1)
+    pdf.text_at(MARGIN, y, pdf.inner_w, 4, "© 2026 EDXSO SURVEY REPORTS", align="C")
+    pdf.style(7.5, 400, GRAY_400)
+    pdf.text_at(MARGIN, y + 5, pdf.inner_w, 4, f"{school_name} — Student Assessment Experience", align="C")
+    pdf.paragraph(MARGIN + 10, y + 13, w, 4, notice, align="C")
+
+
+def render_native_pdf(stats, school_name, logo, ai_content):
+    # logo: a logo.LogoAsset, or None for the monogram. Returns PDF bytes.
+    if not HAVE_FPDF:
+        raise RuntimeError("The native PDF engine needs fpdf2 (pip install fpdf2).")
+    pdf = ReportPDF()
+    pdf.set_title(_plain(f"Student Well-Being Survey Report - {school_name}"))
+    pdf.set_author("EDXSO Research Team")
+    pdf.add_page()
+    _hero(pdf, stats, school_name, logo)
+    _overview(pdf, stats)
+    _objectives(pdf)
+    _scoring(pdf)
+    _summary(pdf, ai_content)
+    _results(pdf, stats)
+    _item_profile(pdf, stats)
+    _benchmark(pdf, stats, school_name)
+    _next_step(pdf)
+    _footer(pdf, school_name, logo)
+    return bytes(pdf.output())
@@ -0,0 +1,292 @@
+import atexit
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from edxso.bootstrap import ensure_playwright_browser
+
+log = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+DEFAULT_BROWSERS = int(os.getenv("EDXSO_PDF_BROWSERS", "2"))
+DEFAULT_QUEUE_SIZE = int(os.getenv("EDXSO_PDF_QUEUE", "32"))
+DEFAULT_TIMEOUT = float(os.getenv("EDXSO_PDF_TIMEOUT", "60"))
+MAX_START_FAILURES = int(os.getenv("EDXSO_PDF_MAX_START_FAILURES", "5"))  # in a row, then the pool gives up
+RESTART_BACKOFF_MAX = 30.0  # seconds between driver/browser start attempts, doubling from 1
+BROKEN_RETRY_SECONDS = 300.0  # a given-up pool is replaced on the next request after this
+START_TIMEOUT = 30.0  # seconds for a launched Chromium to open its DevTools port
+KILL_GRACE = 2.0  # seconds past a job's deadline before its browser is killed
+
+LAUNCH_ARGS = ['--no-sandbox', '--disable-dev-shm-usage']
+PAGE_WIDTH = "1200px"
+PAGE_MARGIN = {"top": "40px", "bottom": "40px", "left": "40px", "right": "40px"}
+
+
+class RendererBusy(RuntimeError):
+    pass
+
+
+class RendererUnavailable(RuntimeError):
+    pass
+
+
+class _Chromium:
+    # A headless Chromium process owned by the pool rather than by the
+    # Playwright driver. Playwright objects may only be touched from the thread
+    # that created them, so a render stuck inside page.pdf() can't be closed
+    # from outside; killing the process can, from any thread.
+    def __init__(self, executable):
+        self.profile = tempfile.mkdtemp(prefix="edxso-chromium-")
+        self.proc = subprocess.Popen(
+            [executable, "--headless=new", "--remote-debugging-port=0", f"--user-data-dir={self.profile}",
+             *LAUNCH_ARGS, "about:blank"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.killed = False
+
+    def endpoint(self, timeout=START_TIMEOUT):
+        # Chromium writes the port it picked to <profile>/DevToolsActivePort
+        port_file = os.path.join(self.profile, "DevToolsActivePort")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"Chromium exited with code {self.proc.returncode} on start.")
+            try:
+                with open(port_file) as f:
+                    port = f.readline().strip()
+            except OSError:
+                port = ""
+            if port.isdigit():
+                return f"http://127.0.0.1:{port}"
+            time.sleep(0.05)
+        raise TimeoutError("Chromium did not open its DevTools port in time.")
+
+    def kill(self):
+        self.killed = True
+        if self.proc.poll() is None:
+            self.proc.kill()
+
+    def close(self):
+        self.kill()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            pass
+        shutil.rmtree(self.profile, ignore_errors=True)
+
+
+class _Job:
+    # One deadline covers queueing, rendering and waiting for the result
+    def __init__(self, html, timeout):
+        self.html = html
+        self.deadline = time.monotonic() + timeout
+        self.future = Future()
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+
+class ChromiumPool:
+    # Long-lived headless Chromium workers. Playwright's sync API is bound to
+    # the thread that started it, so each worker thread owns one driver + one
+    # browser and renders every job in a fresh context. A disconnected browser
+    # is relaunched on the next job; a dead driver restarts the worker loop.
+    # A render still running KILL_GRACE after its deadline has its browser
+    # killed, so a hung page frees the worker instead of holding it forever.
+    # Start failures back off exponentially; after MAX_START_FAILURES in a row
+    # the pool is marked broken and every pending and new request fails fast.
+    def __init__(self, browsers=DEFAULT_BROWSERS, queue_size=DEFAULT_QUEUE_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self.launches = 0
+        self.broken = None  # reason, once the pool has given up
+        self.broken_at = None
+        self._failures = 0
+        self._failures_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"chromium-{i}", daemon=True)
+            for i in range(max(1, browsers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    # --- PUBLIC API ---
+    def submit(self, html, timeout=None):
+        return self._enqueue(_Job(html, timeout or self.timeout))
+
+    def render(self, html, timeout=None):
+        job = _Job(html, timeout or self.timeout)
+        future = self._enqueue(job)
+        try:
+            return future.result(timeout=job.remaining())
+        except FutureTimeoutError:
+            future.cancel()  # Skipped by the worker if it hasn't started yet
+            raise
+
+    def _enqueue(self, job):
+        if self._stopping.is_set():
+            raise RuntimeError("PDF renderer is shut down.")
+        if self.broken:
+            raise RendererUnavailable(self.broken)
+        try:
+            # Bounded queue: wait for a slot within the job's deadline, then push back on the caller
+            self._queue.put(job, timeout=job.remaining())
+        except queue.Full:
+            raise RendererBusy("PDF render queue is full.")
+        return job.future
+
+    def shutdown(self):
+        self._stopping.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    # --- WORKER ---
+    def _worker(self):
+        while not self._stopping.is_set() and not self.broken:
+            try:
+                from playwright.sync_api import sync_playwright
+                with sync_playwright() as p:
+                    self._serve(p)
+            except Exception as e:
+                if self._start_failed(e):
+                    return
+
+    def _launch(self, p):
+        self.launches += 1
+        chromium = _Chromium(p.chromium.executable_path)
+        try:
+            browser = p.chromium.connect_over_cdp(chromium.endpoint())
+        except Exception:
+            chromium.close()
+            raise
+        with self._failures_lock:
+            self._failures = 0
+        return browser, chromium
+
+    def _start_failed(self, e):
+        # Backs off before the next start attempt; True once the pool gives up
+        with self._failures_lock:
+            self._failures += 1
+            failures = self._failures
+            if failures >= MAX_START_FAILURES and not self.broken:
+                self.broken = f"PDF renderer unavailable after {failures} failed starts: {e}"
+                self.broken_at = time.monotonic()
+        if self.broken:
+            log.error("%s", self.broken)
+            self._fail_pending()
+            for _ in self._threads:  # wake idle workers so they exit too
+                try:
+                    self._queue.put_nowait(None)
+                except queue.Full:
+                    break
+            return True
+        log.warning("PDF renderer start failed (%d/%d): %s", failures, MAX_START_FAILURES, e)
+        self._stopping.wait(min(RESTART_BACKOFF_MAX, 2.0 ** (failures - 1)))
+        return self._stopping.is_set()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None and job.future.set_running_or_notify_cancel():
+                job.future.set_exception(RendererUnavailable(self.broken))
+
+    def _serve(self, p):
+        browser = chromium = None
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    return
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                if browser is None or not browser.is_connected():
+                    if chromium is not None:
+                        chromium.close()
+                    browser = chromium = None
+                    try:
+                        browser, chromium = self._launch(p)
+                    except Exception as e:
+                        job.future.set_exception(e)
+                        if self._start_failed(e):
+                            return
+                        continue
+                watchdog = threading.Timer(job.remaining() + KILL_GRACE, chromium.kill)
+                watchdog.daemon = True
+                watchdog.start()
+                try:
+                    job.future.set_result(self._render(browser, job))
+                except Exception as e:
+                    if chromium.killed:
+                        e = FutureTimeoutError(f"PDF render hung past its deadline; browser killed: {e}")
+                    job.future.set_exception(e)
+                finally:
+                    watchdog.cancel()
+                # Crash or watchdog kill: drop the browser so the next job relaunches it
+                if chromium.killed or not browser.is_connected():
+                    chromium.close()
+                    browser = chromium = None
+        finally:
+            if chromium is not None:
+                if browser.is_connected():
+                    browser.close()
+                chromium.close()
+
+    def _render(self, browser, job):
+        # connect_over_cdp() browsers start with a default context; each job
+        # still gets its own, so cookies and storage never carry over
+        context = browser.new_context()
+        try:
+            page = context.new_page()
+            page.set_default_timeout(max(1.0, job.remaining()) * 1000)
+            page.set_content(job.html)
+            body_height = page.evaluate("document.body.scrollHeight")
+            final_height = body_height + 100
+            return page.pdf(
+                width=PAGE_WIDTH,
+                height=f"{final_height}px",
+                print_background=True,
+                margin=PAGE_MARGIN
+            )
+        finally:
+            context.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_renderer():
+    # One pool per process, created on first PDF request
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.broken and time.monotonic() - _pool.broken_at > BROKEN_RETRY_SECONDS:
+            _pool.shutdown()
+            _pool = None
+        if _pool is None:
+            ensure_playwright_browser()
+            _pool = ChromiumPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def render_pdf(html_content, timeout=None):
+    try:
+        return get_pdf_renderer().render(html_content, timeout=timeout)
+    except FutureTimeoutError:
+        log.warning("PDF render timed out.")
+    except Exception as e:
+        log.error("PDF rendering failed: %s", e)
+    return None
@@ -0,0 +1,56 @@
+import numpy as np
+
+# --- PEER RANKING INDEX ---
+# One sorted array per metric over every school in the dataset. A school's
+# rank and percentile are two binary searches, so reports stay O(log n) in
+# the number of schools. Lower values mean less stress, so rank 1 is the
+# calmest school.
+RANKED_METRICS = {
+    'mean_score': "Mean stress score",
+    'high_severe_pct': "High + severe stress share",
+    'anxiety_pct': "Exam anxiety rate",
+}
+MIN_PEERS = 2  # below this a ranking says nothing
+
+
+class RankIndex:
+    def __init__(self, sorted_values):
+        self.sorted = sorted_values
+        self.n = len(next(iter(sorted_values.values()))) if sorted_values else 0
+
+    @classmethod
+    def from_frame(cls, frame):
+        # frame: one row per school with the RANKED_METRICS columns
+        return cls({m: np.sort(frame[m].to_numpy(dtype=float)) for m in RANKED_METRICS})
+
+    def position(self, metric, value):
+        # (rank, percentile) of a value: rank counts schools strictly lower,
+        # percentile is the midpoint percentile rank (ties count half)
+        values = self.sorted[metric]
+        below = int(np.searchsorted(values, value, side='left'))
+        equal = int(np.searchsorted(values, value, side='right')) - below
+        return below + 1, round((below + 0.5 * equal) / self.n * 100, 1)
+
+    def describe(self, row):
+        # Fields merged into a school's stats row
+        out = {'peer_schools': self.n}
+        for metric in RANKED_METRICS:
+            if self.n >= MIN_PEERS:
+                out[f'{metric}_rank'], out[f'{metric}_percentile'] = self.position(metric, row[metric])
+            else:
+                out[f'{metric}_rank'] = out[f'{metric}_percentile'] = None
+        return out
+
+    def updated(self, old_rows, new_rows):
+        # New index after some schools' rows changed (old_rows: {school: row}
+        # for schools that existed before, new_rows: {school: row} after).
+        # Each change is a remove + insert into the sorted arrays.
+        sorted_values = {}
+        for metric, values in self.sorted.items():
+            values = values.copy()
+            for row in old_rows.values():
+                values = np.delete(values, np.searchsorted(values, row[metric], side='left'))
+            for row in new_rows.values():
+                values = np.insert(values, np.searchsorted(values, row[metric]), row[metric])
+            sorted_values[metric] = values
+        return RankIndex(sorted_values)
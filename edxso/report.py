@@ -0,0 +1,545 @@
+import hashlib
+from html import escape
+
+from edxso import artifact_cache
+from edxso.artifact_cache import artifact_key, get_artifact_cache
+from edxso.charts import CHART_FORMAT, create_monogram_fallback, create_stress_chart
+from edxso.insights import benchmark_source, generate_insights_with_gemini
+from edxso.logo import DISPLAY_HEIGHT, LOGO_REVISION, logo_asset
+from edxso.pdf_renderer import render_pdf
+from edxso.ranking import RANKED_METRICS
+from edxso.report_assets import image_url, report_styles
+from edxso.stats import compute_school_stats
+from edxso.telemetry import span
+from edxso.template import CompiledTemplate
+
+# --- HTML TEMPLATE ---
+HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Student Well-Being Survey Report - [SCHOOL_NAME]</title>
+    [REPORT_ASSETS]
+    <style>
+        body { font-family: 'Inter', sans-serif; background-color: #f9fafb; color: #1e293b; -webkit-print-color-adjust: exact; }
+        .report-section { background: #ffffff; margin-bottom: 3rem; overflow: hidden; border: 1px solid #f1f5f9; border-radius: 1.5rem; }
+        .text-navy { color: #0c4a6e; }
+        .hero-gradient { background: linear-gradient(135deg, #0c4a6e 0%, #075985 100%); }
+        .chart-bar-bg { background-color: #f1f5f9; border-radius: 9999px; height: 1.5rem; width: 100%; overflow: hidden; position: relative; }
+        .chart-bar-fill { height: 100%; border-radius: 9999px; }
+        .item-heatmap { width: 100%; border-collapse: separate; border-spacing: 3px; font-size: 0.75rem; }
+        .item-heatmap th { color: #64748b; font-weight: 600; text-transform: uppercase; letter-spacing: 0.05em; padding: 0.25rem; text-align: center; }
+        .item-heatmap td { padding: 0.4rem 0.25rem; text-align: center; border-radius: 0.25rem; }
+        .item-heatmap td.item-text { text-align: left; color: #334155; }
+        .item-heatmap tr { break-inside: avoid; }
+    </style>
+</head>
+<body class="p-8">
+    <!-- The logo is embedded once here and drawn by the <use> references below -->
+    <svg width="0" height="0" style="position: absolute;" aria-hidden="true"><defs><image id="school-logo" href="[SCHOOL_LOGO_URL]" width="[LOGO_WIDTH]" height="[LOGO_HEIGHT]"/></defs></svg>
+    <div class="max-w-5xl mx-auto">
+        <header class="report-section hero-gradient text-white p-12 flex flex-col items-center text-center border-none">
+            <div class="mb-10 bg-white p-4 rounded-xl shadow-lg">
+                <svg role="img" aria-label="School Logo" width="[LOGO_HEADER_WIDTH]" height="96" viewBox="0 0 [LOGO_WIDTH] [LOGO_HEIGHT]"><use href="#school-logo"/></svg>
+            </div>
+            <p class="text-xl uppercase tracking-widest text-blue-200 font-semibold mb-2">[SCHOOL_NAME]</p>
+            <h1 class="text-5xl font-extrabold mb-6 leading-tight">Student Exam Stress Manometer</h1>
+            <div class="w-24 h-1 bg-blue-400 mb-8"></div>
+            
+            <div class="space-y-3 text-blue-100">
+                <p class="text-xl font-medium">SURVEY REPORT</p>
+                <p>Published 2026</p>
+                
+                <div class="flex items-center justify-center gap-2 text-lg font-medium mt-4">
+                    <p>- By</p>
+                    <p>EDXSO Research Team (New Delhi)</p>
+                </div>
+                
+                <p class="opacity-80 pt-2">www.edxso.com</p>
+            </div>
+        </header>
+
+        <section id="overview" class="report-section p-10 md:p-12">
+            <div class="flex flex-col md:flex-row gap-12">
+                <div class="md:w-1/3">
+                    [OVERVIEW_IMAGE]
+                    <h2 class="text-2xl font-bold text-navy mb-4 uppercase">Survey Overview</h2>
+                    <p class="text-gray-600 leading-relaxed">Structured snapshot outlining scale, mode, and analytical logic used to capture student perspectives.</p>
+                </div>
+                <div class="md:w-2/3 space-y-2">
+                    <div class="flex items-center p-5 border-b border-gray-100">
+                        <div class="w-40 font-bold text-navy uppercase text-xs tracking-wider">Survey Name:</div>
+                        <div class="text-gray-700">Student Well-Being & Assessment Experience Survey</div>
+                    </div>
+                    <div class="flex items-center p-5 border-b border-gray-100">
+                        <div class="w-40 font-bold text-navy uppercase text-xs tracking-wider">Participants:</div>
+                        <div class="text-gray-700">[COUNT] Students</div>
+                    </div>
+                    <div class="flex items-center p-5 border-b border-gray-100">
+                        <div class="w-40 font-bold text-navy uppercase text-xs tracking-wider">Mode:</div>
+                        <div class="text-gray-700">[MODE]</div>
+                    </div>
+                    <div class="flex items-center p-5 border-b border-gray-100">
+                        <div class="w-40 font-bold text-navy uppercase text-xs tracking-wider">Nature:</div>
+                        <div class="text-gray-700">Anonymous, self-reported</div>
+                    </div>
+                    <div class="flex items-center p-5 border-b border-gray-100">
+                        <div class="w-40 font-bold text-navy uppercase text-xs tracking-wider">Focus:</div>
+                        <div class="text-gray-700">Emotional impact of assessments</div>
+                    </div>
+                </div>
+            </div>
+        </section>
+
+        <section class="grid grid-cols-1 md:grid-cols-2 gap-12 mb-16">
+            <div class="p-10 border border-slate-100 rounded-2xl bg-white">
+                <h2 class="text-2xl font-bold text-navy mb-8 uppercase tracking-widest flex items-center gap-2">Objectives</h2>
+                <ul class="space-y-6">
+                    <li class="flex gap-4"><span class="text-blue-600 font-bold text-xl">01</span><p class="text-gray-700">Collect evidence on emotional responses to tests.</p></li>
+                    <li class="flex gap-4"><span class="text-blue-600 font-bold text-xl">02</span><p class="text-gray-700">Analyze stress associated with performance expectations.</p></li>
+                    <li class="flex gap-4"><span class="text-blue-600 font-bold text-xl">03</span><p class="text-gray-700">Classify students into defined stress categories.</p></li>
+                </ul>
+            </div>
+            <div class="p-0">
+                [METHODOLOGY_IMAGE]
+                <h2 class="text-2xl font-bold text-navy mb-4 uppercase">Design & Methodology</h2>
+                <p class="text-gray-600 mb-6">20 structured statements on a 5-point scale from <span class="font-semibold">Never</span> to <span class="font-semibold">Always</span>.</p>
+            </div>
+        </section>
+
+        <section id="scoring" class="report-section p-10 md:p-12">
+            <div class="mb-12">
+                <h2 class="text-4xl font-extrabold text-navy tracking-tight mb-2 uppercase">Scoring Framework</h2>
+                <div class="h-1 w-20 bg-blue-600"></div>
+            </div>
+            <div class="space-y-1">
+                 [INSERT_FULL_SCORING_TABLE_FROM_USER_PROMPT]
+            </div>
+            <div class="mt-12 p-6 bg-slate-50 rounded-xl text-gray-500 text-sm">
+                <p>Note: Participation was anonymous. Scoring logic was applied strictly without subjective interpretation.</p>
+            </div>
+        </section>
+
+        <section id="executive-summary" class="report-section">
+            <div class="p-10 md:p-12">
+                <div class="flex items-center gap-3 mb-8 border-b border-gray-50 pb-6">
+                    <span class="p-2 bg-blue-50 rounded-lg">
+                        <svg class="w-6 h-6 text-blue-700" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z"></path></svg>
+                    </span>
+                    <h2 class="text-3xl font-bold text-navy uppercase tracking-tight">Executive Summary</h2>
+                    <span class="ml-auto px-4 py-1 bg-blue-50 text-blue-700 rounded-full text-sm font-bold tracking-widest uppercase border border-blue-100">
+                        Profile: [RISK_BAND_LABEL]
+                    </span>
+                </div>
+                
+                <div class="bg-white p-8 rounded-2xl border border-slate-100 shadow-sm text-gray-700 leading-relaxed text-lg space-y-6">
+                    <p>[EXEC_SUMMARY_PARAGRAPH_1]</p>
+                    <p>[EXEC_SUMMARY_PARAGRAPH_2]</p>
+                    <p>[EXEC_SUMMARY_PARAGRAPH_3]</p>
+                </div>
+            </div>
+        </section>
+
+        <section id="results" class="report-section p-10 md:p-12">
+            <div class="mb-12 text-center">
+                <h2 class="text-3xl font-bold text-navy mb-2 uppercase tracking-tighter">Student Well-Being</h2>
+                <p class="text-xl text-gray-400">Stress Category Distribution</p>
+            </div>
+            <div class="mb-16 flex justify-center">
+                <img src="[DYNAMIC_CHART_IMAGE]" alt="Stress Distribution Chart" class="w-full max-w-4xl rounded-xl shadow-sm">
+            </div>
+            <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-12">
+                <div class="pb-6 border-b-2 border-green-500">
+                    <div class="flex justify-between items-baseline mb-2">
+                        <h3 class="font-bold text-gray-900 uppercase text-sm tracking-widest">Emotionally Balanced</h3>
+                        <span class="text-3xl font-black text-green-600">[VAL_BALANCED]</span>
+                    </div>
+                    <p class="text-sm text-gray-500">[PCT_BALANCED]% — Stable emotional states.</p>
+                </div>
+                <div class="pb-6 border-b-2 border-blue-500">
+                    <div class="flex justify-between items-baseline mb-2">
+                        <h3 class="font-bold text-gray-900 uppercase text-sm tracking-widest">Mildly Stressed</h3>
+                        <span class="text-3xl font-black text-blue-600">[VAL_MILD]</span>
+                    </div>
+                    <p class="text-sm text-gray-500">[PCT_MILD]% — Minor stress levels.</p>
+                </div>
+                <div class="pb-6 border-b-2 border-yellow-500">
+                    <div class="flex justify-between items-baseline mb-2">
+                        <h3 class="font-bold text-gray-900 uppercase text-sm tracking-widest">Moderately Stressed</h3>
+                        <span class="text-3xl font-black text-yellow-600">[VAL_MOD]</span>
+                    </div>
+                    <p class="text-sm text-gray-500">[PCT_MOD]% — Significant challenges.</p>
+                </div>
+                <div class="pb-6 border-b-2 border-orange-500">
+                    <div class="flex justify-between items-baseline mb-2">
+                        <h3 class="font-bold text-gray-900 uppercase text-sm tracking-widest">Highly Stressed</h3>
+                        <span class="text-3xl font-black text-orange-600">[VAL_HIGH]</span>
+                    </div>
+                    <p class="text-sm text-gray-500">[PCT_HIGH]% — Intense experiences.</p>
+                </div>
+                <div class="pb-6 border-b-2 border-red-500">
+                    <div class="flex justify-between items-baseline mb-2">
+                        <h3 class="font-bold text-gray-900 uppercase text-sm tracking-widest">Severely Stressed</h3>
+                        <span class="text-3xl font-black text-red-600">[VAL_SEVERE]</span>
+                    </div>
+                    <p class="text-sm text-gray-500">[PCT_SEVERE]% — Extreme stress levels.</p>
+                </div>
+                <div class="pb-6 border-b-2 border-gray-900">
+                    <div class="flex justify-between items-baseline mb-2">
+                        <h3 class="font-bold text-gray-900 uppercase text-sm tracking-widest">Total Surveyed</h3>
+                        <span class="text-3xl font-black text-gray-900">[VAL_TOTAL]</span>
+                    </div>
+                    <p class="text-sm text-gray-500">100% Valid Responses.</p>
+                </div>
+            </div>
+        </section>
+
+        [ITEM_HEATMAP]
+
+        <section id="national-benchmark" class="report-section p-10 md:p-12">
+            <div class="mb-10">
+                <h2 class="text-3xl font-bold text-navy mb-4 uppercase tracking-tighter">National Benchmark Comparison: <span class="text-blue-600">Student Stress Levels (India)</span></h2>
+                <div class="h-1 w-24 bg-blue-600 mb-6"></div>
+                <p class="text-gray-600 leading-relaxed text-lg">
+                    To contextualize findings, student responses were compared against [BENCHMARK_SOURCE].
+                </p>
+            </div>
+            <div class="mb-16">
+                <h3 class="text-2xl font-bold text-navy mb-6 text-center">Stress Category Distribution: School vs. National Benchmark</h3>
+                <div class="space-y-8 max-w-3xl mx-auto">
+                    <div>
+                        <div class="flex justify-between mb-2 text-sm font-bold uppercase tracking-widest text-gray-500">
+                            <span>[SCHOOL_NAME]</span>
+                            <span>Valid N=[VAL_TOTAL]</span>
+                        </div>
+                        <div class="flex h-12 w-full rounded-xl overflow-hidden shadow-inner">
+                            <div class="bg-green-500" style="width: [PCT_BALANCED]%;" title="Balanced"></div>
+                            <div class="bg-blue-500" style="width: [PCT_MILD]%;" title="Mild"></div>
+                            <div class="bg-yellow-500" style="width: [PCT_MOD]%;" title="Moderate"></div>
+                            <div class="bg-orange-500" style="width: [PCT_HIGH]%;" title="High"></div>
+                            <div class="bg-red-500" style="width: [PCT_SEVERE]%;" title="Severe"></div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+
+            <div class="mb-12">
+                <h3 class="text-2xl font-bold text-navy mb-10 text-center">Key Stress Indicator Comparison</h3>
+                <div class="grid grid-cols-1 gap-8">
+                    <div>
+                        <div class="flex justify-between text-sm font-bold text-gray-600 mb-2">
+                            <span>Exam Anxiety (Frequent Nervousness)</span>
+                            <div class="flex gap-4">
+                                <span class="text-blue-600">School: [PCT_ANXIETY]%</span>
+                                <span class="text-gray-400">National: [BENCH_ANXIETY]%</span>
+                            </div>
+                        </div>
+                        <div class="chart-bar-bg">
+                            <div class="chart-bar-fill bg-blue-600" style="width: [PCT_ANXIETY]%;"></div>
+                            <div class="absolute top-0 bottom-0 w-1 bg-red-400 border-x border-white" style="left: [BENCH_ANXIETY]%;"></div>
+                        </div>
+                    </div>
+                    <div>
+                        <div class="flex justify-between text-sm font-bold text-gray-600 mb-2">
+                            <span>Parental Performance Pressure</span>
+                            <div class="flex gap-4">
+                                <span class="text-blue-600">School: [PCT_PARENT_PRESSURE]%</span>
+                                <span class="text-gray-400">National: [BENCH_PARENT_PRESSURE]%</span>
+                            </div>
+                        </div>
+                        <div class="chart-bar-bg">
+                            <div class="chart-bar-fill bg-blue-600" style="width: [PCT_PARENT_PRESSURE]%;"></div>
+                            <div class="absolute top-0 bottom-0 w-1 bg-red-400 border-x border-white" style="left: [BENCH_PARENT_PRESSURE]%;"></div>
+                        </div>
+                    </div>
+                    <div>
+                        <div class="flex justify-between text-sm font-bold text-gray-600 mb-2">
+                            <span>Support Accessibility (Can talk to teachers/counselors)</span>
+                            <div class="flex gap-4">
+                                <span class="text-blue-600">School: [PCT_SUPPORT]%</span>
+                                <span class="text-gray-400">National: [BENCH_SUPPORT]%</span>
+                            </div>
+                        </div>
+                        <div class="chart-bar-bg">
+                            <div class="chart-bar-fill bg-green-500" style="width: [PCT_SUPPORT]%;"></div>
+                            <div class="absolute top-0 bottom-0 w-1 bg-red-400 border-x border-white" style="left: [BENCH_SUPPORT]%;"></div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+            [PEER_RANKING]
+        </section>
+
+        <section id="next-steps" class="report-section p-10 md:p-12 border-t border-slate-100">
+            <h2 class="text-3xl font-bold text-navy mb-6 uppercase tracking-tighter">Next Step</h2>
+            <div class="p-8 bg-blue-50/40 rounded-2xl border border-blue-100">
+                <p class="text-gray-700 leading-relaxed text-lg mb-4">
+                    The data highlights both strengths and opportunities. A focused well-being strategy can meaningfully reduce moderate-to-severe stress levels.
+                </p>
+                <p class="font-semibold text-navy text-lg">
+                    We welcome a leadership discussion to translate these insights into structured, measurable student support initiatives.
+                </p>
+            </div>
+        </section>
+
+        <footer class="text-center p-12 text-gray-400 text-xs mt-12">
+            <div class="flex justify-center mb-8">
+                <svg role="img" aria-label="Logo Small" width="[LOGO_FOOTER_WIDTH]" height="32" viewBox="0 0 [LOGO_WIDTH] [LOGO_HEIGHT]" class="grayscale opacity-30"><use href="#school-logo"/></svg>
+            </div>
+            <p class="uppercase tracking-widest mb-2 font-bold">
+                &copy; 2026 EDXSO Survey Reports
+            </p>
+            <p>[SCHOOL_NAME] — Student Assessment Experience</p><br><br>
+            <p class="mb-2"><b>Confidentiality & Ownership Notice:</b>
+            This report is confidential and jointly owned by EDXSO and [SCHOOL_NAME]. 
+            All rights are reserved. Any unauthorized use, reproduction, or distribution, 
+            in whole or in part, without written consent from both parties is strictly 
+            prohibited.</p>
+        </footer>
+
+    </div>
+</body>
+</html>
+"""
+
+SCORING_TABLE_HTML = """
+        <div class="grid grid-cols-5 gap-2 text-center text-xs font-medium text-gray-500">
+            <div class="bg-green-100 p-2 rounded">20-39<br>Balanced</div>
+            <div class="bg-blue-100 p-2 rounded">40-54<br>Mild</div>
+            <div class="bg-yellow-100 p-2 rounded">55-69<br>Moderate</div>
+            <div class="bg-orange-100 p-2 rounded">70-84<br>High</div>
+            <div class="bg-red-100 p-2 rounded">85-100<br>Severe</div>
+        </div>
+        """
+
+def image_tag(name, alt, css_class):
+    return f'<img src="{image_url(name)}" alt="{alt}" class="{css_class}">'
+
+
+# Static content (scoring table, CSS, fonts, images) is inlined once at import,
+# so every report is self-contained
+HTML_TEMPLATE = (
+    HTML_TEMPLATE
+    .replace("[INSERT_FULL_SCORING_TABLE_FROM_USER_PROMPT]", SCORING_TABLE_HTML)
+    .replace("[REPORT_ASSETS]", report_styles())
+    .replace("[OVERVIEW_IMAGE]", image_tag("overview.png", "Overview Icon", "rounded-xl mb-6 w-full object-cover"))
+    .replace("[METHODOLOGY_IMAGE]", image_tag("methodology.png", "Methodology", "rounded-2xl mb-6 w-full"))
+)
+
+# Tokenized once; free text (school name, AI paragraphs) is HTML-escaped on render
+REPORT_TEMPLATE = CompiledTemplate(HTML_TEMPLATE, escaped={
+    "[SCHOOL_NAME]",
+    "[RISK_BAND_LABEL]",
+    "[EXEC_SUMMARY_PARAGRAPH_1]",
+    "[EXEC_SUMMARY_PARAGRAPH_2]",
+    "[EXEC_SUMMARY_PARAGRAPH_3]",
+})
+
+# Part of every cached artifact's key. Template and asset edits change it on
+# their own; bump RENDER_REVISION when chart/logo/render code changes output.
+RENDER_REVISION = 1
+NATIVE_REVISION = 4  # edxso.native_pdf drawing
+TEMPLATE_VERSION = hashlib.sha256(f"{RENDER_REVISION}:{NATIVE_REVISION}:{LOGO_REVISION}:{CHART_FORMAT}:{HTML_TEMPLATE}".encode("utf-8")).hexdigest()[:16]
+FOOTER_LOGO_HEIGHT = 32
+
+# Output formats: Chromium-rendered HTML or PDF, or the browserless vector
+# PDF drawn by edxso.native_pdf
+OUTPUT_EXTENSIONS = {"HTML": "html", "PDF": "pdf", "NATIVE": "pdf"}
+
+# --- HELPER FUNCTIONS ---
+
+def safe_generate_pdf(html_content):
+    # Rendered in-memory by the warm Chromium pool; None on failure or timeout
+    return render_pdf(html_content)
+
+# --- MAIN LOGIC ---
+def process_single_school(dataset, school_name):
+    # Scoring already happened once for the whole upload (see load_scored_dataset)
+    with span("select_school") as s:
+        sdf = dataset.school_frame(school_name)
+        total = len(sdf)
+        s.attrs["rows"] = total
+    if total == 0:
+        raise ValueError("No data found for this school.")
+    return sdf, total
+
+def generate_final_report(sdf, total, api_key, school_name, logo_file, output_format, cols, ai_content=None, force_refresh=False, stats=None):
+    # stats: the school's row from dataset.school_stats(); computed here if not given
+    with span("report", format=output_format) as report_span:
+        if stats is None:
+            with span("stats"):
+                stats = compute_school_stats(sdf, total, cols)
+        if ai_content is None:
+            ai_content = generate_insights_with_gemini(api_key, stats, school_name, force_refresh=force_refresh)
+
+        # Same rows, logo, insight text, template and format -> same file,
+        # served from disk without charting, templating or Chromium
+        key = None
+        if artifact_cache.ENABLED:
+            with span("artifact_cache") as s:
+                logo_bytes = logo_file.getvalue() if logo_file else None
+                key = artifact_key(sdf, stats, school_name, logo_bytes, ai_content, TEMPLATE_VERSION, output_format)
+                cached = get_artifact_cache().get(key)
+                s.hit(cached is not None)
+                s.produced(cached)
+            if cached is not None:
+                report_span.produced(cached)
+                return cached
+
+        if output_format == "NATIVE":
+            # Drawn straight from the stats: no chart image, template or browser
+            from edxso.native_pdf import render_native_pdf
+            with span("native_pdf") as s:
+                logo = logo_asset(logo_file.getvalue(), getattr(logo_file, "name", None)) if logo_file else None
+                file_data = render_native_pdf(stats, school_name, logo, ai_content)
+                s.produced(file_data)
+        else:
+            with span("chart") as s:
+                chart_base64 = create_stress_chart(stats)
+                s.produced(chart_base64)
+
+            with span("logo") as s:
+                if logo_file:
+                    logo = logo_asset(logo_file.getvalue(), getattr(logo_file, "name", None))
+                    logo_url, logo_size = logo.url, (logo.width, logo.height)
+                else:
+                    logo_url, logo_size = create_monogram_fallback(school_name), (1, 1)
+                s.produced(logo_url)
+
+            with span("template_fill") as s:
+                html = render_report_html(stats, school_name, logo_url, chart_base64, ai_content, logo_size)
+                s.produced(html)
+
+            if output_format == "PDF":
+                with span("pdf") as s:
+                    file_data = safe_generate_pdf(html)
+                    s.produced(file_data)
+            else:
+                file_data = html.encode('utf-8')
+        if file_data and key is not None:
+            get_artifact_cache().put(key, school_name, output_format, file_data)
+        report_span.produced(file_data)
+        return file_data
+
+def ordinal(n):
+    n = int(round(n))
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+def peer_ranking_html(stats, school_name):
+    # "Where we rank" cards from the dataset's percentile index; omitted when
+    # the report has no peer schools to compare against
+    if stats.get('mean_score_percentile') is None:
+        return ""
+    cards = []
+    for metric, label in RANKED_METRICS.items():
+        value = f"{stats[metric]}" if metric == 'mean_score' else f"{stats[metric]}%"
+        cards.append(
+            '<div class="bg-slate-50 rounded-xl p-6 text-center">'
+            f'<p class="text-xs uppercase tracking-widest text-gray-500 mb-2">{label}</p>'
+            f'<p class="text-4xl font-extrabold text-navy">{value}</p>'
+            f'<p class="text-sm text-gray-600 mt-2">{ordinal(stats[f"{metric}_percentile"])} percentile '
+            f'&middot; rank {stats[f"{metric}_rank"]} of {stats["peer_schools"]}</p>'
+            '</div>'
+        )
+    return (
+        '<div class="mt-12">'
+        f'<h3 class="text-2xl font-bold text-navy mb-6 text-center">Where {escape(str(school_name))} Stands Among '
+        f'{stats["peer_schools"]:,} Surveyed Schools</h3>'
+        f'<div class="grid grid-cols-3 gap-6">{"".join(cards)}</div>'
+        '<p class="text-xs text-gray-400 mt-4 text-center">Rank 1 is the lowest-stress school. The percentile is the share '
+        'of schools with a lower value (ties count half), so a lower percentile means less stress than peers.</p>'
+        '</div>'
+    )
+
+def heat_alpha(pct):
+    # Heatmap shade for a response share: clear at 0%, strongest from 54%
+    return min(0.9, pct / 60)
+
+def heat_color(pct):
+    # (background, text) CSS colors for a heatmap cell
+    alpha = heat_alpha(pct)
+    return f"rgba(37, 99, 235, {alpha:.2f})", ("#ffffff" if alpha > 0.45 else "#334155")
+
+def item_heatmap_html(stats):
+    # Never..Always and No answer shares for each of the 20 statements,
+    # sliced from the dataset's item cube; omitted when the report has no
+    # dataset behind it
+    rows = stats.get('items')
+    if not rows:
+        return ""
+    body = []
+    for n, row in enumerate(rows, start=1):
+        cells = []
+        for pct in row['pct']:
+            bg, fg = heat_color(pct)
+            cells.append(f'<td style="background-color: {bg}; color: {fg};">{pct}%</td>')
+        cells.append(f'<td class="text-gray-400">{row["blank"]}%</td>')
+        mark = "&dagger;" if row['reverse'] else ""
+        body.append(
+            f'<tr><td class="item-text">{n}. {escape(row["item"])}{mark}</td>{"".join(cells)}'
+            f'<td class="font-bold text-navy">{row["top_box"]}%</td>'
+            f'<td class="text-gray-400">{row["bench_top_box"]}%</td></tr>'
+        )
+    head = "".join(f"<th>{label}</th>" for label in ("Never", "Rarely", "Sometimes", "Often", "Always", "No answer"))
+    return (
+        '<section id="item-profile" class="report-section p-10 md:p-12">'
+        '<div class="mb-8">'
+        '<h2 class="text-3xl font-bold text-navy mb-4 uppercase tracking-tighter">Item-Level Response Profile</h2>'
+        '<div class="h-1 w-24 bg-blue-600 mb-6"></div>'
+        '<p class="text-gray-600 leading-relaxed">How often students gave each answer to the 20 survey statements. '
+        'Darker cells mark more common answers; blank or unrecognized answers are shown as No answer. '
+        'The last two columns compare the share answering Often or Always with the national figure.</p>'
+        '</div>'
+        f'<table class="item-heatmap"><thead><tr><th style="text-align: left;">Statement</th>{head}'
+        '<th>Often + Always</th><th>National</th></tr></thead>'
+        f'<tbody>{"".join(body)}</tbody></table>'
+        '<p class="text-xs text-gray-400 mt-4">&dagger; Positively worded statement, scored in reverse: '
+        'frequent answers here indicate less stress.</p>'
+        '</section>'
+    )
+
+def render_report_html(stats, school_name, logo_url, chart_base64, ai_content, logo_size=(1, 1)):
+    # logo_size only sets the aspect ratio of the two places the logo is drawn
+    logo_w, logo_h = logo_size
+    replacements = {
+        "[SCHOOL_NAME]": str(school_name),
+        "[SCHOOL_LOGO_URL]": logo_url,
+        "[LOGO_WIDTH]": str(logo_w),
+        "[LOGO_HEIGHT]": str(logo_h),
+        "[LOGO_HEADER_WIDTH]": str(max(1, round(DISPLAY_HEIGHT * logo_w / logo_h))),
+        "[LOGO_FOOTER_WIDTH]": str(max(1, round(FOOTER_LOGO_HEIGHT * logo_w / logo_h))),
+        "[DYNAMIC_CHART_IMAGE]": chart_base64,
+        "[MODE]": "Online Survey",
+        "[COUNT]": str(stats['count']),
+        # --- NEW PARAGRAPH REPLACEMENTS ---
+        "[RISK_BAND_LABEL]": ai_content.get("risk_band_label", "Ecosystem Profile"),
+        "[EXEC_SUMMARY_PARAGRAPH_1]": ai_content.get("p1", ""),
+        "[EXEC_SUMMARY_PARAGRAPH_2]": ai_content.get("p2", ""),
+        "[EXEC_SUMMARY_PARAGRAPH_3]": ai_content.get("p3", ""),
+        # --------------------------------------
+        "[VAL_BALANCED]": str(stats['balanced']),
+        "[PCT_BALANCED]": str(stats['pct_balanced']),
+        "[VAL_MILD]": str(stats['mild']),
+        "[PCT_MILD]": str(stats['pct_mild']),
+        "[VAL_MOD]": str(stats['moderate']),
+        "[PCT_MOD]": str(stats['pct_moderate']),
+        "[VAL_HIGH]": str(stats['high']),
+        "[PCT_HIGH]": str(stats['pct_high']),
+        "[VAL_SEVERE]": str(stats['severe']),
+        "[PCT_SEVERE]": str(stats['pct_severe']),
+        "[VAL_TOTAL]": str(stats['count']),
+        "[PCT_ANXIETY]": str(stats['anxiety_pct']),
+        "[PCT_PARENT_PRESSURE]": str(stats['parent_pressure_pct']),
+        "[PCT_SUPPORT]": str(stats['support_pct']),
+        "[BENCH_ANXIETY]": str(stats['bench_anxiety_pct']),
+        "[BENCH_PARENT_PRESSURE]": str(stats['bench_parent_pressure_pct']),
+        "[BENCH_SUPPORT]": str(stats['bench_support_pct']),
+        "[BENCHMARK_SOURCE]": benchmark_source(stats),
+        "[PEER_RANKING]": peer_ranking_html(stats, school_name),
+        "[ITEM_HEATMAP]": item_heatmap_html(stats),
+    }
+
+    return REPORT_TEMPLATE.render(replacements)
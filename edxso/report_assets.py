@@ -0,0 +1,43 @@
+import base64
+import functools
+import os
+
+# --- OFFLINE REPORT ASSETS ---
+# Precompiled Tailwind + subset Inter, inlined so reports render and open
+# without any network (rebuild with scripts/build_report_assets.py).
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+FONT_WEIGHTS = (400, 500, 600, 700)
+
+
+def _data_uri(path, mime):
+    with open(path, "rb") as f:
+        data = base64.b64encode(f.read()).decode("ascii")
+    return f"data:{mime};base64,{data}"
+
+
+def _font_faces():
+    faces = []
+    for weight in FONT_WEIGHTS:
+        path = os.path.join(ASSET_DIR, "fonts", f"Inter-{weight}.woff2")
+        if not os.path.exists(path):
+            continue
+        faces.append(
+            "@font-face{font-family:'Inter';font-style:normal;font-display:block;"
+            f"font-weight:{weight};src:url({_data_uri(path, 'font/woff2')}) format('woff2')}}"
+        )
+    return "".join(faces)
+
+
+@functools.lru_cache(maxsize=None)
+def report_styles():
+    with open(os.path.join(ASSET_DIR, "report.css"), encoding="utf-8") as f:
+        css = f.read()
+    return f"<style>{_font_faces()}{css}</style>"
+
+
+@functools.lru_cache(maxsize=None)
+def image_url(name):
+    # Bundled copy as a data URI; reports never hot-link the hosted originals
+    path = os.path.join(ASSET_DIR, "images", name)
+    mime = "image/png" if name.lower().endswith(".png") else "image/jpeg"
+    return _data_uri(path, mime)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# --- SCORING MATRIX ---
+SCALE_MAP = {'Never': 1, 'Rarely': 2, 'Sometimes': 3, 'Often': 4, 'Always': 5}
+REVERSE_MAP = {'Never': 5, 'Rarely': 4, 'Sometimes': 3, 'Often': 2, 'Always': 1}
+DEFAULT_SCORE = 3  # Blanks, typos and anything off-scale
+
+ITEM_START, REVERSE_START, ITEM_END = 8, 23, 28  # cols[8:23] forward, cols[23:28] reverse-keyed
+MIN_COLUMNS = ITEM_END
+
+CATEGORY_LABELS = ['Balanced', 'Mild', 'Moderate', 'High', 'Severe']
+# Bump when the same answers would score or band differently, so cached
+# scored uploads are rebuilt
+SCORING_VERSION = 1
+CATEGORY_UPPER_BOUNDS = [39, 54, 69, 84]  # inclusive upper edge of each band but the last
+
+
+def normalize_response(val):
+    # Same cleaning the row-wise scorer always used
+    s = str(val).strip().replace('\xa0', ' ')  # Remove weird spaces
+    return s.capitalize()  # Handle casing "always" -> "Always"
+
+
+def item_columns(cols):
+    return list(cols[ITEM_START:ITEM_END])
+
+
+def encode_item(series):
+    # Factorize once, clean only the distinct values, then broadcast back.
+    # Returns the forward 1..5 score per row (DEFAULT_SCORE for blanks/typos).
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    lut = np.empty(len(uniques) + 1, dtype=np.int8)
+    lut[-1] = DEFAULT_SCORE  # code -1 (NaN/None) lands on the last slot
+    for i, val in enumerate(uniques):
+        lut[i] = SCALE_MAP.get(normalize_response(val), DEFAULT_SCORE)
+    return lut[codes]
+
+
+def response_matrix(df, items=None):
+    # (rows x 20) uint8 matrix of forward-keyed answers, one column per item
+    if items is None:
+        items = item_columns(df.columns.tolist())
+    out = np.empty((len(df), len(items)), dtype=np.uint8)
+    for j, col in enumerate(items):
+        out[:, j] = encode_item(df[col])
+    return out
+
+
+def score_matrix(matrix):
+    # Reverse-keyed items are 6 - forward, which maps the default 3 onto itself
+    n_forward = REVERSE_START - ITEM_START
+    forward = matrix[:, :n_forward].sum(axis=1, dtype=np.int64)
+    reverse = (6 * (matrix.shape[1] - n_forward)) - matrix[:, n_forward:].sum(axis=1, dtype=np.int64)
+    return forward + reverse
+
+
+def category_codes(total_score):
+    return np.searchsorted(CATEGORY_UPPER_BOUNDS, np.asarray(total_score), side='left').astype(np.int8)
+
+
+def categorize(total_score):
+    return np.array(CATEGORY_LABELS, dtype=object)[category_codes(total_score)]
+
+
+def score_responses(df, items=None):
+    # Adds 'total_score' and 'category' in place, column-wise over the whole frame
+    matrix = response_matrix(df, items)
+    total = score_matrix(matrix)
+    df['total_score'] = total
+    df['category'] = categorize(total)
+    return df
@@ -0,0 +1,183 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from edxso.ranking import RankIndex
+from edxso.scoring import CATEGORY_LABELS, SCALE_MAP, category_codes
+
+# --- INDICATOR ITEMS ---
+# Column positions in the uploaded file; "Often"/"Always" counts as a yes
+ANXIETY_ITEM, PARENT_PRESSURE_ITEM, SUPPORT_ITEM = 8, 12, 26
+TOP_BOX = frozenset(['Often', 'Always'])
+
+# Published figures (NCERT 2022 and related studies), used when a report has
+# no dataset to pool benchmarks from
+PUBLISHED_BENCHMARKS = {
+    'bench_anxiety_pct': 81,
+    'bench_parent_pressure_pct': 66,
+    'bench_support_pct': 28,
+    'bench_source': 'published',
+    'bench_students': None,
+    'bench_schools': None,
+}
+
+
+def response_levels(series):
+    # 1..5 for Never..Always, 0 for blanks and anything else, under the same
+    # test the per-school stats always used: str(val).capitalize() (no strip,
+    # NaN -> 'nan'). Unlike scoring, padded answers are not recognized.
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    lut = np.zeros(len(uniques) + 1, dtype=np.uint8)
+    for i, val in enumerate(uniques):
+        lut[i] = SCALE_MAP.get(str(val).capitalize(), 0)
+    return lut[codes]
+
+
+def level_matrix(df, items):
+    # (rows x items) uint8 matrix of response_levels, one column per item
+    out = np.empty((len(df), len(items)), dtype=np.uint8)
+    for j, col in enumerate(items):
+        out[:, j] = response_levels(df[col])
+    return out
+
+
+def top_box_flags(series):
+    # astype(str).str.capitalize().isin(['Often', 'Always'])
+    return response_levels(series) >= min(SCALE_MAP[label] for label in TOP_BOX)
+
+
+def _pct(n, total):
+    return round(n / total * 100, 1)
+
+
+def stats_row(counts, total, anxiety, parent_pressure, support, score_sum, benchmarks):
+    balanced, mild, moderate, high, severe = (int(c) for c in counts)
+    stats = {
+        'count': int(total),
+        'balanced': balanced,
+        'mild': mild,
+        'moderate': moderate,
+        'high': high,
+        'severe': severe,
+        'pct_balanced': _pct(balanced, total),
+        'pct_mild': _pct(mild, total),
+        'pct_moderate': _pct(moderate, total),
+        'pct_high': _pct(high, total),
+        'pct_severe': _pct(severe, total),
+        'anxiety_pct': _pct(int(anxiety), total),
+        'parent_pressure_pct': _pct(int(parent_pressure), total),
+        'support_pct': _pct(int(support), total),
+        'mean_score': round(int(score_sum) / total, 1),
+        'high_severe_pct': _pct(high + severe, total),
+    }
+    stats.update(benchmarks)
+    return stats
+
+
+# Additive per-school counts; summing them across response waves gives the
+# same table as one pass over every row
+COUNT_COLUMNS = [label.lower() for label in CATEGORY_LABELS] + ['anxiety', 'parent_pressure', 'support', 'score_sum']
+
+
+def school_counts(df, columns):
+    # One grouped pass: category counts and top-box counts per school
+    school_codes, schools = pd.factorize(df['sname'], use_na_sentinel=True)
+    valid = school_codes >= 0
+    codes = school_codes[valid]
+    n_schools = len(schools)
+
+    cats = category_codes(df['total_score'].to_numpy())[valid]
+    n_cats = len(CATEGORY_LABELS)
+    counts = np.bincount(codes * n_cats + cats, minlength=n_schools * n_cats).reshape(n_schools, n_cats)
+    out = pd.DataFrame(counts, index=pd.Index(list(schools), name='sname'), columns=COUNT_COLUMNS[:n_cats])
+    for name, item in (('anxiety', ANXIETY_ITEM), ('parent_pressure', PARENT_PRESSURE_ITEM), ('support', SUPPORT_ITEM)):
+        flags = top_box_flags(df[columns[item]])[valid]
+        out[name] = np.bincount(codes, weights=flags, minlength=n_schools).astype(np.int64)
+    scores = df['total_score'].to_numpy()[valid]
+    out['score_sum'] = np.bincount(codes, weights=scores, minlength=n_schools).astype(np.int64)
+    return out
+
+
+def add_counts(counts, delta):
+    # Existing schools keep their order; new ones are appended in arrival order
+    index = counts.index.append(delta.index.difference(counts.index, sort=False))
+    return counts.reindex(index, fill_value=0).add(delta.reindex(index, fill_value=0))
+
+
+class SchoolStatsTable:
+    # Every school's stats row from per-school counts, plus dataset-wide
+    # pooled rates used as the report benchmarks
+    def __init__(self, counts, ranks=None):
+        self.counts = counts
+        self._ranks = ranks
+        self._ranks_lock = threading.Lock()
+        self.schools = counts.index
+        totals = counts[COUNT_COLUMNS[:len(CATEGORY_LABELS)]].sum(axis=1).to_numpy()
+
+        pooled = int(totals.sum())
+        self.benchmarks = dict(PUBLISHED_BENCHMARKS)
+        if pooled:
+            self.benchmarks.update({
+                'bench_anxiety_pct': _pct(int(counts['anxiety'].sum()), pooled),
+                'bench_parent_pressure_pct': _pct(int(counts['parent_pressure'].sum()), pooled),
+                'bench_support_pct': _pct(int(counts['support'].sum()), pooled),
+                'bench_source': 'dataset',
+                'bench_students': pooled,
+                'bench_schools': len(counts),
+            })
+
+        values = counts.to_numpy()
+        n_cats = len(CATEGORY_LABELS)
+        self._index = {}
+        rows = []
+        for i, name in enumerate(self.schools):
+            row = stats_row(values[i, :n_cats], totals[i], *values[i, n_cats:], self.benchmarks)
+            self._index[name] = row
+            rows.append(row)
+        self.frame = pd.DataFrame(rows, index=pd.Index(list(self.schools), name='sname'))
+
+    @classmethod
+    def from_frame(cls, df, columns):
+        return cls(school_counts(df, columns))
+
+    @property
+    def ranks(self):
+        # Percentile index over every school, built on first use
+        with self._ranks_lock:
+            if self._ranks is None:
+                self._ranks = RankIndex.from_frame(self.frame)
+            return self._ranks
+
+    def carry_ranks(self, previous, schools):
+        # Reuse the previous version's index, re-placing only the given
+        # schools, instead of re-sorting every school
+        old = {name: previous.row(name) for name in schools if previous.row(name) is not None}
+        new = {name: self.row(name) for name in schools if self.row(name) is not None}
+        ranks = previous.ranks.updated(old, new)
+        with self._ranks_lock:
+            self._ranks = ranks
+
+    def row(self, school_name):
+        return self._index.get(school_name)
+
+    def lookup(self, school_name):
+        # The school's stats row plus its percentile/rank among all schools
+        row = self._index.get(school_name)
+        if row is None:
+            return None
+        return {**row, **self.ranks.describe(row)}
+
+
+def compute_school_stats(sdf, total, cols, benchmarks=None):
+    # Single-school path for callers without a full dataset
+    cats = category_codes(sdf['total_score'].to_numpy())
+    counts = np.bincount(cats, minlength=len(CATEGORY_LABELS))
+    return stats_row(
+        counts, total,
+        top_box_flags(sdf[cols[ANXIETY_ITEM]]).sum(),
+        top_box_flags(sdf[cols[PARENT_PRESSURE_ITEM]]).sum(),
+        top_box_flags(sdf[cols[SUPPORT_ITEM]]).sum(),
+        sdf['total_score'].sum(),
+        benchmarks or PUBLISHED_BENCHMARKS,
+    )
@@ -0,0 +1,222 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from edxso import cache_path
+
+try:
+    import resource
+except ImportError:  # not POSIX: spans carry no RSS reading
+    resource = None
+
+# --- CONFIGURATION ---
+# Set either to "" to disable that sink; the defaults live under the cache
+# dir and are only resolved (and created) when first written or read
+SPANS_FILE = os.getenv("EDXSO_METRICS_FILE")
+PROMETHEUS_FILE = os.getenv("EDXSO_METRICS_PROM")
+SPANS_MAX_BYTES = int(os.getenv("EDXSO_METRICS_MAX_BYTES", str(16 << 20)))  # then rotated to spans.jsonl.1
+RECENT_SPANS = int(os.getenv("EDXSO_METRICS_RECENT", "5000"))
+QUANTILES = (0.5, 0.9, 0.99)
+
+_trace_id = contextvars.ContextVar("edxso_trace_id", default=None)
+_recent = deque(maxlen=RECENT_SPANS)
+_totals = defaultdict(lambda: {"count": 0, "wall_sum": 0.0, "errors": 0, "hits": 0, "misses": 0})
+_lock = threading.Lock()
+
+
+def spans_file():
+    return cache_path("metrics", "spans.jsonl") if SPANS_FILE is None else SPANS_FILE
+
+
+def prometheus_file():
+    return cache_path("metrics", "edxso.prom") if PROMETHEUS_FILE is None else PROMETHEUS_FILE
+
+
+def _peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None
+
+
+class Span:
+    def __init__(self, stage, attrs):
+        self.stage = stage
+        self.attrs = attrs
+        self.bytes = None
+        self.cache = None  # "hit" / "miss" where a cache is involved
+
+    def hit(self, is_hit=True):
+        self.cache = "hit" if is_hit else "miss"
+
+    def produced(self, data):
+        self.bytes = len(data) if data is not None else 0
+
+
+@contextmanager
+def trace(name=None):
+    # Groups the spans of one report (or one batch item) under a shared id
+    token = _trace_id.set(name or uuid.uuid4().hex[:12])
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+def current_trace():
+    return _trace_id.get()
+
+
+@contextmanager
+def span(stage, **attrs):
+    s = Span(stage, attrs)
+    error = None
+    rss0 = _peak_rss_kb()
+    cpu0 = time.thread_time()
+    wall0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record = {
+            "ts": time.time(),
+            "trace": _trace_id.get(),
+            "stage": stage,
+            "wall_ms": round((time.perf_counter() - wall0) * 1000, 3),
+            "cpu_ms": round((time.thread_time() - cpu0) * 1000, 3),
+        }
+        if rss0 is not None:
+            record["peak_rss_delta_kb"] = _peak_rss_kb() - rss0
+        if s.bytes is not None:
+            record["bytes"] = s.bytes
+        if s.cache is not None:
+            record["cache"] = s.cache
+        if error:
+            record["error"] = error
+        record.update(s.attrs)
+        _record(record)
+
+
+def _record(record):
+    with _lock:
+        _recent.append(record)
+        t = _totals[record["stage"]]
+        t["count"] += 1
+        t["wall_sum"] += record["wall_ms"] / 1000
+        t["errors"] += 1 if "error" in record else 0
+        if record.get("cache") == "hit":
+            t["hits"] += 1
+        elif record.get("cache") == "miss":
+            t["misses"] += 1
+        path = spans_file()
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+                size = f.tell()
+            if size > SPANS_MAX_BYTES:
+                # Keep one rotated generation; other processes' next append
+                # reopens the path and starts the fresh file
+                try:
+                    os.replace(path, path + ".1")
+                except OSError:
+                    pass  # another process rotated it first
+
+
+# --- QUERIES ---
+def recent_spans(trace_id=None):
+    with _lock:
+        spans = list(_recent)
+    if trace_id is not None:
+        spans = [s for s in spans if s["trace"] == trace_id]
+    return spans
+
+
+def logged_spans(trace_id, tail_bytes=1 << 20):
+    # Spans of a trace recorded by another process (background job workers),
+    # read from the tail of the spans file (and its rotated predecessor when
+    # the current file is shorter than tail_bytes)
+    path = spans_file()
+    if not path:
+        return []
+    lines = []
+    for part in (path, path + ".1"):
+        if tail_bytes <= 0 or not os.path.exists(part):
+            continue
+        with open(part, "rb") as f:
+            size = os.path.getsize(part)
+            f.seek(max(0, size - tail_bytes))
+            lines = f.read().decode("utf-8", errors="replace").splitlines() + lines
+        tail_bytes -= size
+    spans = []
+    for line in lines:
+        if trace_id in line:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partial first line
+            if record.get("trace") == trace_id:
+                spans.append(record)
+    return spans
+
+
+def _quantile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+def stage_summary():
+    # Per-stage latency percentiles over the recent window plus lifetime counters
+    by_stage = defaultdict(list)
+    for s in recent_spans():
+        by_stage[s["stage"]].append(s["wall_ms"])
+    with _lock:
+        totals = {k: dict(v) for k, v in _totals.items()}
+    summary = {}
+    for stage, t in totals.items():
+        vals = sorted(by_stage.get(stage, []))
+        summary[stage] = {
+            "count": t["count"],
+            "errors": t["errors"],
+            "p50_ms": _quantile(vals, 0.5),
+            "p90_ms": _quantile(vals, 0.9),
+            "p99_ms": _quantile(vals, 0.99),
+            "cache_hits": t["hits"],
+            "cache_misses": t["misses"],
+        }
+    return summary
+
+
+def write_prometheus(path=None):
+    path = path or prometheus_file()
+    if not path:
+        return
+    summary = stage_summary()
+    with _lock:
+        totals = {k: dict(v) for k, v in _totals.items()}
+    lines = [
+        "# HELP edxso_stage_seconds Wall time per pipeline stage (recent window quantiles).",
+        "# TYPE edxso_stage_seconds summary",
+    ]
+    for stage, s in sorted(summary.items()):
+        for q in QUANTILES:
+            key = f"p{int(q * 100)}_ms"
+            lines.append(f'edxso_stage_seconds{{stage="{stage}",quantile="{q}"}} {s[key] / 1000:.6f}')
+        lines.append(f'edxso_stage_seconds_sum{{stage="{stage}"}} {totals[stage]["wall_sum"]:.6f}')
+        lines.append(f'edxso_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+    lines += ["# HELP edxso_stage_errors_total Failed spans per stage.", "# TYPE edxso_stage_errors_total counter"]
+    lines += [f'edxso_stage_errors_total{{stage="{k}"}} {v["errors"]}' for k, v in sorted(summary.items())]
+    lines += ["# HELP edxso_cache_requests_total Cache lookups per stage and result.", "# TYPE edxso_cache_requests_total counter"]
+    for stage, s in sorted(summary.items()):
+        if s["cache_hits"] or s["cache_misses"]:
+            lines.append(f'edxso_cache_requests_total{{stage="{stage}",result="hit"}} {s["cache_hits"]}')
+            lines.append(f'edxso_cache_requests_total{{stage="{stage}",result="miss"}} {s["cache_misses"]}')
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
@@ -0,0 +1,49 @@
+import html
+import re
+
+# --- COMPILED TEMPLATE ---
+# "[UPPER_CASE]" tokens are placeholders; everything else is literal text.
+PLACEHOLDER_RE = re.compile(r"\[[A-Z][A-Z0-9_]*\]")
+
+
+class TemplateError(KeyError):
+    pass
+
+
+class CompiledTemplate:
+    # Splits the source once into literal segments and placeholder slots so a
+    # render is a single join instead of one full-document replace() per key.
+    # Placeholders listed in `escaped` are HTML-escaped (untrusted text such as
+    # AI output); the rest are inserted verbatim (markup, data URIs, numbers).
+    def __init__(self, source, escaped=()):
+        self.segments = []
+        self.slots = []
+        pos = 0
+        for m in PLACEHOLDER_RE.finditer(source):
+            self.segments.append(source[pos:m.start()])
+            self.slots.append(m.group(0))
+            pos = m.end()
+        self.segments.append(source[pos:])
+        self.placeholders = frozenset(self.slots)
+        unknown = set(escaped) - self.placeholders
+        if unknown:
+            raise TemplateError(f"Escaped placeholders not in template: {sorted(unknown)}")
+        self.escaped = frozenset(escaped)
+
+    def render(self, values):
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise TemplateError(f"Missing template values: {sorted(missing)}")
+        unknown = values.keys() - self.placeholders
+        if unknown:
+            raise TemplateError(f"Unknown template placeholders: {sorted(unknown)}")
+
+        filled = {}
+        for key in self.placeholders:
+            val = str(values[key])
+            filled[key] = html.escape(val) if key in self.escaped else val
+
+        parts = [None] * (2 * len(self.slots) + 1)
+        parts[::2] = self.segments
+        parts[1::2] = [filled[key] for key in self.slots]
+        return "".join(parts)
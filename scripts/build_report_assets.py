@@ -0,0 +1,195 @@
+"""Rebuild the offline report assets in edxso/assets.
+
+    python scripts/build_report_assets.py [--fonts-from DIR] [--fetch-images | --draw-images]
+
+* report.css  - Tailwind compiled from tailwind.input.css, purged to the classes
+                used in edxso/report.py (needs the `tailwindcss` standalone CLI,
+                e.g. `pip install tailwindcss-bin`).
+* fonts/      - Inter 400/500/600/700 subset to Latin + common punctuation as
+                WOFF2 (needs `fonttools` and `brotli`). DIR must contain
+                Inter-Regular/Medium/SemiBold/Bold as .woff2, .woff or .ttf.
+                Plain TTF copies of 400/600/700 are written next to them for
+                the native PDF engine, so the app never needs brotli.
+* images/     - the overview/methodology illustrations. --fetch-images
+                downloads the hosted originals; --draw-images redraws the
+                bundled versions with Pillow from the report palette and Inter.
+                The build fails if either image is missing afterwards.
+
+Dev-time only: the app just reads the committed outputs.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS = os.path.join(ROOT, "edxso", "assets")
+
+FONT_WEIGHTS = {400: "Regular", 500: "Medium", 600: "SemiBold", 700: "Bold"}
+NATIVE_WEIGHTS = (400, 600, 700)  # edxso.native_pdf.FONT_FILES
+# Basic Latin, Latin-1, Latin Extended-A, general punctuation, euro, trademark, arrows
+FONT_UNICODES = "U+0000-017F,U+2000-206F,U+20AC,U+2122,U+2190-2193"
+
+REMOTE_IMAGES = {
+    "overview.png": "https://i.ibb.co/VYdmHbWy/Screenshot-2026-01-30-at-5-19-42-PM.png",
+    "methodology.png": "https://i.ibb.co/kV9wrJ8q/Screenshot-2026-01-30-at-5-20-37-PM.png",
+}
+
+
+def build_css():
+    exe = shutil.which("tailwindcss")
+    if exe is None:
+        sys.exit("tailwindcss CLI not found (pip install tailwindcss-bin)")
+    subprocess.run([
+        exe,
+        "-i", os.path.join(ASSETS, "tailwind.input.css"),
+        "-o", os.path.join(ASSETS, "report.css"),
+        "--minify",
+    ], check=True, cwd=ROOT)
+
+
+def find_font(src_dir, style):
+    for ext in (".woff2", ".woff", ".ttf", ".otf"):
+        path = os.path.join(src_dir, f"Inter-{style}{ext}")
+        if os.path.exists(path):
+            return path
+    sys.exit(f"Inter-{style} not found in {src_dir}")
+
+
+def build_fonts(src_dir):
+    from fontTools import subset
+
+    out_dir = os.path.join(ASSETS, "fonts")
+    os.makedirs(out_dir, exist_ok=True)
+    for weight, style in FONT_WEIGHTS.items():
+        subset.main([
+            find_font(src_dir, style),
+            f"--unicodes={FONT_UNICODES}",
+            "--layout-features=kern,liga,calt",
+            "--flavor=woff2",
+            f"--output-file={os.path.join(out_dir, f'Inter-{weight}.woff2')}",
+        ])
+    license_src = os.path.join(src_dir, "LICENSE")
+    if os.path.exists(license_src):
+        shutil.copy(license_src, os.path.join(out_dir, "LICENSE"))
+    build_ttf()
+
+
+def build_ttf():
+    # Same subset, unwrapped from WOFF2
+    from fontTools.ttLib import TTFont
+
+    out_dir = os.path.join(ASSETS, "fonts")
+    for weight in NATIVE_WEIGHTS:
+        font = TTFont(os.path.join(out_dir, f"Inter-{weight}.woff2"))
+        font.flavor = None
+        font.save(os.path.join(out_dir, f"Inter-{weight}.ttf"))
+
+
+def fetch_images():
+    out_dir = os.path.join(ASSETS, "images")
+    os.makedirs(out_dir, exist_ok=True)
+    for name, url in REMOTE_IMAGES.items():
+        with urllib.request.urlopen(url, timeout=30) as resp, open(os.path.join(out_dir, name), "wb") as f:
+            f.write(resp.read())
+
+
+# Report palette (edxso.native_pdf) and category colours of the scoring table
+NAVY, BLUE_50, BLUE_100, BLUE_200, BLUE_600 = "#0c4a6e", "#eff6ff", "#dbeafe", "#bfdbfe", "#2563eb"
+SLATE_300, WHITE = "#cbd5e1", "#ffffff"
+CATEGORY_COLOURS = ["#22c55e", "#3b82f6", "#eab308", "#f97316", "#ef4444"]
+SUPERSAMPLE = 3
+
+
+def _canvas(width, height):
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (width * SUPERSAMPLE, height * SUPERSAMPLE), BLUE_50)
+    return img, ImageDraw.Draw(img)
+
+
+def _save(img, name):
+    from PIL import Image
+
+    out_dir = os.path.join(ASSETS, "images")
+    os.makedirs(out_dir, exist_ok=True)
+    img = img.resize((img.width // SUPERSAMPLE, img.height // SUPERSAMPLE), Image.LANCZOS)
+    img.save(os.path.join(out_dir, name), optimize=True)
+
+
+def _font(weight, size):
+    from PIL import ImageFont
+
+    return ImageFont.truetype(os.path.join(ASSETS, "fonts", f"Inter-{weight}.ttf"), size * SUPERSAMPLE)
+
+
+def draw_overview():
+    # Survey sheet with answered statements beside the five stress bands
+    k = SUPERSAMPLE
+    img, d = _canvas(1000, 600)
+    d.rounded_rectangle((110 * k, 80 * k, 520 * k, 520 * k), 28 * k, fill=WHITE, outline=BLUE_200, width=3 * k)
+    d.rounded_rectangle((245 * k, 58 * k, 385 * k, 104 * k), 14 * k, fill=NAVY)
+    for i in range(5):
+        y = (150 + i * 72) * k
+        d.ellipse((150 * k, y, 186 * k, y + 36 * k), outline=BLUE_600, width=4 * k, fill=BLUE_100 if i % 2 else WHITE)
+        if i % 2 == 0:
+            d.line([(159 * k, y + 18 * k), (166 * k, y + 26 * k), (179 * k, y + 10 * k)], fill=BLUE_600, width=5 * k)
+        d.rounded_rectangle((208 * k, y + 6 * k, (470 - 40 * (i % 3)) * k, y + 16 * k), 5 * k, fill=SLATE_300)
+        d.rounded_rectangle((208 * k, y + 24 * k, (400 - 30 * (i % 2)) * k, y + 32 * k), 4 * k, fill=BLUE_100)
+    d.line([(590 * k, 500 * k), (900 * k, 500 * k)], fill=SLATE_300, width=4 * k)
+    for i, (colour, height) in enumerate(zip(CATEGORY_COLOURS, (210, 300, 250, 150, 90))):
+        x = (606 + i * 60) * k
+        d.rounded_rectangle((x, (500 - height) * k, x + 42 * k, 500 * k), 10 * k, fill=colour)
+    _save(img, "overview.png")
+
+
+def draw_methodology():
+    # The 20-statement, five-point Never..Always response scale
+    k = SUPERSAMPLE
+    img, d = _canvas(1200, 540)
+    labels = ["Never", "Rarely", "Sometimes", "Often", "Always"]
+    shades = [BLUE_100, BLUE_200, "#93c5fd", "#60a5fa", BLUE_600]
+    d.text((600 * k, 110 * k), "20 statements  \u00b7  5-point scale", font=_font(600, 40), fill=NAVY, anchor="mm")
+    d.line([(180 * k, 290 * k), (1020 * k, 290 * k)], fill=SLATE_300, width=6 * k)
+    for i, (label, shade) in enumerate(zip(labels, shades)):
+        x = (180 + i * 210) * k
+        d.ellipse((x - 54 * k, 236 * k, x + 54 * k, 344 * k), fill=shade, outline=WHITE, width=6 * k)
+        d.text((x, 290 * k), str(i + 1), font=_font(700, 44), fill=WHITE if i >= 3 else NAVY, anchor="mm")
+        d.text((x, 392 * k), label, font=_font(600, 30), fill=NAVY, anchor="mm")
+    _save(img, "methodology.png")
+
+
+def draw_images():
+    draw_overview()
+    draw_methodology()
+
+
+def check_images():
+    missing = [name for name in REMOTE_IMAGES if not os.path.exists(os.path.join(ASSETS, "images", name))]
+    if missing:
+        sys.exit(f"Missing report images in edxso/assets/images: {', '.join(missing)} "
+                 "(run with --fetch-images or --draw-images)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fonts-from", help="directory with the full Inter font files")
+    images = parser.add_mutually_exclusive_group()
+    images.add_argument("--fetch-images", action="store_true", help="download the hosted originals")
+    images.add_argument("--draw-images", action="store_true", help="redraw the bundled illustrations")
+    args = parser.parse_args()
+
+    build_css()
+    if args.fonts_from:
+        build_fonts(args.fonts_from)
+    if args.fetch_images:
+        fetch_images()
+    elif args.draw_images:
+        draw_images()
+    check_images()
+
+
+if __name__ == "__main__":
+    main()
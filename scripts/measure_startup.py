@@ -0,0 +1,55 @@
+"""Time cold start and per-rerun overhead of the report engine.
+
+    python scripts/measure_startup.py [--runs 5]
+
+Cold start: a fresh interpreter importing what streamlit_app.py imports.
+Rerun: the work the script repeats on every Streamlit interaction (browser
+bootstrap check + upload cache lookup), measured in-process.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_IMPORT = (
+    "import time; t = time.perf_counter(); "
+    "import edxso.dataset_cache, edxso.report, edxso.batch; "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def cold_start_ms(runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", COLD_IMPORT], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def rerun_ms(runs):
+    sys.path.insert(0, ROOT)
+    from edxso.bootstrap import ensure_playwright_browser
+
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        ensure_playwright_browser()
+        samples.append((time.perf_counter() - t) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, samples in (("cold import", cold_start_ms(args.runs)), ("rerun bootstrap", rerun_ms(args.runs))):
+        print(f"{name:16s} median {statistics.median(samples):8.2f} ms  max {max(samples):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+# The cache dir is read when edxso is imported, so point it at a scratch
+# directory before any test module imports the package
+os.environ.setdefault("EDXSO_CACHE_DIR", tempfile.mkdtemp(prefix="edxso-tests-"))
+os.environ.setdefault("EDXSO_ARTIFACT_CACHE", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from benchmarks.synthetic import generate_survey  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def survey():
+    # Noisy synthetic upload: odd casing, padded and non-breaking spaces, blanks, typos
+    return generate_survey(2000, 8, seed=7)
+
+
+@pytest.fixture(scope="session")
+def survey_csv(survey):
+    return survey.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from edxso.artifact_cache import ArtifactCache, artifact_key
+
+STATS = {'count': 3, 'mean_score': 61.0, 'bench_anxiety_pct': 42.0}
+INSIGHTS = {'summary': 'Stable.', 'strengths': [], 'concerns': [], 'recommendations': []}
+
+
+@pytest.fixture
+def rows():
+    return pd.DataFrame({'sname': ['A', 'A', 'A'], 'total_score': [40, 61, 82]})
+
+
+def _key(rows, **changes):
+    args = dict(sdf=rows, stats=STATS, school_name='A', logo_bytes=None, ai_content=INSIGHTS,
+                template_version='v1', output_format='HTML')
+    args.update(changes)
+    return artifact_key(**args)
+
+
+def test_key_is_stable(rows):
+    assert _key(rows) == _key(rows.copy(), stats=dict(STATS))
+
+
+@pytest.mark.parametrize("changes", [
+    {'template_version': 'v2'},
+    {'logo_bytes': b'\x89PNG logo'},
+    {'output_format': 'PDF'},
+    {'stats': {**STATS, 'bench_anxiety_pct': 43.0}},
+    {'ai_content': {**INSIGHTS, 'summary': 'Changed.'}},
+    {'school_name': 'B'},
+])
+def test_key_changes_with_every_input(rows, changes):
+    assert _key(rows, **changes) != _key(rows)
+
+
+def test_key_changes_with_scored_rows(rows):
+    changed = rows.copy()
+    changed.loc[1, 'total_score'] = 62
+    assert _key(changed) != _key(rows)
+
+
+def test_round_trip_and_lru_eviction(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "index.sqlite3"), max_bytes=25)
+    assert cache.get("a" * 64) is None
+    cache.put("a" * 64, "A", "HTML", b"x" * 10)
+    cache.put("b" * 64, "B", "PDF", b"y" * 10)
+    assert cache.get("a" * 64) == b"x" * 10  # now the most recently used
+    cache.put("c" * 64, "C", "HTML", b"z" * 10)
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) == b"x" * 10
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['evictions'] == 1
+    assert stats['hits'] == 2 and stats['misses'] == 2 and stats['bytes_saved'] == 20
@@ -0,0 +1,16 @@
+import pytest
+
+from edxso import cli
+
+
+def test_columnar_and_append_to_are_exclusive(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["--columnar", "years", "--append-to", "waves"])
+    assert exit_info.value.code == 2
+    assert "not allowed with argument" in capsys.readouterr().err
+
+
+def test_input_or_columnar_is_required(capsys):
+    with pytest.raises(SystemExit):
+        cli.main([])
+    assert "give either INPUT or --columnar STORE" in capsys.readouterr().err
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from edxso.columnar import build_store, open_store
+from edxso.dataset_cache import build_dataset
+from edxso.stats import compute_school_stats
+
+STAT_FIELDS = ['count', 'balanced', 'mild', 'moderate', 'high', 'severe', 'anxiety_pct',
+               'parent_pressure_pct', 'support_pct', 'mean_score']
+
+
+@pytest.fixture(scope="module")
+def stores(survey, tmp_path_factory):
+    # The same rows as two yearly files in a columnar store, and as one upload
+    root = tmp_path_factory.mktemp("columnar")
+    paths = []
+    for n, part in enumerate((survey.iloc[:1200], survey.iloc[1200:])):
+        path = root / f"year-{n}.csv"
+        part.to_csv(path, index=False)
+        paths.append(str(path))
+    build_store("years", paths)
+    full = build_dataset(survey.to_csv(index=False).encode("utf-8"), "survey.csv")
+    return open_store("years"), full
+
+
+def test_store_stats_match_full_rescore(stores):
+    columnar, full = stores
+    assert len(columnar) == len(full)
+    assert sorted(columnar.schools) == sorted(full.schools)
+    for school in full.schools:
+        assert columnar.school_stats(school) == full.school_stats(school)
+
+
+def test_school_frame_keeps_answers_as_uploaded(stores):
+    columnar, full = stores
+    for school in full.schools:
+        frame = columnar.school_frame(school)[columnar.items]
+        expected = full.school_frame(school)[columnar.items]
+        # Padded and oddly cased answers included: " Often" is not a blank
+        assert frame.astype(object).where(frame.notna(), None).values.tolist() == \
+            expected.astype(object).where(expected.notna(), None).values.tolist()
+
+
+def test_school_frame_is_a_view_of_the_store(stores):
+    columnar, _ = stores
+    frame = columnar.school_frame(columnar.schools[0], 10, 60)
+    for item in columnar.items:
+        assert np.shares_memory(frame[item].array.codes, columnar.answers)
+    assert np.shares_memory(frame['category'].array.codes, columnar.category)
+    assert np.shares_memory(frame['total_score'].to_numpy(), columnar.total_score)
+
+
+def test_school_frame_scores_match_full_rescore(stores):
+    columnar, full = stores
+    for school in full.schools:
+        frame = columnar.school_frame(school)
+        expected = full.school_frame(school)
+        assert len(frame) == len(expected)
+        assert frame['total_score'].sum() == expected['total_score'].sum()
+        assert frame['category'].astype(str).tolist() == expected['category'].astype(str).tolist()
+
+
+def test_stats_from_school_frame_match_stored_counts(stores):
+    columnar, _ = stores
+    for school in columnar.schools:
+        frame = columnar.school_frame(school)
+        recomputed = compute_school_stats(frame, len(frame), columnar.columns)
+        stored = columnar.school_stats(school)
+        assert {k: recomputed[k] for k in STAT_FIELDS if k in recomputed} == \
+            {k: stored[k] for k in STAT_FIELDS if k in recomputed}
+
+
+def test_school_frame_windows(stores):
+    columnar, _ = stores
+    school = columnar.schools[0]
+    whole = columnar.school_frame(school)
+    parts = pd.concat([columnar.school_frame(school, start, start + 50) for start in range(0, len(whole), 50)])
+    pd.testing.assert_frame_equal(parts.reset_index(drop=True), whole)
@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pytest
+
+from edxso import export
+from edxso.dataset_cache import build_dataset
+
+
+@pytest.fixture(scope="module")
+def dataset(survey_csv):
+    return build_dataset(survey_csv, "survey.csv")
+
+
+def _expected(dataset, schools=None):
+    frames = [dataset.school_frame(name) for name in (schools or dataset.schools)]
+    return export._plain(pd.concat(frames)).reset_index(drop=True)
+
+
+def test_chunks_cover_every_row_once(dataset):
+    chunks = list(export.iter_chunks(dataset, chunk_rows=100))
+    assert all(len(frame) <= 100 for _, frame in chunks)
+    assert [name for name, _ in chunks] == sorted((name for name, _ in chunks), key=dataset.schools.index)
+    whole = pd.concat(frame for _, frame in chunks).reset_index(drop=True)
+    pd.testing.assert_frame_equal(export._plain(whole), _expected(dataset))
+
+
+def test_csv_export_matches_scored_rows(dataset, tmp_path):
+    dest = str(tmp_path / "scores.csv")
+    summary = export.export_dataset(dataset, dest, "csv", chunk_rows=123)
+    assert summary == {"format": "csv", "rows": len(dataset.df), "files": [dest]}
+    written = pd.read_csv(dest)
+    expected = _expected(dataset)
+    assert written.columns.tolist() == expected.columns.tolist()
+    assert written['total_score'].tolist() == expected['total_score'].tolist()
+    assert written['category'].tolist() == expected['category'].tolist()
+
+
+def test_parquet_projection_and_school_subset(dataset, tmp_path):
+    pytest.importorskip("pyarrow")
+    schools = dataset.schools[:3]
+    dest = str(tmp_path / "scores.parquet")
+    export.export_dataset(dataset, dest, "parquet", columns=['sname', 'total_score'], schools=schools, chunk_rows=50)
+    written = pd.read_parquet(dest)
+    pd.testing.assert_frame_equal(written, _expected(dataset, schools)[['sname', 'total_score']], check_dtype=False)
+
+
+def test_partitioned_export_writes_one_file_per_school(dataset, tmp_path):
+    dest = str(tmp_path / "by-school")
+    summary = export.export_dataset(dataset, dest, "csv", partition=True, chunk_rows=64)
+    assert len(summary["files"]) == len(dataset.schools)
+    for name, path in zip(dataset.schools, summary["files"]):
+        assert os.path.basename(path) == f"{export.safe_stem(name)}.csv"
+        written = pd.read_csv(path)
+        assert set(written['sname']) == {name}
+        assert len(written) == len(dataset.school_frame(name))
+
+
+def test_excel_spills_to_new_sheets(dataset, tmp_path, monkeypatch):
+    pytest.importorskip("xlsxwriter")
+    pytest.importorskip("openpyxl")
+    monkeypatch.setattr(export, "EXCEL_MAX_ROWS", 100)
+    school = dataset.schools[0]
+    dest = str(tmp_path / "scores.xlsx")
+    export.export_dataset(dataset, dest, "xlsx", columns=['sname', 'total_score'], schools=[school], chunk_rows=70)
+    sheets = pd.read_excel(dest, sheet_name=None)
+    rows = len(dataset.school_frame(school))
+    assert [len(frame) for frame in sheets.values()] == [100] * (rows // 100) + ([rows % 100] if rows % 100 else [])
+    assert pd.concat(sheets.values())['total_score'].tolist() == dataset.school_frame(school)['total_score'].tolist()
+
+
+def test_unknown_format_and_columns_raise(dataset, tmp_path):
+    with pytest.raises(ValueError, match="format"):
+        export.export_dataset(dataset, str(tmp_path / "x"), "json")
+    with pytest.raises(ValueError, match="columns"):
+        export.export_dataset(dataset, str(tmp_path / "x.csv"), "csv", columns=['nope'])
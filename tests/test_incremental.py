@@ -0,0 +1,79 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from edxso.dataset_cache import build_dataset
+from edxso.incremental import IncrementalDataset
+
+
+def _csv(df):
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def test_appended_waves_match_full_rescore(survey, survey_csv):
+    store = IncrementalDataset("waves")
+    waves = [survey.iloc[:700], survey.iloc[700:1400], survey.iloc[1400:]]
+    for n, wave in enumerate(waves):
+        # Each wave after the first repeats some rows already stored
+        overlap = survey.iloc[max(0, 700 * n - 50):700 * n] if n else wave.iloc[:0]
+        summary = store.append(_csv(pd.concat([overlap, wave])), f"wave-{n}.csv")
+        assert summary["added"] == len(wave)
+        assert summary["duplicates"] == len(overlap)
+        store.load()  # carries ranks forward wave by wave
+
+    appended = store.load()
+    full = build_dataset(survey_csv, "survey.csv")
+    assert len(appended.df) == len(full.df)
+    assert sorted(appended.schools) == sorted(full.schools)
+    for school in full.schools:
+        assert appended.school_stats(school) == full.school_stats(school)
+
+
+def test_reappending_a_file_is_a_no_op(survey):
+    store = IncrementalDataset("repeat")
+    data = _csv(survey.iloc[:300])
+    store.append(data, "wave.csv")
+    again = store.append(data, "wave.csv")
+    assert again["already_appended"] and again["added"] == 0
+    assert store.version == 1
+
+
+def test_mark_rendered_clears_stale_schools(survey):
+    store = IncrementalDataset("stale")
+    store.append(_csv(survey.iloc[:300]), "wave.csv")
+    stale = store.stale
+    assert stale
+    store.mark_rendered(stale[:1])
+    assert IncrementalDataset("stale").stale == stale[1:]
+
+
+def test_numeric_school_names_match_across_excel_and_csv_waves(survey):
+    wave = survey.iloc[:400].copy()
+    numbers = {name: 100 + n for n, name in enumerate(wave["sname"].unique())}
+    wave["sname"] = wave["sname"].map(numbers)
+    buf = io.BytesIO()
+    wave.iloc[:200].to_excel(buf, index=False)
+
+    store = IncrementalDataset("numeric")
+    store.append(buf.getvalue(), "wave-1.xlsx")
+    store.append(_csv(wave.iloc[200:]), "wave-2.csv")
+    ds = store.load()
+    expected = sorted(str(n) for n in wave["sname"].unique())
+    assert sorted(ds.schools) == expected
+    assert sorted(store.stale) == expected
+    for school in ds.schools:
+        assert ds.school_stats(school)["count"] == (wave["sname"].astype(str) == school).sum()
+
+
+def test_hash_index_is_rebuilt_when_out_of_step(survey):
+    store = IncrementalDataset("index")
+    store.append(_csv(survey.iloc[:300]), "wave-1.csv")
+    index_path = store._path("hashes.idx.npy")
+    assert len(np.load(index_path)) == 300
+    np.save(index_path, np.empty(0, dtype=np.uint64))  # as if a crash left it behind meta.json
+
+    summary = store.append(_csv(survey.iloc[200:500]), "wave-2.csv")
+    assert summary["added"] == 200 and summary["duplicates"] == 100
+    index = np.load(index_path)
+    assert len(index) == 500 and (index[1:] >= index[:-1]).all()
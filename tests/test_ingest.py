@@ -0,0 +1,19 @@
+from edxso import ingest
+from edxso.dataset_cache import build_dataset
+
+
+def test_cache_key_carries_scoring_and_layout_versions(monkeypatch):
+    paths = ingest._parquet_paths("abc")
+    monkeypatch.setattr(ingest, "SCORING_VERSION", ingest.SCORING_VERSION + 1)
+    rescored = ingest._parquet_paths("abc")
+    monkeypatch.setattr(ingest, "UPLOAD_CACHE_VERSION", ingest.UPLOAD_CACHE_VERSION + 1)
+    relaid = ingest._parquet_paths("abc")
+    assert len({paths, rescored, relaid}) == 3
+
+
+def test_school_rows_keep_metadata_columns(survey, survey_csv):
+    dataset = build_dataset(survey_csv, "survey.csv")
+    school = dataset.schools[0]
+    full = ingest.read_school_rows(survey_csv, "survey.csv", school)
+    assert full.columns.tolist() == survey.columns.tolist() + ['total_score', 'category']
+    assert full['total_score'].tolist() == dataset.school_frame(school)['total_score'].tolist()
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from edxso import insights
+from edxso.dataset_cache import build_dataset
+from edxso.insight_cache import get_insight_cache
+
+PARAGRAPHS = {"p1": "Gemini one.", "p2": "Gemini two.", "p3": "Gemini three."}
+
+
+class StandInClient:
+    # Just enough of genai.Client: models.generate_content(...).text
+    def __init__(self, delay=0.0, error=None):
+        self.delay, self.error = delay, error
+        self.released = threading.Event()
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+
+    def generate_content(self, model, contents, config):
+        self.released.wait(self.delay)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(text=json.dumps(PARAGRAPHS))
+
+
+@pytest.fixture(scope="module")
+def stats(survey_csv):
+    dataset = build_dataset(survey_csv, "survey.csv")
+    return {school: dataset.school_stats(school) for school in dataset.schools}
+
+
+def _generate(stats, school, client, budget):
+    key = f"test-key-{school}"
+    insights.set_client(key, client)
+    return insights.generate_insights_with_gemini(key, stats[school], school, force_refresh=True, budget=budget)
+
+
+def test_answer_within_budget_is_used_and_cached(stats):
+    school = "Synthetic School 0000"
+    result = _generate(stats, school, StandInClient(), budget=5)
+    assert {k: result[k] for k in PARAGRAPHS} == PARAGRAPHS
+    assert "fallback" not in result
+    assert result["risk_band_label"] == insights.classify_risk_band(stats[school])
+
+
+def test_deadline_falls_back_to_template(stats):
+    school = "Synthetic School 0001"
+    client = StandInClient(delay=30)
+    pending = get_insight_cache().pending_count()
+    started = time.monotonic()
+    try:
+        result = _generate(stats, school, client, budget=0.3)
+        assert time.monotonic() - started < 2
+        expected = insights.fallback_insights(stats[school], school, insights.classify_risk_band(stats[school]), "deadline")
+        assert result == expected
+        assert get_insight_cache().pending_count() == pending + 1
+    finally:
+        client.released.set()
+
+
+def test_api_error_falls_back_to_template(stats):
+    school = "Synthetic School 0002"
+    result = _generate(stats, school, StandInClient(error=ValueError("bad request")), budget=5)
+    assert result["fallback"] == "error"
+    assert result["p2"] == insights.VALIDATION
+    assert school in result["p1"] and school in result["p3"]
+
+
+def test_quota_wait_respects_deadline(monkeypatch):
+    bucket = insights.TokenBucket(rate=0.1, capacity=1)
+    assert bucket.acquire()
+    monkeypatch.setattr(insights, "_limiter", bucket)
+    with pytest.raises(TimeoutError):
+        insights.call_with_retry(lambda timeout: None, deadline=time.monotonic() + 0.2)
+
+
+def test_fallback_covers_every_band(stats):
+    school = "Synthetic School 0003"
+    for band in insights.BAND_OPENINGS:
+        result = insights.fallback_insights(stats[school], school, band)
+        assert result["risk_band_label"] == band
+        assert "%" not in result["p1"]  # shares in words, as the prompt asks
+
+
+def test_fallback_names_the_benchmark_the_report_uses(stats):
+    school = "Synthetic School 0003"
+    pooled = insights.fallback_insights(stats[school], school, "Balanced Ecosystem")
+    assert "surveyed schools" in pooled["p1"] and "national" not in pooled["p1"]
+    published = dict(stats[school], bench_source="published")
+    assert "the national benchmark" in insights.fallback_insights(published, school, "Balanced Ecosystem")["p1"]
+
+
+def test_shared_bucket_is_one_quota_across_connections(tmp_path):
+    # Each process opens its own connection; all of them drain the same bucket
+    path = str(tmp_path / "quota.sqlite3")
+    app, worker = (insights.SharedTokenBucket(rate=2, capacity=2, path=path) for _ in range(2))
+    assert app.acquire() and worker.acquire()
+    assert not worker.acquire(deadline=time.monotonic() + 0.1)
+    assert not app.acquire(deadline=time.monotonic() + 0.1)
+    started = time.monotonic()
+    assert app.acquire(deadline=time.monotonic() + 5)
+    assert time.monotonic() - started < 1.5
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from edxso.dataset_cache import build_dataset
+from edxso.items import N_LEVELS, ItemCube
+from edxso.scoring import ITEM_START
+from edxso.stats import ANXIETY_ITEM, PARENT_PRESSURE_ITEM, SUPPORT_ITEM, response_levels, top_box_flags
+
+INDICATORS = {'anxiety': ANXIETY_ITEM, 'parent_pressure': PARENT_PRESSURE_ITEM, 'support': SUPPORT_ITEM}
+
+
+def test_indicator_top_box_matches_stats(survey_csv):
+    dataset = build_dataset(survey_csv, "survey.csv")
+    for school in dataset.schools:
+        stats = dataset.school_stats(school)
+        for name, item in INDICATORS.items():
+            row = stats['items'][item - ITEM_START]
+            assert row['top_box'] == stats[f'{name}_pct']
+            assert row['bench_top_box'] == stats[f'bench_{name}_pct']
+
+
+def test_cube_counts_match_naive_count(survey):
+    cube = ItemCube.from_frame(survey, survey.columns.tolist())
+    assert cube.counts.shape == (survey['sname'].nunique(), 20, N_LEVELS)
+    for school in cube.schools[:3]:
+        rows = survey[survey['sname'] == school]
+        for j, item in enumerate(cube.items):
+            expected = np.bincount(response_levels(rows[item]), minlength=N_LEVELS)
+            np.testing.assert_array_equal(cube.school(school)[j], expected)
+    # Every student lands in exactly one level of every item
+    np.testing.assert_array_equal(cube.counts.sum(axis=2), np.repeat(cube.counts.sum(axis=(1, 2))[:, None] // 20, 20, axis=1))
+    np.testing.assert_array_equal(cube.national, cube.counts.sum(axis=0))
+
+
+def test_blanks_have_their_own_bucket():
+    levels = response_levels(pd.Series(['Often', ' Often', 'often', None, 'Oftn', 'ALWAYS', 'Never']))
+    assert levels.tolist() == [4, 0, 4, 0, 0, 5, 1]
+    assert top_box_flags(pd.Series(['Often', ' Often', None, 'always'])).tolist() == [True, False, False, True]
+
+
+def test_distribution_rows_sum_to_100(survey):
+    cube = ItemCube.from_frame(survey, survey.columns.tolist())
+    frame = cube.distribution(cube.schools[0])
+    shares = frame.drop(columns='Often + Always').sum(axis=1)
+    assert ((shares - 100).abs() <= 0.5).all()
+    assert frame['No answer'].gt(0).any()
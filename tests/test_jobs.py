@@ -0,0 +1,92 @@
+import multiprocessing
+import sqlite3
+
+from edxso import jobs
+from edxso.incremental import IncrementalDataset
+
+
+def _run_next(queue):
+    job = queue.claim("test-worker")
+    assert job is not None and job["status"] == "running"
+    jobs.run_job(queue, job, api_key=None)
+    return job["id"]
+
+
+def test_report_job_round_trip(tmp_path, survey_csv):
+    queue = jobs.JobQueue(str(tmp_path / "queue.sqlite3"))
+    source = jobs.upload_source(survey_csv, "survey.csv")
+    school = "Synthetic School 0003"
+    job_id = queue.submit("report", {"source": source, "school": school, "format": "HTML", "logo": None}, school)
+    assert queue.get(job_id)["status"] == "queued"
+
+    assert _run_next(queue) == job_id
+    job = queue.get(job_id)
+    assert job["status"] == "done" and job["progress"] == 1
+    assert job["result_mime"] == "text/html"
+    html = queue.result_bytes(job_id).decode("utf-8")
+    assert school in html
+    assert queue.claim("test-worker") is None
+
+
+def test_sessions_only_see_their_own_jobs(tmp_path):
+    queue = jobs.JobQueue(str(tmp_path / "queue.sqlite3"))
+    mine = queue.submit("report", {}, "mine", owner="session-a")
+    theirs = queue.submit("report", {}, "theirs", owner="session-b")
+    assert [j["id"] for j in queue.recent(owner="session-a")] == [mine]
+    assert queue.get(theirs, owner="session-a") is None
+    queue.complete(theirs, b"report", "theirs.html")
+    assert queue.result_bytes(theirs, owner="session-a") is None
+    assert queue.result_bytes(theirs, owner="session-b") == b"report"
+
+
+def test_queue_from_before_owners_is_migrated(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(jobs.SCHEMA.replace("    owner TEXT,\n", ""))
+    conn.close()
+    queue = jobs.JobQueue(path)
+    job_id = queue.submit("report", {}, "label", owner="session-a")
+    assert queue.recent(owner="session-a")[0]["id"] == job_id
+
+
+def test_batch_job_clears_stale_schools(tmp_path, survey):
+    store = IncrementalDataset("jobs-store")
+    store.append(survey.iloc[:400].to_csv(index=False).encode("utf-8"), "wave.csv")
+    stale = store.stale
+    queue = jobs.JobQueue(str(tmp_path / "queue.sqlite3"))
+    params = {"source": {"kind": "store", "name": "jobs-store"}, "schools": stale[:2], "format": "HTML",
+              "logo": None, "jobs": 2}
+    job_id = queue.submit("batch", params, "batch")
+    _run_next(queue)
+    job = queue.get(job_id)
+    assert job["status"] == "done" and job["result_mime"] == "application/zip"
+    assert IncrementalDataset("jobs-store").stale == stale[2:]
+
+
+def _append_wave(survey_csv_rows, n):
+    IncrementalDataset("concurrent").append(survey_csv_rows, f"wave-{n}.csv")
+
+
+def test_concurrent_appends_from_worker_processes(survey):
+    # Job workers and the app update the same store from separate processes
+    ctx = multiprocessing.get_context("spawn")
+    waves = [survey.iloc[n * 200:(n + 1) * 200].to_csv(index=False).encode("utf-8") for n in range(4)]
+    procs = [ctx.Process(target=_append_wave, args=(data, n)) for n, data in enumerate(waves)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+    meta = IncrementalDataset("concurrent").meta
+    assert len(meta["waves"]) == len(set(meta["parts"])) == 4
+    assert meta["rows"] == 800
+
+
+def test_workers_split_the_host_budgets(monkeypatch):
+    from edxso import dataset_cache, pdf_renderer
+
+    monkeypatch.setattr(pdf_renderer, "DEFAULT_BROWSERS", 2)
+    monkeypatch.setattr(dataset_cache, "DEFAULT_CACHE_BYTES", 1024 * 1024 * 1024)
+    assert jobs.worker_env(2) == {"EDXSO_PDF_BROWSERS": "1", "EDXSO_DATASET_CACHE_MB": "512"}
+    assert jobs.worker_env(4) == {"EDXSO_PDF_BROWSERS": "1", "EDXSO_DATASET_CACHE_MB": "256"}
+    assert jobs.worker_env(1) == {"EDXSO_PDF_BROWSERS": "2", "EDXSO_DATASET_CACHE_MB": "1024"}
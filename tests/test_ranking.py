@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from edxso.ranking import RANKED_METRICS, RankIndex
+
+
+def _schools(rng, names):
+    # Rounded values so ties are common, as in real stats rows
+    return pd.DataFrame({m: np.round(rng.uniform(20, 100, len(names)), 0) for m in RANKED_METRICS}, index=names)
+
+
+def test_updated_matches_full_resort():
+    rng = np.random.default_rng(3)
+    before = _schools(rng, [f"S{i}" for i in range(200)])
+    index = RankIndex.from_frame(before)
+
+    # A new wave changes some schools and adds others
+    changed = list(rng.choice(before.index, 25, replace=False))
+    after = before.copy()
+    after.loc[changed] = _schools(rng, changed)
+    after = pd.concat([after, _schools(rng, [f"New{i}" for i in range(5)])])
+    touched = changed + [f"New{i}" for i in range(5)]
+    old_rows = {s: before.loc[s] for s in changed}
+    new_rows = {s: after.loc[s] for s in touched}
+
+    updated = index.updated(old_rows, new_rows)
+    full = RankIndex.from_frame(after)
+    assert updated.n == full.n == 205
+    for metric in RANKED_METRICS:
+        np.testing.assert_array_equal(updated.sorted[metric], full.sorted[metric])
+    for school in after.index:
+        assert updated.describe(after.loc[school]) == full.describe(after.loc[school])
+
+
+def test_position_counts_ties_half():
+    index = RankIndex.from_frame(pd.DataFrame({m: [10.0, 20.0, 20.0, 30.0] for m in RANKED_METRICS}))
+    assert index.position('mean_score', 10.0) == (1, 12.5)
+    assert index.position('mean_score', 20.0) == (2, 50.0)
+    assert index.position('mean_score', 30.0) == (4, 87.5)
+
+
+def test_single_school_is_not_ranked():
+    row = {m: 50.0 for m in RANKED_METRICS}
+    described = RankIndex.from_frame(pd.DataFrame([row])).describe(row)
+    assert described['peer_schools'] == 1
+    assert all(described[f'{m}_rank'] is None and described[f'{m}_percentile'] is None for m in RANKED_METRICS)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from edxso.scoring import categorize, score_responses
+
+SCALE_MAP = {'Never': 1, 'Rarely': 2, 'Sometimes': 3, 'Often': 4, 'Always': 5}
+REVERSE_MAP = {'Never': 5, 'Rarely': 4, 'Sometimes': 3, 'Often': 2, 'Always': 1}
+
+
+def rowwise_score(row, cols):
+    # The original per-row scorer, kept as the reference
+    def get_val(val, mapping):
+        if pd.isna(val):
+            return 3
+        s = str(val).strip().replace('\xa0', ' ').capitalize()
+        return mapping.get(s, 3)
+
+    score = 0
+    for i in range(8, 23):
+        score += get_val(row[cols[i]], SCALE_MAP)
+    for i in range(23, 28):
+        score += get_val(row[cols[i]], REVERSE_MAP)
+    return score
+
+
+def rowwise_category(s):
+    if s <= 39:
+        return 'Balanced'
+    elif s <= 54:
+        return 'Mild'
+    elif s <= 69:
+        return 'Moderate'
+    elif s <= 84:
+        return 'High'
+    return 'Severe'
+
+
+def test_scores_match_rowwise_scorer(survey):
+    cols = survey.columns.tolist()
+    expected = survey.apply(rowwise_score, axis=1, cols=cols)
+    scored = score_responses(survey.copy())
+    np.testing.assert_array_equal(scored['total_score'].to_numpy(), expected.to_numpy())
+    assert scored['category'].tolist() == [rowwise_category(s) for s in expected]
+
+
+def test_category_edges():
+    scores = np.array([20, 39, 40, 54, 55, 69, 70, 84, 85, 100])
+    assert categorize(scores).tolist() == [rowwise_category(s) for s in scores]
@@ -0,0 +1,18 @@
+from edxso import telemetry
+
+
+def test_span_records_timing_and_rss():
+    with telemetry.trace("rss") as trace_id, telemetry.span("unit", rows=3) as s:
+        s.hit()
+    (record,) = telemetry.recent_spans(trace_id)
+    assert record["stage"] == "unit" and record["rows"] == 3 and record["cache"] == "hit"
+    assert record["peak_rss_delta_kb"] >= 0
+
+
+def test_span_without_resource_module(monkeypatch):
+    # Windows has no `resource`; spans still record, just without RSS
+    monkeypatch.setattr(telemetry, "resource", None)
+    with telemetry.trace("no-rss") as trace_id, telemetry.span("unit"):
+        pass
+    (record,) = telemetry.recent_spans(trace_id)
+    assert "peak_rss_delta_kb" not in record and record["wall_ms"] >= 0
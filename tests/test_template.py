@@ -0,0 +1,39 @@
+import pytest
+
+from edxso.template import CompiledTemplate, TemplateError
+
+SOURCE = "<h1>[TITLE]</h1><p>[BODY]</p><p>[BODY]</p><footer>[YEAR]</footer>"
+
+
+def test_render_matches_replace_chain():
+    values = {'[TITLE]': 'Report', '[BODY]': '<b>ok</b>', '[YEAR]': 2026}
+    expected = SOURCE
+    for key, val in values.items():
+        expected = expected.replace(key, str(val))
+    assert CompiledTemplate(SOURCE).render(values) == expected
+
+
+def test_escaped_placeholders_are_html_escaped():
+    template = CompiledTemplate(SOURCE, escaped=['[BODY]'])
+    html = template.render({'[TITLE]': '<i>kept</i>', '[BODY]': '<script>alert("x")</script> & more', '[YEAR]': 2026})
+    assert '<i>kept</i>' in html
+    assert '<script>' not in html
+    assert html.count('&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; more') == 2
+
+
+def test_placeholder_like_values_are_not_substituted_again():
+    html = CompiledTemplate(SOURCE).render({'[TITLE]': '[BODY]', '[BODY]': 'text', '[YEAR]': '[TITLE]'})
+    assert html == "<h1>[BODY]</h1><p>text</p><p>text</p><footer>[TITLE]</footer>"
+
+
+def test_missing_and_unknown_values_raise():
+    template = CompiledTemplate(SOURCE)
+    with pytest.raises(TemplateError, match=r"\[YEAR\]"):
+        template.render({'[TITLE]': '', '[BODY]': ''})
+    with pytest.raises(TemplateError, match=r"\[EXTRA\]"):
+        template.render({'[TITLE]': '', '[BODY]': '', '[YEAR]': '', '[EXTRA]': ''})
+
+
+def test_escaped_key_must_be_in_template():
+    with pytest.raises(TemplateError):
+        CompiledTemplate(SOURCE, escaped=['[MISSING]'])